@@ -0,0 +1,26 @@
+"""
+Benchmarks for the external calibration (run with asv).
+"""
+import numpy as np
+
+from micropyro.external_calibration import bootstrap_slopes
+
+
+class BootstrapCalibration:
+    """
+    Bootstrap of the calibration slope for 10^4 to 10^6 resamples, in a single process and in a pool.
+    """
+    params = ([10 ** 4, 10 ** 5, 10 ** 6], [1, 4])
+    param_names = ['n_resamples', 'n_jobs']
+    timeout = 300
+
+    def setup(self, n_resamples, n_jobs):
+        rng = np.random.default_rng(0)
+        self.x = rng.uniform(0.05, 1, 30)
+        self.y = 3 * self.x + rng.normal(0, 0.05, 30)
+
+    def time_bootstrap_slopes(self, n_resamples, n_jobs):
+        bootstrap_slopes(self.x, self.y, n_resamples, n_jobs=n_jobs, random_state=0)
+
+    def peakmem_bootstrap_slopes(self, n_resamples, n_jobs):
+        bootstrap_slopes(self.x, self.y, n_resamples, n_jobs=n_jobs, random_state=0)
@@ -0,0 +1,50 @@
+"""
+Benchmarks for the memory of the compound database (run with asv).
+"""
+import os
+import shutil
+import tempfile
+
+from micropyro.read_database import compact_database_df
+
+from .synthetic import synthetic_prepared_database
+
+
+class DatabaseMemory:
+    """
+    Memory of a database of 10^6 compounds, with the default dtypes, compact dtypes,
+    and compact dtypes with the numeric block memory-mapped.
+    """
+    params = [['default', 'compact', 'memmap']]
+    param_names = ['mode']
+    timeout = 600
+
+    def setup_cache(self):
+        return synthetic_prepared_database(10 ** 6)
+
+    def setup(self, database_df, mode):
+        self.tmpdir = tempfile.mkdtemp()
+        self.memmap = os.path.join(self.tmpdir, 'database.bin') if mode == 'memmap' else None
+
+    def teardown(self, database_df, mode):
+        shutil.rmtree(self.tmpdir)
+
+    def _database_df(self, database_df, mode):
+        if mode == 'default':
+            return database_df
+        return compact_database_df(database_df, memmap=self.memmap)
+
+    def track_memory_usage(self, database_df, mode):
+        """
+        Memory of the columns in the process (the memory-mapped columns are not counted, nor the index).
+        """
+        df = self._database_df(database_df, mode)
+        memory_usage = df.memory_usage(deep=True, index=False)
+        if self.memmap:
+            memory_usage = memory_usage.drop([column for column in df.columns if df[column].dtype.kind in 'if'])
+        return int(memory_usage.sum())
+
+    track_memory_usage.unit = 'bytes'
+
+    def time_compact(self, database_df, mode):
+        self._database_df(database_df, mode)
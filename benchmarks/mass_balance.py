@@ -0,0 +1,31 @@
+"""
+Benchmarks for the mass balance of the experimental matrix (run with asv).
+"""
+from .synthetic import synthetic_matrix
+
+
+class MassBalance:
+    """
+    Mass balance of an experimental matrix with 10^5 runs.
+    """
+    params = [10 ** 3, 10 ** 5]
+    param_names = ['n_runs']
+
+    def setup(self, n_runs):
+        self.matrix = synthetic_matrix(n_runs)
+        self.mass_balance = self.matrix.mass_balance(concentration=0.03)
+        self.hook = self.matrix.df['hook'].to_numpy() + 0.01
+
+    def time_compute_is_amount_char(self, n_runs):
+        self.matrix.compute_is_amount(0.03)
+        self.matrix.compute_char()
+
+    def time_full_update(self, n_runs):
+        self.mass_balance.update(force=True)
+
+    def time_incremental_update(self, n_runs):
+        self.mass_balance.set_column('hook', self.hook)
+        self.mass_balance.update()
+
+    def time_update_unchanged(self, n_runs):
+        self.mass_balance.update()
@@ -0,0 +1,174 @@
+"""
+Benchmarks of the processing pipeline, from the blob file to the post-processing of many runs (run with asv).
+Every step is timed from 10^2 to 10^6 rows, to track how it scales.
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from micropyro import (CompoundVocabulary, ReadDatabase, ExternalCalibration, read_blob_file,
+                       perform_matching_database, compute_yields, compute_yields_is, compute_elemental_composition,
+                       concat_results, yields_matrix, bin_yields_mw, top_n_yields, get_yields_summary_runs)
+
+from .synthetic import (INTERNAL_STANDARD, synthetic_database, synthetic_prepared_database, synthetic_blob_table,
+                        synthetic_matched_blob, synthetic_results, synthetic_matrix)
+
+SIZES = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+
+class _Pipeline:
+    """
+    Common parameters of the pipeline benchmarks: the number of rows of the table processed.
+    """
+    params = [SIZES]
+    param_names = ['n_rows']
+    timeout = 600
+
+
+class ReadBlobFile(_Pipeline):
+    """
+    Reading a blob file exported by GC Image with n_rows blobs.
+    """
+
+    def setup(self, n_rows):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'blob.csv')
+        database = synthetic_database(min(n_rows, 10 ** 4))
+        synthetic_blob_table(database, n_rows).to_csv(self.filename, index=False)
+
+    def teardown(self, n_rows):
+        shutil.rmtree(self.tmpdir)
+
+    def time_read_blob_file(self, n_rows):
+        read_blob_file(self.filename)
+
+    def peakmem_read_blob_file(self, n_rows):
+        read_blob_file(self.filename)
+
+
+class BuildDatabase(_Pipeline):
+    """
+    Construction of the database (atoms, ecn and mrf) from a table of n_rows compounds.
+    """
+
+    def setup(self, n_rows):
+        self.database = synthetic_database(n_rows)
+
+    def time_read_database(self, n_rows):
+        ReadDatabase(self.database.copy())
+
+
+class MatchDatabase(_Pipeline):
+    """
+    Matching of a blob table of n_rows blobs with a database of 10^4 compounds.
+    """
+
+    def setup(self, n_rows):
+        self.database = synthetic_prepared_database(10 ** 4)
+        blob_table = synthetic_blob_table(self.database, n_rows)
+        self.blob_df = pd.DataFrame({'volume': blob_table['Volume'].values},
+                                    index=blob_table['Compound Name'].values)
+
+    def time_perform_matching_database(self, n_rows):
+        perform_matching_database(self.blob_df.copy(), self.database, extra_columns=['group', 'c', 'h', 'o', 'n'])
+
+
+class ComputeYields(_Pipeline):
+    """
+    Yields of a matched blob table of n_rows blobs (and as many compounds in the database),
+    using an internal standard or an external calibration.
+    """
+
+    def setup(self, n_rows):
+        database = synthetic_prepared_database(n_rows)
+        self.blob_df = synthetic_matched_blob(database, n_rows)
+        self.experiment_row = synthetic_matrix(1).df.iloc[0]
+        self.experiment_row['is_amount'] = 0.01
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.calibration_file = os.path.join(self.tmpdir, 'calibration.json')
+        with open(self.calibration_file, 'w') as fp:
+            fp.write('{"slope": 3000.0}')
+
+        self.results_df = compute_yields_is(self.experiment_row, self.blob_df.copy(), INTERNAL_STANDARD)
+
+    def teardown(self, n_rows):
+        shutil.rmtree(self.tmpdir)
+
+    def time_compute_yields_is(self, n_rows):
+        compute_yields_is(self.experiment_row, self.blob_df.copy(), INTERNAL_STANDARD)
+
+    def time_compute_yields_calibration(self, n_rows):
+        compute_yields(self.experiment_row, self.blob_df.copy(), INTERNAL_STANDARD, self.calibration_file,
+                       compounds_drop=None)
+
+    def time_compute_elemental_composition(self, n_rows):
+        compute_elemental_composition(self.results_df.copy())
+
+
+class LinearCalibration(_Pipeline):
+    """
+    External calibration with n_rows calibration points, with 1 % of outliers.
+    """
+
+    def setup(self, n_rows):
+        rng = np.random.default_rng(0)
+        sample = rng.uniform(0.05, 1, n_rows)
+        volume = 3000 * sample * rng.normal(1, 0.01, n_rows)
+        volume[:max(1, n_rows // 100)] *= 2
+        self.calibration_df = pd.DataFrame({'Sample': sample, 'Volume': volume},
+                                           index=pd.Index([f'Run_{i}' for i in range(n_rows)], name='Filename'))
+        self.tmpdir = tempfile.mkdtemp()
+        self.to_file = os.path.join(self.tmpdir, 'calibration.json')
+
+    def teardown(self, n_rows):
+        shutil.rmtree(self.tmpdir)
+
+    def time_linear_calibration(self, n_rows):
+        ExternalCalibration(self.calibration_df.copy()).linear_calibration(to_file=self.to_file)
+
+
+class MultipleFiles(_Pipeline):
+    """
+    Post-processing of the results of 10 runs with n_rows rows (compounds) in total.
+    """
+
+    def setup(self, n_rows):
+        database = synthetic_prepared_database(n_rows)
+        self.blob_dfs = synthetic_results(database, 10, max(1, n_rows // 10))
+        self.vocabulary = CompoundVocabulary.from_database(database)
+        self.results = concat_results(self.blob_dfs)
+        self.edges = [0, 50, 100, 150, 200, 250, 300]
+
+    def time_concat_results(self, n_rows):
+        concat_results(self.blob_dfs)
+
+    def peakmem_concat_results(self, n_rows):
+        concat_results(self.blob_dfs)
+
+    def time_concat_results_vocabulary(self, n_rows):
+        concat_results(self.blob_dfs, vocabulary=self.vocabulary)
+
+    def peakmem_concat_results_vocabulary(self, n_rows):
+        concat_results(self.blob_dfs, vocabulary=self.vocabulary)
+
+    def time_yields_matrix(self, n_rows):
+        yields_matrix(self.blob_dfs)
+
+    def time_yields_matrix_vocabulary(self, n_rows):
+        yields_matrix(self.blob_dfs, vocabulary=self.vocabulary)
+
+    def time_bin_yields_mw(self, n_rows):
+        bin_yields_mw(self.blob_dfs, self.edges)
+
+    def time_top_n_yields(self, n_rows):
+        top_n_yields(self.results, 10)
+
+    def time_get_yields_summary_runs(self, n_rows):
+        get_yields_summary_runs(self.results, groupings=['group'])
+
+    def peakmem_get_yields_summary_runs(self, n_rows):
+        get_yields_summary_runs(self.results, groupings=['group'])
@@ -0,0 +1,50 @@
+"""
+Benchmarks for the memory-mapped results store (run with asv).
+"""
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from micropyro import CompoundVocabulary, ResultsStore
+
+from .synthetic import synthetic_prepared_database
+
+
+class Store:
+    """
+    Store with 10^3 runs of 10^3 to 10^4 compounds (10^6 to 10^7 rows).
+    """
+    params = [[10 ** 3, 10 ** 4]]
+    param_names = ['n_compounds']
+    timeout = 600
+
+    n_runs = 10 ** 3
+
+    def setup(self, n_compounds):
+        self.tmpdir = tempfile.mkdtemp()
+        database = synthetic_prepared_database(n_compounds)
+        rng = np.random.default_rng(0)
+        self.store = ResultsStore(self.tmpdir, vocabulary=CompoundVocabulary.from_database(database))
+        for i_run in range(self.n_runs):
+            yields = rng.uniform(0, 1, n_compounds)
+            results_df = pd.DataFrame({'volume': yields, 'moles mrf': yields, 'mass mrf': yields,
+                                       'yield mrf': yields}, index=database.index)
+            self.store.append(f'run {i_run}', results_df)
+        self.results_df = results_df
+
+    def teardown(self, n_compounds):
+        shutil.rmtree(self.tmpdir)
+
+    def time_append(self, n_compounds):
+        self.store.append(f'run {len(self.store.run_names)}', self.results_df)
+
+    def time_sum_by_run(self, n_compounds):
+        self.store.sum_by_run('yield')
+
+    def time_run(self, n_compounds):
+        self.store.run(f'run {self.n_runs // 2}')
+
+    def peakmem_sum_by_run(self, n_compounds):
+        ResultsStore(self.tmpdir).sum_by_run('yield')
@@ -0,0 +1,124 @@
+"""
+Generators of synthetic data of configurable size for the benchmarks:
+compound databases, blob tables (as exported by GC Image), experimental matrices and results.
+All the generators are deterministic for a given seed.
+"""
+import numpy as np
+import pandas as pd
+
+from micropyro import ReadDatabase, ReadExperimentTable
+
+INTERNAL_STANDARD = 'fluoranthene'
+
+_ATOMS_MW = {'C': 12.011, 'H': 1.00784, 'O': 15.999, 'N': 14.0067}
+
+
+def synthetic_database(n_compounds, seed=0):
+    """
+    Database of compounds as read from a file (before ReadDatabase), with the columns
+    MW, Formula, N_Benz, Grouping and Group. The internal standard (fluoranthene) is always included.
+    """
+    rng = np.random.default_rng(seed)
+    n_atoms = {'C': rng.integers(1, 20, n_compounds), 'H': rng.integers(0, 30, n_compounds),
+               'O': rng.integers(0, 4, n_compounds), 'N': rng.integers(0, 2, n_compounds)}
+    n_atoms['C'][0], n_atoms['H'][0], n_atoms['O'][0], n_atoms['N'][0] = 16, 10, 0, 0
+
+    formula = pd.Series([''] * n_compounds)
+    mw = np.zeros(n_compounds)
+    for atom, counts in n_atoms.items():
+        counts_str = pd.Series(counts.astype(str))
+        counts_str[counts == 1] = ''
+        formula = formula + np.where(counts > 0, atom + counts_str, '')
+        mw += counts * _ATOMS_MW[atom]
+
+    names = [INTERNAL_STANDARD] + [f'compound {i}' for i in range(1, n_compounds)]
+    database = pd.DataFrame({'MW': mw.round(2), 'Formula': formula.values,
+                             'N_Benz': rng.integers(0, 4, n_compounds),
+                             'Grouping': rng.integers(1, 10, n_compounds),
+                             'Group': rng.choice(['phenols', 'aromatics', 'furans', 'acids', 'gases'],
+                                                 n_compounds)},
+                            index=pd.Index(names, name='Compound'))
+    return database
+
+
+def synthetic_prepared_database(n_compounds, seed=0):
+    """
+    Database of compounds as prepared by ReadDatabase (with c, h, o, n, ecn and mrf).
+    Computed with the same formulas, but vectorized, so that large databases can be created quickly.
+    """
+    database = synthetic_database(n_compounds, seed)
+    database.columns = database.columns.str.lower()
+    database['formula'] = database['formula'].str.lower()
+    for atom in ReadDatabase.atoms:
+        counts = database['formula'].str.extract(f'{atom}([0-9]*)', expand=False)
+        database[atom] = np.where(counts.isna(), 0, pd.to_numeric(counts.replace('', '1'), errors='coerce'))
+        database[atom] = database[atom].fillna(0).astype(int)
+    database['ecn'] = database['c']
+    combust = ReadDatabase._compute_combust(database['c'], database['h'], database['o'], database['n'])
+    database['mrf'] = -0.071 + 0.000857 * combust + database['n_benz'] * 0.127
+    database.index.name = None
+    return database
+
+
+def synthetic_blob_table(database, n_blobs, seed=0):
+    """
+    Blob table as exported by GC Image, with n_blobs blobs of compounds of the database (and the internal
+    standard).
+    """
+    rng = np.random.default_rng(seed)
+    names = np.asarray(database.index)
+    compounds = names[rng.integers(1, len(names), n_blobs)] if len(names) > 1 else np.repeat(names, n_blobs)
+    compounds[0] = names[0]
+
+    return pd.DataFrame({'BlobID': np.arange(1, n_blobs + 1), 'Compound Name': compounds, 'Group Name': '',
+                         'Inclusion': True, 'Internal Standard': 0,
+                         'Retention I (min)': rng.uniform(5, 60, n_blobs).round(1),
+                         'Retention II (sec)': rng.uniform(1, 8, n_blobs).round(1),
+                         'Peak Value': rng.uniform(1, 1000, n_blobs).round(1),
+                         'Area (pixel count)': rng.integers(10, 10000, n_blobs),
+                         'Volume': rng.uniform(100, 100000, n_blobs).round(1)})
+
+
+def synthetic_matched_blob(database, n_blobs, seed=0, extra_columns=('group', 'c', 'h', 'o', 'n')):
+    """
+    Blob dataframe as read by read_blob_file and matched with the (prepared) database,
+    built with a vectorized join so that large tables can be created quickly.
+    """
+    blob_table = synthetic_blob_table(database, n_blobs, seed)
+    blob_df = pd.DataFrame({'volume': blob_table['Volume'].values},
+                           index=blob_table['Compound Name'].str.lower().values)
+    columns = ['mw', 'ecn', 'mrf', *extra_columns]
+    return blob_df.join(database[columns])
+
+
+def synthetic_results(database, n_runs, n_blobs, seed=0):
+    """
+    List of results dataframes (as computed by compute_yields) of n_runs runs with n_blobs compounds each.
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    for i_run in range(n_runs):
+        results_df = synthetic_matched_blob(database, n_blobs, seed=seed + i_run)
+        results_df = results_df[~results_df.index.duplicated()].copy()
+        results_df['yield mrf'] = rng.uniform(0, 2, len(results_df))
+        results.append(results_df)
+    return results
+
+
+def synthetic_matrix(n_runs, seed=0):
+    """
+    Experimental matrix with n_runs experiments, as read by ReadExperimentTable.
+    """
+    rng = np.random.default_rng(seed)
+    data = {'Filename': [f'{i} ug Py_{t}C' for i, t in zip(range(n_runs), rng.integers(400, 900, n_runs))],
+            'T (C)': rng.integers(400, 900, n_runs),
+            'Holder (mg)': rng.uniform(380, 390, n_runs),
+            'Cup (mg)': rng.uniform(60, 70, n_runs),
+            'IS (mg)': rng.uniform(0.2, 0.4, n_runs),
+            'Sample (mg)': rng.uniform(0.05, 0.3, n_runs),
+            'Wool (mg)': rng.uniform(0.5, 0.7, n_runs),
+            'Hook (mg)': rng.uniform(69, 70, n_runs)}
+    matrix = ReadExperimentTable.from_dict(data)
+    matrix.df['total after w/o holder'] = matrix.df[['cup', 'wool', 'hook']].sum(axis=1) + \
+        matrix.df['sample'] * rng.uniform(0.1, 0.3, n_runs)
+    return matrix
@@ -0,0 +1,41 @@
+"""
+Benchmarks for the readers of the json files with totals (run with asv).
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from micropyro.utilities import read_totals_directory, reader_json_totals
+
+
+class ReadTotals:
+    """
+    Directory with 10^4 totals files.
+    """
+    params = [10 ** 3, 10 ** 4]
+    param_names = ['n_files']
+    timeout = 300
+
+    def setup(self, n_files):
+        self.directory = tempfile.mkdtemp()
+        data = {"total_FID": 50., "atoms_FID": {"c": 40., "h": 4., "o": 6.},
+                "grouping": {f"group {i}": 1. for i in range(20)}}
+        self.filenames = []
+        for i in range(n_files):
+            filename = os.path.join(self.directory, f'{i} ug Py_{400 + i % 500}C-R_350C.totals.json')
+            with open(filename, 'w') as fp:
+                json.dump(data, fp)
+            self.filenames.append(filename)
+
+    def teardown(self, n_files):
+        shutil.rmtree(self.directory)
+
+    def time_reader_json_totals(self, n_files):
+        reader_json_totals(self.filenames)
+
+    def time_read_totals_directory(self, n_files):
+        read_totals_directory(self.directory)
+
+    def time_read_totals_directory_threads(self, n_files):
+        read_totals_directory(self.directory, n_jobs=8)
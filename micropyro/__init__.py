@@ -2,17 +2,26 @@ from ._version import get_versions
 
 __version__ = get_versions()['version']
 del get_versions
+from .logs import *
+from .profiling import *
 from .utilities import *
+from .vocabulary import *
 from .read_database import *
+from .match_report import *
 from .blob_file import *
 from .experimental_matrix import *
+from .mass_balance import *
 from .compute_yields import *
 from .external_calibration import *
 from .postprocessing_tools_single_file import *
 from .postprocessing_tools_multiple_files import *
+from .reports import *
 from .read_char_gas_yields import *
-
-try:
-    from .generate_database import *
-except ModuleNotFoundError:
-    pass
\ No newline at end of file
+from .results_store import *
+from .batch import *
+from .service import *
+from .watch import *
+from .pubchem import *
+from .smiles import *
+from .structures import *
+from .generate_database import *
\ No newline at end of file
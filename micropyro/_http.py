@@ -0,0 +1,200 @@
+"""
+Minimal HTTP/1.1 on asyncio streams, for the yields service (see service.py): requests with a body given by
+Content-Length, json responses and keep-alive connections. Chunked request bodies are not supported.
+The client side (see pubchem.py) sends requests without body and reads responses with a Content-Length,
+chunked or ended by the connection close.
+"""
+import json
+from collections import namedtuple
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+Request = namedtuple('Request', ['method', 'path', 'headers', 'body'])
+Response = namedtuple('Response', ['status', 'headers', 'body'])
+
+
+class HTTPError(Exception):
+    """
+    Error to be answered with the given status code and message.
+    """
+
+    def __init__(self, status, message=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+
+
+async def read_request(reader, max_body_size):
+    """
+    Reads a request from the stream.
+
+    Parameters
+    ----------
+    reader: asyncio.StreamReader
+    max_body_size: int
+        maximum size of the body (bytes)
+
+    Returns
+    -------
+    request: Request or None
+        None if the connection was closed before a new request.
+    """
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, 'Malformed request line')
+
+    headers = await _read_headers(reader)
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HTTPError(411, 'Content-Length required')
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(400, 'Invalid Content-Length')
+    if length > max_body_size:
+        raise HTTPError(413, f'Body larger than {max_body_size} bytes')
+    body = await reader.readexactly(length) if length else b''
+
+    return Request(method.upper(), urlsplit(target).path, headers, body)
+
+
+def read_json(request):
+    """
+    Body of the request as json.
+    """
+    try:
+        return json.loads(request.body)
+    except ValueError as error:
+        raise HTTPError(400, f'Invalid json: {error}')
+
+
+async def write_json_response(writer, status, data, keep_alive=True):
+    """
+    Writes a json response to the stream.
+
+    Parameters
+    ----------
+    writer: asyncio.StreamWriter
+    status: int
+        status code
+    data: dict
+        data sent as json
+    keep_alive: bool
+        keep the connection open after the response
+    """
+    body = json.dumps(_replace_nans(data), default=_to_builtin).encode()
+    head = (f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+
+
+def keep_alive(message):
+    """
+    Whether the other side wants to keep the connection open (the default in HTTP/1.1), for a request or a
+    response.
+    """
+    return message.headers.get('connection', '').lower() != 'close'
+
+
+async def write_request(writer, method, target, host, headers=None):
+    """
+    Writes a request without body to the stream.
+
+    Parameters
+    ----------
+    writer: asyncio.StreamWriter
+    method: str
+    target: str
+        path and query
+    host: str
+        value of the Host header
+    headers: dict
+        other headers
+    """
+    lines = [f'{method} {target} HTTP/1.1', f'Host: {host}', 'Connection: keep-alive']
+    lines.extend(f'{name}: {value}' for name, value in (headers or {}).items())
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+
+
+async def read_response(reader):
+    """
+    Reads a response from the stream.
+
+    Parameters
+    ----------
+    reader: asyncio.StreamReader
+
+    Returns
+    -------
+    response: Response
+
+    Raises
+    ------
+    ConnectionError
+        if the connection was closed before the status line (e.g. an idle connection closed by the server)
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError('Connection closed by the server')
+    try:
+        status = int(status_line.split()[1])
+    except (IndexError, ValueError):
+        raise ConnectionError(f'Malformed status line: {status_line!r}')
+
+    headers = await _read_headers(reader)
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        # trailers
+        await _read_headers(reader)
+        body = b''.join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    elif status in (204, 304) or 100 <= status < 200:
+        body = b''
+    else:
+        # the body ends with the connection
+        body = await reader.read()
+        headers['connection'] = 'close'
+    return Response(status, headers, body)
+
+
+async def _read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+def _to_builtin(value):
+    # numpy numbers (e.g. from the summaries) and nans
+    try:
+        value = value.item()
+    except AttributeError:
+        raise TypeError(f'{type(value).__name__} is not JSON serializable')
+    return None if value != value else value
+
+
+def _replace_nans(data):
+    # json does not have nan, they are sent as null
+    if isinstance(data, dict):
+        return {key: _replace_nans(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_replace_nans(value) for value in data]
+    if isinstance(data, float) and data != data:
+        return None
+    return data
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .blob_file import perform_matching_database, read_blob_file
+from .compute_yields import compute_yields_calibration, compute_yields_is, save_results_yields
+from .experimental_matrix import ReadExperimentTable
+from .match_report import MatchReport
+from .postprocessing_tools_single_file import get_yields_summary
+from .profiling import Profiler, profile_stage
+from .read_database import ReadDatabase
+from .utilities import get_directory_index, write_json
+
+BLOB_SUFFIX = '.cdf_img01_Blob_Table.csv'
+MANIFEST_FILENAME = 'micropyro_manifest.json'
+
+
+def read_database_file(filename):
+    """
+    Reads a database from a file (csv or excel, given by the extension), or the internal database.
+
+    Parameters
+    ----------
+    filename: str
+        name of the file, or "internal" to use the internal database.
+
+    Returns
+    ---------
+    database: ReadDatabase
+    """
+    if filename == 'internal':
+        return ReadDatabase.from_internal()
+    if filename.lower().endswith(('.xls', '.xlsx')):
+        return ReadDatabase.from_xls(filename)
+    return ReadDatabase.from_csv(filename)
+
+
+def read_experiment_file(filename, use_is=True):
+    """
+    Reads an experimental matrix from a file (csv, json or excel, given by the extension).
+
+    Parameters
+    ----------
+    filename: str
+        name of the file.
+    use_is: bool
+        internal standard used or not.
+
+    Returns
+    ---------
+    experiment_table: ReadExperimentTable
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.xls', '.xlsx'):
+        return ReadExperimentTable.from_xls(filename, use_is=use_is)
+    if extension == '.json':
+        return ReadExperimentTable.from_json(filename, use_is=use_is)
+    return ReadExperimentTable.from_csv(filename, use_is=use_is)
+
+
+def process_run(experiment_name, experiment_row, blob_file, database_df, output_dir, internal_standard_name=None,
+                calibration_file=None, reference_compound=None, compounds_drop=None, extra_columns=None,
+                grouping=None, profile_memory=False, store=None):
+    """
+    Processes a single run: reads the blob file, matches it with the database, computes the yields
+    (with an internal standard or a calibration), and saves the results and the totals to the output directory
+    ({experiment_name}.results.csv and {experiment_name}.totals.json), and optionally to a results store.
+
+    Parameters
+    ----------
+    experiment_name: str
+        name of the experiment (filename in the experimental matrix)
+    experiment_row: df row
+        row of the experimental matrix
+    blob_file: str
+        blob file of the run
+    database_df: df
+        dataframe of the database (ReadDatabase.df)
+    output_dir: str
+        directory where the results are saved
+    internal_standard_name: str
+        name of the internal standard, if the yields are computed with it.
+    calibration_file: str
+        calibration file, if the yields are computed with a calibration.
+    reference_compound: str
+        name of the calibrated compound, if the yields are computed with a calibration.
+    compounds_drop: list of str
+        compounds to drop, if the yields are computed with a calibration.
+    extra_columns: list of str
+        extra columns to copy from the database (see perform_matching_database)
+    grouping: str
+        grouping used for the summary (see get_yields_summary)
+    profile_memory: bool
+        also record the peak memory of each stage (see Profiler)
+    store: ResultsStore
+        store where the results are also appended (under the experiment name)
+
+    Returns
+    ---------
+    run_info: dict
+        experiment name, number of compounds, time (s) spent in each stage (timings),
+        records of all the stages (stages, see Profiler) and compounds not matched or dropped (report, see
+        MatchReport).
+    """
+    report = MatchReport()
+    with Profiler(memory=profile_memory) as profiler, profiler.run(experiment_name):
+        blob_df = read_blob_file(blob_file)
+        perform_matching_database(blob_df, database_df, extra_columns=extra_columns, report=report,
+                                  run=experiment_name)
+
+        if calibration_file:
+            results_df = compute_yields_calibration(experiment_row, blob_df, reference_compound, calibration_file,
+                                                    compounds_drop=compounds_drop, report=report,
+                                                    run=experiment_name)
+        else:
+            results_df = compute_yields_is(experiment_row, blob_df, internal_standard_name, report=report,
+                                           run=experiment_name)
+
+        with profile_stage('write_results') as record:
+            save_results_yields(results_df, os.path.join(output_dir, f'{experiment_name}.results.csv'))
+            get_yields_summary(results_df, grouping,
+                               to_file=os.path.join(output_dir, f'{experiment_name}.totals.json'))
+            if store is not None:
+                store.append(experiment_name, results_df)
+            record['rows'] = len(results_df)
+
+    # time of the main stages, the nested ones (e.g. the writers) are only in the records
+    timings = {}
+    for stage in profiler.records:
+        if stage['depth'] == 0:
+            timings[stage['stage']] = timings.get(stage['stage'], 0) + stage['wall_time']
+
+    return {'experiment': experiment_name, 'n_compounds': len(results_df), 'timings': timings,
+            'stages': profiler.records, 'report': report}
+
+
+def process_campaign(experiment_table, database, blob_dir, output_dir, internal_standard_name=None,
+                     calibration_file=None, reference_compound=None, compounds_drop=None, grouping=None,
+                     n_jobs=1, force=False, profile_memory=False):
+    """
+    Processes all the runs of an experimental matrix (see process_run), in parallel over a pool of processes.
+    The blob files are found in blob_dir by the name of the experiment ({filename}.cdf_img01_Blob_Table.csv,
+    case insensitive).
+    A manifest in the output directory keeps track of the inputs of each run (blob file, row of the matrix and
+    settings), so that the runs that did not change since the last call are skipped, unless force is True.
+
+    Parameters
+    ----------
+    experiment_table: ReadExperimentTable
+        experimental matrix (with the IS amount computed, if used)
+    database: ReadDatabase
+        database of compounds
+    blob_dir: str
+        directory with the blob files
+    output_dir: str
+        directory where the results are saved
+    internal_standard_name, calibration_file, reference_compound, compounds_drop, grouping:
+        see process_run
+    n_jobs: int
+        number of processes. If 1, everything is processed in the current process.
+    force: bool
+        process all the runs, even if they did not change.
+    profile_memory: bool
+        also record the peak memory of each stage (see Profiler)
+
+    Returns
+    ---------
+    runs_info: list of dicts
+        for each run, the experiment name, status (processed, skipped, missing or failed), timings,
+        records of the stages and report of the matching (see process_run).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    database_df = database.df
+    extra_columns, settings = _run_settings(database_df, internal_standard_name, calibration_file,
+                                            reference_compound, compounds_drop, grouping)
+
+    manifest_filename = os.path.join(output_dir, MANIFEST_FILENAME)
+    manifest = _read_manifest(manifest_filename)
+
+    blob_index = get_directory_index(blob_dir)
+    runs_info = []
+    tasks = {}
+    for experiment_name, experiment_row in experiment_table.df.iterrows():
+        blob_file = blob_index.resolve(f'{experiment_name}{BLOB_SUFFIX}')
+        if blob_file is None:
+            runs_info.append({'experiment': experiment_name, 'status': 'missing'})
+            continue
+
+        fingerprint = _fingerprint_run(blob_file, experiment_row, settings)
+        outputs_exist = all(os.path.exists(os.path.join(output_dir, f'{experiment_name}{suffix}'))
+                            for suffix in ('.results.csv', '.totals.json'))
+        if not force and outputs_exist and manifest.get(experiment_name) == fingerprint:
+            runs_info.append({'experiment': experiment_name, 'status': 'skipped'})
+            continue
+
+        tasks[experiment_name] = (fingerprint, (experiment_name, experiment_row, blob_file, output_dir,
+                                                internal_standard_name, calibration_file, reference_compound,
+                                                compounds_drop, extra_columns, grouping, profile_memory))
+
+    task_args = [args for _, args in tasks.values()]
+    if n_jobs == 1:
+        _init_worker(database_df)
+        results = [_process_task(args) for args in task_args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(database_df,)) as executor:
+            results = list(executor.map(_process_task, task_args))
+
+    for run_info in results:
+        if run_info['status'] == 'processed':
+            manifest[run_info['experiment']] = tasks[run_info['experiment']][0]
+        else:
+            manifest.pop(run_info['experiment'], None)
+        runs_info.append(run_info)
+
+    write_json(manifest_filename, manifest)
+    return runs_info
+
+
+# database of the worker processes, set once by the initializer to avoid sending it with every task
+_worker_database_df = None
+
+
+def _init_worker(database_df):
+    global _worker_database_df
+    _worker_database_df = database_df
+
+
+def _process_task(args):
+    experiment_name, experiment_row, blob_file, output_dir, *options = args
+    start = time.perf_counter()
+    try:
+        run_info = process_run(experiment_name, experiment_row, blob_file, _worker_database_df, output_dir,
+                               *options)
+        run_info['status'] = 'processed'
+    except Exception as error:
+        run_info = {'experiment': experiment_name, 'status': 'failed', 'error': f'{type(error).__name__}: {error}'}
+    run_info['wall_time'] = time.perf_counter() - start
+    return run_info
+
+
+def _run_settings(database_df, internal_standard_name, calibration_file, reference_compound, compounds_drop,
+                  grouping):
+    """
+    Extra columns of the database needed by the runs, and settings of the processing kept in the manifest.
+    """
+    # the groupings and atoms are needed for the summary
+    extra_columns = [column for column in (grouping, *ReadDatabase.atoms)
+                     if column is not None and column in database_df.columns]
+    settings = {'internal_standard_name': internal_standard_name, 'calibration_file': calibration_file,
+                'reference_compound': reference_compound, 'compounds_drop': compounds_drop, 'grouping': grouping,
+                'database': _hash_dataframe(database_df)}
+    if calibration_file:
+        settings['calibration'] = _hash_file(calibration_file)
+    return extra_columns, settings
+
+
+def _read_manifest(filename):
+    try:
+        with open(filename, 'r') as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {}
+
+
+def _fingerprint_run(blob_file, experiment_row, settings):
+    """
+    Fingerprint of the inputs of a run: size and modification time of the blob file, values of the matrix row,
+    and settings of the processing.
+    """
+    stat = os.stat(blob_file)
+    data = {'blob_file': [os.path.basename(blob_file), stat.st_size, stat.st_mtime_ns],
+            'experiment': experiment_row.to_json(), 'settings': settings}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _hash_file(filename):
+    with open(filename, 'rb') as fp:
+        return hashlib.sha1(fp.read()).hexdigest()
+
+
+def _hash_dataframe(df):
+    return hashlib.sha1(df.to_csv().encode()).hexdigest()
@@ -1,6 +1,15 @@
+import logging
+
 import pandas as pd
 
+from .logs import get_logger, summarize_names
+from .match_report import MatchReport
+from .profiling import profile_stage
+
+_logger = get_logger(__name__)
 
+
+@profile_stage()
 def read_blob_file(filename, drop_useless_columns=True, index_col=1):
     """
     Reads a blob file (CSV) from GC Image software.
@@ -44,7 +53,7 @@ def read_blob_file(filename, drop_useless_columns=True, index_col=1):
     return blob_file
 
 
-def check_matches_database(blob_df, database_df):
+def check_matches_database(blob_df, database_df, report=None, run=None):
     """
     Function to check matches with the df. Only provides the name of **not found compounds**.
     Can be used when new files are introduced.
@@ -55,9 +64,21 @@ def check_matches_database(blob_df, database_df):
             Read using read_blob_file
     database_df: dataframe
             Created with the class ReadDatabase
+    report: MatchReport
+            Report where the compounds not found are added. If not given, a new one is created.
+    run: str
+            Name of the run (experiment) in the report.
+
+    Returns
+    ---------
+    report: MatchReport
+            with the compounds not found in the database.
     """
-    for compound, _ in blob_df.iterrows():
-        check_match_database(compound, database_df)
+    if report is None:
+        report = MatchReport()
+    matched = blob_df.index.isin(database_df.index)
+    _add_unmatched(report, run, blob_df.index[~matched])
+    return report
 
 
 def check_match_database(compound, database_df):
@@ -77,16 +98,18 @@ def check_match_database(compound, database_df):
         Exists or not
     """
     if compound not in database_df.index:
-        print(f'{compound} not found in df')
+        _logger.debug('%s not found in database', compound)
         return False
     else:
         return True
 
 
-def perform_matching_database(blob_df, database_df, extra_columns=None):
+@profile_stage()
+def perform_matching_database(blob_df, database_df, extra_columns=None, report=None, run=None):
     """
     Function to perform the matching with the df. If the match is correct,
     it will copy the required properties to the blob_df.
+    The compounds not found in the df are logged (as a single summary) and added to the report.
 
     Parameters
     ----------
@@ -97,7 +120,15 @@ def perform_matching_database(blob_df, database_df, extra_columns=None):
     extra_columns: list of str
                 Extra columns to be copied from the df to the blob_df
                 (maybe some gouping or "c", "h", "o", etc. if intending to do elemental balance)
+    report: MatchReport
+                Report where the compounds not found are added. If not given, a new one is created.
+    run: str
+                Name of the run (experiment) in the report.
 
+    Returns
+    ---------
+    report: MatchReport
+                with the compounds not found in the database.
     """
     # get all the columns from the df that start with the word group
     if extra_columns is None:
@@ -111,8 +142,32 @@ def perform_matching_database(blob_df, database_df, extra_columns=None):
     for column in columns_copy:
         blob_df[column] = "nan"
 
+    if report is None:
+        report = MatchReport()
+    matched = blob_df.index.isin(database_df.index)
+    _add_unmatched(report, run, blob_df.index[~matched])
+
     # for each compound, match with the df adding the corresponding values to the columns.
-    for compound, _ in blob_df.iterrows():
-        if check_match_database(compound, database_df):
-            for column in columns_copy:
-                blob_df.loc[compound, column] = database_df.loc[compound, column]
+    for compound in blob_df.index[matched]:
+        for column in columns_copy:
+            blob_df.loc[compound, column] = database_df.loc[compound, column]
+
+    return report
+
+
+def _add_unmatched(report, run, unmatched):
+    """
+    Adds the compounds not found in the database to the report, and logs them (one message per compound at debug
+    level, and a summary with the distinct names).
+    """
+    unmatched = list(unmatched)
+    report.add('unmatched', run, unmatched)
+    if not unmatched:
+        return
+
+    if _logger.isEnabledFor(logging.DEBUG):
+        for compound in unmatched:
+            _logger.debug('%s not found in database', compound)
+    distinct = list(dict.fromkeys(unmatched))
+    run_text = f' in {run}' if run is not None else ''
+    _logger.warning('%d compounds not found in database%s: %s', len(distinct), run_text, summarize_names(distinct))
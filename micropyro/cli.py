@@ -0,0 +1,210 @@
+"""
+Command line interface of micropyro.
+
+Examples
+---------
+    $ micropyro process --matrix experimental_matrix.csv --database database.csv --blob-dir blobs \\
+        --internal-standard fluoranthene --concentration 0.03 --output results --jobs 8 --timings timings.json \\
+        --trace trace.json
+    $ micropyro serve --port 8000 --database internal --calibration phenol=calibration.json --jobs 4
+    $ micropyro watch --matrix experimental_matrix.csv --blob-dir /mnt/gcimage --internal-standard fluoranthene \\
+        --concentration 0.03 --output results --store campaign_store
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from .batch import process_campaign, read_database_file, read_experiment_file
+from .match_report import MatchReport
+from .profiling import write_chrome_trace
+from .results_store import ResultsStore
+from .service import serve
+from .watch import BlobWatcher
+
+
+def main(argv=None):
+    """
+    Entry point of the command line interface.
+
+    Parameters
+    ----------
+    argv: list of str
+        arguments (without the program name). If None, sys.argv is used.
+
+    Returns
+    ---------
+    exit_code: int
+        0 if everything went fine, 1 if any run failed.
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    level = {0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG)
+    logging.basicConfig(format='%(levelname)s %(name)s: %(message)s', level=level)
+    return args.function(args)
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(prog='micropyro', description="Analyse micropyrolysis data from GC Image.")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="show more messages (-v for info, -vv for debug)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    process_parser = subparsers.add_parser('process', help="compute the yields of all the runs of a matrix")
+    _add_run_arguments(process_parser)
+    process_parser.add_argument('--jobs', type=int, default=1, help="number of processes (default 1)")
+    process_parser.add_argument('--force', action='store_true', help="process also the runs that did not change")
+    process_parser.add_argument('--timings', default=None,
+                                help="write the status and timings of the runs as json to this file "
+                                     "('-' for stdout)")
+    process_parser.add_argument('--trace', default=None,
+                                help="write the stages of all the runs as a Chrome trace (json) to this file")
+    process_parser.add_argument('--profile-memory', action='store_true',
+                                help="also record the peak memory of each stage (slower)")
+    process_parser.set_defaults(function=_process)
+
+    serve_parser = subparsers.add_parser('serve', help="serve the computation of yields over HTTP")
+    serve_parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default 127.0.0.1)")
+    serve_parser.add_argument('--port', type=int, default=8000, help="port to listen on (default 8000)")
+    serve_parser.add_argument('--database', action='append', default=None, metavar='[NAME=]FILE',
+                              help="database to keep loaded, 'internal' or a file (csv or excel), named by the "
+                                   "file name if no name is given. Can be repeated (default internal)")
+    serve_parser.add_argument('--calibration', action='append', default=[], metavar='NAME=FILE',
+                              help="calibration file (json) to keep loaded. Can be repeated")
+    serve_parser.add_argument('--jobs', type=int, default=1, help="number of processes (default 1)")
+    serve_parser.set_defaults(function=_serve)
+
+    watch_parser = subparsers.add_parser('watch', help="compute the yields of the blob tables as they are written")
+    _add_run_arguments(watch_parser)
+    watch_parser.add_argument('--store', default=None,
+                              help="directory of the results store to append the results to")
+    watch_parser.add_argument('--interval', type=float, default=1.,
+                              help="time (s) between two scans of the directory (default 1)")
+    watch_parser.add_argument('--settle-time', type=float, default=2.,
+                              help="time (s) without changes before a blob table is processed (default 2)")
+    watch_parser.add_argument('--timeout', type=float, default=None,
+                              help="stop watching after this time (s), by default it runs until interrupted")
+    watch_parser.set_defaults(function=_watch)
+
+    return parser
+
+
+def _add_run_arguments(parser):
+    """
+    Arguments of the runs, shared by process and watch.
+    """
+    parser.add_argument('--matrix', required=True, help="experimental matrix (csv, json or excel)")
+    parser.add_argument('--database', default='internal',
+                        help="database of compounds (csv or excel), or 'internal' (default)")
+    parser.add_argument('--blob-dir', required=True, help="directory with the blob tables")
+    parser.add_argument('--output', required=True, help="directory where the results are saved")
+
+    method = parser.add_mutually_exclusive_group(required=True)
+    method.add_argument('--internal-standard', help="name of the internal standard")
+    method.add_argument('--calibration', help="calibration file (json) of the reference compound")
+    parser.add_argument('--reference', help="name of the reference compound (with --calibration)")
+    parser.add_argument('--drop', nargs='*', default=None,
+                        help="compounds to drop (with --calibration), e.g. the internal standard")
+    parser.add_argument('--concentration', type=float, default=1.,
+                        help="concentration of the internal standard in the mixture (default 1)")
+    parser.add_argument('--grouping', default=None, help="grouping column of the database for the totals")
+
+
+def _read_run_inputs(args):
+    """
+    Experimental matrix (with the IS amount computed, if used) and database of the run arguments.
+    """
+    if args.calibration and not args.reference:
+        raise SystemExit("--reference is required with --calibration")
+
+    use_is = args.internal_standard is not None
+    experiment_table = read_experiment_file(args.matrix, use_is=use_is)
+    if use_is:
+        experiment_table.compute_is_amount(args.concentration)
+    return experiment_table, read_database_file(args.database)
+
+
+def _process(args):
+    start = time.perf_counter()
+    experiment_table, database = _read_run_inputs(args)
+
+    runs_info = process_campaign(experiment_table, database, args.blob_dir, args.output,
+                                 internal_standard_name=args.internal_standard, calibration_file=args.calibration,
+                                 reference_compound=args.reference, compounds_drop=args.drop,
+                                 grouping=args.grouping, n_jobs=args.jobs, force=args.force,
+                                 profile_memory=args.profile_memory)
+
+    if args.trace:
+        write_chrome_trace(args.trace, [stage for run_info in runs_info for stage in run_info.get('stages', [])])
+
+    # the records of the stages are only written to the trace, and the reports of the matching are merged
+    match_report = MatchReport()
+    for run_info in runs_info:
+        if 'report' in run_info:
+            match_report.update(run_info['report'])
+    runs = [{key: value for key, value in run_info.items() if key not in ('stages', 'report')}
+            for run_info in runs_info]
+    report = {'wall_time': time.perf_counter() - start, 'runs': runs, 'match_report': match_report.to_dict()}
+    if args.timings == '-':
+        json.dump(report, sys.stdout, indent=4)
+    elif args.timings:
+        with open(args.timings, 'w') as fp:
+            json.dump(report, fp, indent=4)
+
+    statuses = [run_info['status'] for run_info in runs_info]
+    print(', '.join(f'{statuses.count(status)} {status}' for status in sorted(set(statuses))), file=sys.stderr)
+    unmatched = match_report.distinct('unmatched')
+    if unmatched:
+        print(f'{len(unmatched)} distinct compounds not found in the database', file=sys.stderr)
+    for run_info in runs_info:
+        if run_info['status'] == 'failed':
+            print(f"{run_info['experiment']}: {run_info['error']}", file=sys.stderr)
+
+    return 1 if 'failed' in statuses else 0
+
+
+def _serve(args):
+    databases = {}
+    for option in args.database or ['internal']:
+        name, filename = _split_named_option(option)
+        databases[name] = read_database_file(filename)
+    calibrations = dict(_split_named_option(option) for option in args.calibration)
+
+    serve(databases, calibrations, n_jobs=args.jobs, host=args.host, port=args.port)
+    return 0
+
+
+def _watch(args):
+    experiment_table, database = _read_run_inputs(args)
+    store = ResultsStore(args.store, vocabulary=database.vocabulary) if args.store else None
+
+    with BlobWatcher(experiment_table, database, args.blob_dir, args.output, store=store,
+                     internal_standard_name=args.internal_standard, calibration_file=args.calibration,
+                     reference_compound=args.reference, compounds_drop=args.drop, grouping=args.grouping,
+                     settle_time=args.settle_time) as watcher:
+        try:
+            runs_info = watcher.watch(interval=args.interval, timeout=args.timeout)
+        except KeyboardInterrupt:
+            return 0
+
+    statuses = [run_info['status'] for run_info in runs_info]
+    print(', '.join(f'{statuses.count(status)} {status}' for status in sorted(set(statuses))), file=sys.stderr)
+    return 1 if 'failed' in statuses else 0
+
+
+def _split_named_option(option):
+    """
+    Splits NAME=FILE options, the name is the file name without extension if not given.
+    """
+    name, separator, filename = option.partition('=')
+    if not separator:
+        filename = option
+        name = os.path.splitext(os.path.basename(option))[0]
+    return name, filename
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,10 @@
 import json
+import logging
+
+from .logs import get_logger, summarize_names
+from .profiling import profile_stage
+
+_logger = get_logger(__name__)
 
 
 def define_internal_standard(experiment_df_row, blob_df, internal_standard_name, calibration_file=None):
@@ -30,37 +36,53 @@ def define_internal_standard(experiment_df_row, blob_df, internal_standard_name,
 
     volume_blob_is = internal_standard.volume
     if calibration_file:
-        mass_IS = get_mass_calibration(calibration_file, volume_blob_is)
+        mass_IS = get_mass_calibration(calibration_file, volume_blob_is, compound=internal_standard_name)
     else:
         mass_IS = experiment_df_row.is_amount
     internal_standard['moles'] = (mass_IS / 1000) / internal_standard.mw
     return internal_standard
 
 
-def get_mass_calibration(calibration_file, volume):
+def get_mass_calibration(calibration_file, volume, compound=None):
     """
     This function computes the mass given a calibration curve: mass = a / vol.
+    The calibration file can contain a single calibration (from ExternalCalibration) or
+    several compounds (from MultiExternalCalibration), in which case the compound is used to select it.
 
     Parameters
     ----------
-    calibration_file: str
-        filename of the json file with the slope of the calibration curve
+    calibration_file: str or dict
+        filename of the json file with the slope of the calibration curve, or its content (already loaded)
     volume: float
         volume of the blob from GC Image
+    compound: str
+        name of the compound, only used if the file contains several calibrations.
 
     Returns
     --------
     mass_IS: float
         mass of the compound used as refernece.
     """
-    with open(calibration_file) as fp:
-        data = json.load(fp)
+    if isinstance(calibration_file, dict):
+        data = calibration_file
+    else:
+        with open(calibration_file) as fp:
+            data = json.load(fp)
+
+    if "slope" not in data:
+        try:
+            data = data[compound]
+        except KeyError:
+            raise KeyError(f'Compound "{compound}" not found in calibration file {calibration_file}')
+
     slope = float(data["slope"])
     mass_IS = volume / slope
     return mass_IS
 
 
-def compute_yields(experiment_df_row, blob_df, internal_standard_name, calibration_file, compounds_drop):
+@profile_stage()
+def compute_yields(experiment_df_row, blob_df, internal_standard_name, calibration_file, compounds_drop,
+                   report=None, run=None):
     """
     Generic function to compute the yields of an experiment from an internal standard.
     Requires the experiment, the blob file and the name of the internal standard used.
@@ -80,13 +102,17 @@ def compute_yields(experiment_df_row, blob_df, internal_standard_name, calibrati
     calibration_file: str
         Path to the calibration file
     compounds_drop: list
-        List of compounds to drop
+        List of compounds to drop (or a single name)
     experiment_df_row: row of a dataframe
                 with experiments from micropyrolysis. Created using ReadExperimentTable.
     blob_df: df
                 with the blobs after performing the df matching.
     internal_standard_name: str
                 name of the internal standard used.
+    report: MatchReport
+                If given, the compounds dropped and the ones not found to drop are added to it.
+    run: str
+                Name of the run (experiment) in the report.
 
     Returns
     ----------
@@ -113,11 +139,21 @@ def compute_yields(experiment_df_row, blob_df, internal_standard_name, calibrati
     internal_standard = define_internal_standard(experiment_df_row, blob_df, internal_standard_name, calibration_file)
 
     if compounds_drop is not None:
-        for compound in compounds_drop:
-            try:
-                blob_df.drop(compound, inplace=True)
-            except KeyError:
-                print(f'{compound} not found to drop')
+        if isinstance(compounds_drop, str):
+            compounds_drop = [compounds_drop]
+        found = [compound in blob_df.index for compound in compounds_drop]
+        dropped = [compound for compound, is_found in zip(compounds_drop, found) if is_found]
+        not_dropped = [compound for compound, is_found in zip(compounds_drop, found) if not is_found]
+        blob_df.drop(dropped, inplace=True)
+
+        if report is not None:
+            report.add('dropped', run, dropped)
+            report.add('not_dropped', run, not_dropped)
+        if not_dropped:
+            if _logger.isEnabledFor(logging.DEBUG):
+                for compound in not_dropped:
+                    _logger.debug('%s not found to drop', compound)
+            _logger.warning('%d compounds not found to drop: %s', len(not_dropped), summarize_names(not_dropped))
 
     # compute the moles using the ecn for each compound and add it in a new column
     blob_df["moles ecn"] = blob_df.apply(
@@ -139,11 +175,11 @@ def compute_yields(experiment_df_row, blob_df, internal_standard_name, calibrati
     return blob_df
 
 
-def compute_yields_is(experiment_df_row, blob_df, internal_standard_name):
+def compute_yields_is(experiment_df_row, blob_df, internal_standard_name, report=None, run=None):
     """
     Particular function to compute the yields using an IS.
     The IS will be removed from the blob_df, but the yields will be based on its mass.
-    For the implementation, see compute_yields.
+    For the implementation (and the report), see compute_yields.
 
     #TODO: this function may give problems with compounds that we need to drop (repeated in FID and special gc)
 
@@ -153,11 +189,12 @@ def compute_yields_is(experiment_df_row, blob_df, internal_standard_name):
         Dataframe with the blobs, with the extra column of yields
     """
     blob_df = compute_yields(experiment_df_row, blob_df, internal_standard_name, calibration_file=None,
-                             compounds_drop=internal_standard_name)
+                             compounds_drop=internal_standard_name, report=report, run=run)
     return blob_df
 
 
-def compute_yields_calibration(experiment_df_row, blob_df, reference_compound, calibration_file, compounds_drop=None):
+def compute_yields_calibration(experiment_df_row, blob_df, reference_compound, calibration_file,
+                               compounds_drop=None, report=None, run=None):
     """
     Particular function to compute the yields using a calibration curve of a reference compound.
     In this case, the mass of reference compound is computed using an the auxiliary function get_mass_calibration.
@@ -171,10 +208,11 @@ def compute_yields_calibration(experiment_df_row, blob_df, reference_compound, c
     """
     blob_df = compute_yields(experiment_df_row, blob_df, internal_standard_name=reference_compound,
                              calibration_file=calibration_file,
-                             compounds_drop=compounds_drop)
+                             compounds_drop=compounds_drop, report=report, run=run)
     return blob_df
 
 
+@profile_stage()
 def save_results_yields(blob_df, filename):
     """
     Save the resulting blob_df to a new file.
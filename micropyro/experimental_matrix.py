@@ -1,7 +1,10 @@
+import json
 import warnings
 
 import pandas as pd
 
+from .mass_balance import MassBalance
+
 
 class ReadExperimentTable:
     """
@@ -22,10 +25,18 @@ class ReadExperimentTable:
     -------
     from_xls(cls, filename, sheet_name=0, use_is=True, **kwargs)
         Class method to load a xls file
-    from_json(cls)
-        Class method to load a json file (not available yet)
-    from_dict(cls, filename, sheet_name=0, use_is=True, **kwargs)
-        Class method to load a dict
+    from_csv(cls, filename, use_is=True, **kwargs)
+        Class method to load a csv file
+    from_json(cls, filename, use_is=True, orient='columns')
+        Class method to load a json file (records or columns)
+    from_dict(cls, data, use_is=True, orient='columns')
+        Class method to load a dict or a list of records
+    compute_is_amount(self, concentration)
+        Computes the amount of internal standard
+    compute_char(self)
+        Computes the char mass and percent
+    mass_balance(self, concentration=1)
+        Creates the (incremental) mass balance of the matrix
     """
 
     def __init__(self, experiment_df, used_is):
@@ -68,28 +79,76 @@ class ReadExperimentTable:
         experiment_df = pd.read_excel(filename, sheet_name, **kwargs)
         # strip suffix at the right end only.
         experiment_df.columns = experiment_df.columns.str.rstrip('.1')
-        # removes the rows with nans in the filename.
-        experiment_df = experiment_df[experiment_df['Filename'].notna()]
-        # sets the index filename, so it is easier to refer to a specific experiment.
-        experiment_df = experiment_df.set_index('Filename')
-        # remove the mg from the name of the column, and removed any extra spaces
-        experiment_df.columns = [col.replace("(mg)", "").strip() for col in experiment_df.columns]
 
-        # create a copy of the temperature T (C) column for easier access through the code.
-        try:
-            experiment_df["temperature"] = experiment_df["T (C)"]
-        except KeyError:
-            experiment_df["temperature"] = experiment_df["T Py"]
-
-        return cls(experiment_df, use_is)
+        return cls(cls._prepare_df(experiment_df), use_is)
 
     @classmethod
     def from_csv(cls, filename, use_is=True, **kwargs):
         """
-        read from json
+        Class method to read the experimental matrix from a csv file.
+        :param filename: str.
+                    name of the file to be read.
+        :param use_is: bool.
+        :param kwargs:
+                    any kwargs valid for pandas.read_csv can be passed here.
+        :return:
         """
         # reads the file
         experiment_df = pd.read_csv(filename, **kwargs)
+        return cls(cls._prepare_df(experiment_df), use_is)
+
+    @classmethod
+    def from_json(cls, filename, use_is=True, orient='columns'):
+        """
+        Class method to read the experimental matrix from a json file.
+        The file can contain a list of records (one dict per experiment, as exported by most LIMS),
+        or a dict of columns. See from_dict.
+        :param filename: str.
+                    name of the file to be read.
+        :param use_is: bool.
+        :param orient: str.
+                    orientation of the data if the file contains a dict, see from_dict.
+        :return:
+        """
+        with open(filename, 'r') as fp:
+            data = json.load(fp)
+
+        return cls.from_dict(data, use_is=use_is, orient=orient)
+
+    @classmethod
+    def from_dict(cls, data, use_is=True, orient='columns'):
+        """
+        Class method to read the experimental matrix from a dict or a list of records.
+        The dataframe is built directly from the columns (or the records) without looping over the rows.
+        :param data: dict or list of dicts.
+                    if list, each element is an experiment (records).
+                    if dict, it is passed to pandas.DataFrame.from_dict with the given orient.
+        :param use_is: bool.
+        :param orient: str.
+                    'columns' if the keys are the columns (default), 'index' if the keys are the filenames.
+        :return:
+        """
+        if isinstance(data, dict):
+            experiment_df = pd.DataFrame.from_dict(data, orient=orient)
+        else:
+            experiment_df = pd.DataFrame.from_records(data)
+
+        # if the data is given by filename, the filename is the index
+        if 'Filename' not in experiment_df.columns:
+            experiment_df = experiment_df.rename_axis('Filename').reset_index()
+
+        return cls(cls._prepare_df(experiment_df), use_is)
+
+    @staticmethod
+    def _prepare_df(experiment_df):
+        """
+        Common processing of the dataframe read by the constructors (from_xls, from_csv, from_json, from_dict).
+        Removes the rows without filename and sets it as index, removes the (mg) from the column names, and
+        creates a copy of the temperature column.
+        :param experiment_df: df.
+                    dataframe as read from the file.
+        :return: experiment_df
+        """
         # removes the rows with nans in the filename.
         experiment_df = experiment_df[experiment_df['Filename'].notna()]
         # sets the index filename, so it is easier to refer to a specific experiment.
@@ -98,22 +157,12 @@ class ReadExperimentTable:
         experiment_df.columns = [col.replace("(mg)", "").strip() for col in experiment_df.columns]
 
         # create a copy of the temperature T (C) column for easier access through the code.
-        experiment_df["temperature"] = experiment_df["T (C)"]
-        return cls(experiment_df, use_is)
-
-    @classmethod
-    def from_json(cls):
-        """
-        read from json
-        """
-        raise NotImplementedError
+        try:
+            experiment_df["temperature"] = experiment_df["T (C)"]
+        except KeyError:
+            experiment_df["temperature"] = experiment_df["T Py"]
 
-    @classmethod
-    def from_dict(cls):
-        """
-        read from a dict
-        """
-        raise NotImplementedError
+        return experiment_df
 
     def compute_is_amount(self, concentration):
         """
@@ -127,7 +176,7 @@ class ReadExperimentTable:
         """
         if not self.used_is:
             warnings.warn("Internal Standard is set to False, not sure if what you are doing is correct...")
-        self.df["is_amount"] = self.df.apply(lambda row: row['is'] * concentration, axis=1)
+        self.df["is_amount"] = self.df['is'] * concentration
 
     def compute_char(self):
         """
@@ -135,10 +184,7 @@ class ReadExperimentTable:
         """
 
         # delete the columns they already exist
-        try:
-            self.df.drop(["total before w/o holder", 'char mass', '% char'], inplace=True)
-        except KeyError:
-            pass
+        self.df.drop(["total before w/o holder", 'char mass', '% char'], axis=1, inplace=True, errors='ignore')
         # maybe the wool was not added, if so, we set it to 0
         if 'wool' not in self.df:
             self.df["wool"] = 0
@@ -160,3 +206,16 @@ class ReadExperimentTable:
         # express it as % of the initial sample mass.
         self.df["% char"] = self.df["char mass"].values / self.df[
             "sample"].values * 100
+
+    def mass_balance(self, concentration=1):
+        """
+        Creates the mass balance of the experimental matrix (IS amount, char, volatiles, etc.).
+        The terms are computed using MassBalance.update, and can be updated incrementally when inputs change.
+
+        :param concentration: float
+                Concentration of the standard in the mixture.
+        :return: MassBalance
+        """
+        mass_balance = MassBalance(self.df, used_is=self.used_is, is_concentration=concentration)
+        mass_balance.update()
+        return mass_balance
@@ -1,9 +1,20 @@
 import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import statsmodels.api as sm
+from scipy import stats
+
+from .logs import get_logger, summarize_names
+
+# elements (resamples x points) of each chunk of bootstrap resamples: about 2000 resamples of 30 points, so that
+# 10^4 resamples already give several chunks to distribute over the processes
+BOOTSTRAP_CHUNK_SIZE = 2 ** 16
+
+_logger = get_logger(__name__)
 
 
 class ExternalCalibration:
@@ -20,6 +31,10 @@ class ExternalCalibration:
         a pandas dataframe with the information on the various experiments performed.
     used_is : bool
         define if internal standard was used (True) or not (False)
+    mask : np.array of bool
+        points kept in the calibration after removing the outliers (set by linear_calibration)
+    bootstrap_conf_interval : np.array or None
+        95 % bootstrap percentile interval of the slope (set by linear_calibration)
 
     Methods
     -------
@@ -27,7 +42,7 @@ class ExternalCalibration:
         Class method to load a xls file
     remove_incomplete(self)
         remove incomplete points in the dataset
-    linear_calibration(self, outliers=[], to_file="calibration.json", recursive=True)
+    linear_calibration(self, outliers=[], to_file="calibration.json", recursive=True, bootstrap_resamples=0, ...)
         perform linear regression on the data.
     plot_calibration(self, save_plot=None)
         plot the calibration dataset, the regression and the uncertainties.
@@ -71,6 +86,13 @@ class ExternalCalibration:
         :return:
         """
 
+        return cls(cls._read_xls(filename, sheet_name, **kwargs))
+
+    @staticmethod
+    def _read_xls(filename, sheet_name=0, **kwargs):
+        """
+        Reads the excel file and prepares the dataframe (index and column names) for the constructor.
+        """
         # reads the file
         calibration_df = pd.read_excel(filename, sheet_name, **kwargs)
         # removes the rows with nans in the filename.
@@ -80,7 +102,7 @@ class ExternalCalibration:
         # remove the mg from the name of the column, and removed any extra spaces
         calibration_df.columns = [col.replace("(mg)", "").strip() for col in calibration_df.columns]
 
-        return cls(calibration_df)
+        return calibration_df
 
     def drop_point(self, index_name):
         """
@@ -110,26 +132,35 @@ class ExternalCalibration:
 
         # print the ones removed.
         index_removed = index_names_before - index_names_after
-        print(f"The following cases are removed because they are incomplete:")
-        print(*index_removed, sep="\n")
+        _log_removed(index_removed)
 
         # return the indeces removed, in case you want to check them.
         return index_removed
 
-    def linear_calibration(self, outliers=[], to_file="calibration.json", recursive=True):
+    def linear_calibration(self, outliers=[], to_file="calibration.json", recursive=True, bootstrap_resamples=0,
+                           n_jobs=1, random_state=None):
         """
         Performs a linear calibration of the type y = a*x between the sample mass and the volume from GC Image.
-        It is a recursive function which deletes outliers at every step. The recursivity can be controlled setting the
-        recursive parameter to False.
+        Outliers are removed iteratively: at every round, the points flagged by the outlier test are masked and the
+        slope is updated, until no more outliers are found. The iterations can be controlled setting the
+        recursive parameter to False, in which case a single fit is done.
+        If bootstrap_resamples is given, the 95 % percentile interval of the slope is also computed by bootstrap
+        (see bootstrap_slopes), which does not rely on the normality of the residuals.
 
         Parameters
         -----------
         recursive: bool
-                Sets the recursivity of the function.
+                Sets the iterative removal of outliers.
         outliers: list
-                of outliers found after each iteration of the calibration.
+                of outliers (x values) to remove before the first iteration of the calibration.
         to_file: str
                 Filename of the output of the calibration file.
+        bootstrap_resamples: int
+                Number of bootstrap resamples. If 0, the bootstrap is not performed.
+        n_jobs: int
+                Number of processes used for the bootstrap.
+        random_state: int or None
+                Seed of the bootstrap resampling.
 
         Returns
         --------
@@ -138,32 +169,41 @@ class ExternalCalibration:
         """
 
         # get the x and y values (sample mass and volume from GC image)
-        x = np.array(self.calibration_df["sample"].values)
-        y = np.array(self.calibration_df["volume"].values)
+        x = np.array(self.calibration_df["sample"].values, dtype=float)
+        y = np.array(self.calibration_df["volume"].values, dtype=float)
+
+        # boolean mask of the points used in the fit, the outliers given by the user are removed from the start
+        mask = ~np.isin(x, outliers)
 
-        # if the outliers list contains any outlier (x value) we remove it from the lists
-        for outlier in outliers:
-            index = np.argwhere(x == outlier)
-            x = np.delete(x, index)
-            y = np.delete(y, index)
-
-        # perform the linear regression using statmodels
-        self.regression = sm.OLS(endog=y, exog=x).fit()
-
-        # Find outliers (from stackoverflow: https://stackoverflow.com/questions/10231206/can-scipy-stats-identify-and-mask-obvious-outliers)
-        test = self.regression.outlier_test()
-        outliers = (x[i] for i, t in enumerate(test) if t[2] < 0.5)
-        print(f'R2={self.regression.rsquared}')
-        list_outliers = list(outliers)
-        print('Outliers at x= ', list_outliers)
-
-        # if there are outliers and the function is set to be recursive, we call it again
-        if list_outliers and recursive:
-            self.linear_calibration(outliers=list_outliers, to_file=to_file, recursive=recursive)
+        while True:
+            # closed form of the slope for y = a*x, only over the points kept
+            slope = _masked_slope(x, y, mask)
+
+            # Find outliers (same criterion as statsmodels outlier_test with bonferroni correction)
+            new_outliers = _find_outliers(x, y, mask, slope)
+            _logger.info('Outliers at x= %s', list(x[new_outliers]))
+
+            # if there are outliers and the function is set to be recursive, we mask them and iterate again
+            if not (new_outliers.any() and recursive):
+                break
+            mask &= ~new_outliers
+
+        self.mask = mask
+
+        # perform the final linear regression using statmodels, only used for the report
+        self.regression = sm.OLS(endog=y[mask], exog=x[mask]).fit()
+        _logger.info('R2=%s', self.regression.rsquared)
+
+        if bootstrap_resamples:
+            slopes = bootstrap_slopes(x[mask], y[mask], bootstrap_resamples, n_jobs=n_jobs,
+                                      random_state=random_state)
+            self.bootstrap_conf_interval = np.percentile(slopes, [2.5, 97.5])
         else:
-            # otherwise we just save it to the file, and keep on.
-            self._save_calibration(to_file)
-            return self.regression
+            self.bootstrap_conf_interval = None
+
+        # the slope of the points kept (no outliers left, or not recursive) and its interval are saved
+        self._save_calibration(to_file)
+        return self.regression
 
     def _save_calibration(self, to_file):
         """
@@ -177,6 +217,8 @@ class ExternalCalibration:
         params = self.regression.params
         conf_inter_param = self.regression.conf_int()
         dict_params = {"slope": params[0], "conf_interval": list(conf_inter_param[0])}
+        if getattr(self, 'bootstrap_conf_interval', None) is not None:
+            dict_params["bootstrap_conf_interval"] = list(self.bootstrap_conf_interval)
 
         with open(to_file, 'w') as fp:
             json.dump(dict_params, fp, indent=4, sort_keys=True)
@@ -223,3 +265,354 @@ class ExternalCalibration:
             fig.savefig(save_plot)
         else:
             plt.show()
+
+
+class MultiExternalCalibration(ExternalCalibration):
+    """
+    A class used to perform the calibration of several reference compounds at once.
+    The table is the same as for ExternalCalibration, but instead of a single volume column,
+    it contains one column per compound with the volume from GC Image.
+    All the slopes (and confidence intervals) are fitted at once, removing the outliers of each compound
+    separately.
+    All mass should be given in **mg**.
+
+    ...
+
+    Attributes
+    ----------
+    calibration_df : df
+        a pandas dataframe with the information on the various experiments performed.
+    compounds : list of str
+        compounds (columns of calibration_df) to be calibrated
+    mask : df of bool
+        points kept in the calibration of each compound after removing the outliers (set by linear_calibration)
+    calibration : df
+        slope, confidence interval, R2 and number of points per compound (set by linear_calibration)
+
+    Methods
+    -------
+    from_xls(cls, filename, sheet_name=0, compounds=None, **kwargs)
+        Class method to load a xls file
+    remove_incomplete(self)
+        remove points without sample mass
+    linear_calibration(self, to_file="calibration.json", recursive=True, alpha=0.05, bootstrap_resamples=0, ...)
+        perform linear regression on the data for all the compounds.
+    plot_calibration(self, compound, save_plot=None)
+        plot the calibration dataset of a compound, the regression and the uncertainties.
+    _save_calibration(self, to_file)
+        save to a single json file, indexed by compound
+    """
+
+    def __init__(self, calibration_df, compounds=None):
+        """
+        Defines the dataframe of the experiments.
+        Sets all the characters to lower case to avoid duplicity or mismatches with df.
+
+        Params
+        -------
+        calibration_df: dataframe with the sample mass and one volume column per compound
+        compounds: list of str, compounds to calibrate. If not given, all the numeric columns except sample are
+            used.
+        """
+        super().__init__(calibration_df)
+
+        if compounds is None:
+            numeric_columns = self.calibration_df.select_dtypes(include='number').columns
+            compounds = [column for column in numeric_columns if column != 'sample']
+        self.compounds = [compound.lower() for compound in compounds]
+
+    @classmethod
+    def from_xls(cls, filename, sheet_name=0, compounds=None, **kwargs):
+        """
+        Class method to read an file from excel with the data.
+        User can specify the sheet, the compounds, or any other kwargs supported by pandas.read_excel()
+        :param filename: str.
+                    name of the file to be read.
+        :param sheet_name: str.
+                    name of the sheet.
+        :param compounds: list of str.
+                    columns with the volumes of the compounds to calibrate.
+        :param kwargs:
+                    any kwargs valid for pandas.read_excel can be passed here. For example the range to be read.
+        :return:
+        """
+        return cls(cls._read_xls(filename, sheet_name, **kwargs), compounds)
+
+    def remove_incomplete(self):
+        """
+        Removes the rows without sample mass. Missing volumes are handled per compound during the calibration.
+
+        :return index_removed
+                Indeces (experiment names) removed from the dataframe.
+        """
+        index_names_before = set(self.calibration_df.index.values.tolist())
+        self.calibration_df = self.calibration_df[self.calibration_df['sample'].notna()]
+        index_names_after = set(self.calibration_df.index.values.tolist())
+
+        index_removed = index_names_before - index_names_after
+        _log_removed(index_removed)
+
+        return index_removed
+
+    def linear_calibration(self, to_file="calibration.json", recursive=True, alpha=0.05, bootstrap_resamples=0,
+                           n_jobs=1, random_state=None):
+        """
+        Performs a linear calibration of the type y = a*x between the sample mass and the volume from GC Image
+        for all the compounds at once. Outliers are removed iteratively for each compound.
+        Missing volumes of a compound are not used for its calibration.
+
+        Parameters
+        -----------
+        to_file: str
+                Filename of the output of the calibration file.
+        recursive: bool
+                Sets the iterative removal of outliers.
+        alpha: float
+                The confidence intervals are computed at 100*(1-alpha) %.
+        bootstrap_resamples: int
+                Number of bootstrap resamples per compound. If 0, the bootstrap is not performed.
+        n_jobs: int
+                Number of processes used for the bootstrap.
+        random_state: int or None
+                Seed of the bootstrap resampling.
+
+        Returns
+        --------
+        self.calibration: df
+                With the slope, confidence interval, R2 and number of points for each compound.
+        """
+        # x is a column, so it broadcasts with the volumes (one column per compound)
+        x = np.array(self.calibration_df["sample"].values, dtype=float)[:, np.newaxis]
+        y = np.array(self.calibration_df[self.compounds].values, dtype=float)
+
+        mask = ~np.isnan(y)
+
+        while True:
+            slope = _masked_slope(x, y, mask)
+            new_outliers = _find_outliers(x, y, mask, slope)
+
+            if not (new_outliers.any() and recursive):
+                break
+            mask &= ~new_outliers
+
+        self.mask = pd.DataFrame(mask, index=self.calibration_df.index, columns=self.compounds)
+
+        # confidence intervals of the slope, same as statsmodels conf_int for y = a*x
+        x_masked = np.where(mask, x, 0.)
+        y_masked = np.where(mask, y, 0.)
+        residuals = y_masked - slope * x_masked
+        n_points = np.sum(mask, axis=0)
+        dof = n_points - 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std_error = np.sqrt(np.sum(residuals ** 2, axis=0) / dof / np.sum(x_masked ** 2, axis=0))
+            t_value = stats.t.ppf(1 - alpha / 2, np.where(dof > 0, dof, np.nan))
+            rsquared = 1 - np.sum(residuals ** 2, axis=0) / np.sum(y_masked ** 2, axis=0)
+
+        self.calibration = pd.DataFrame({'slope': slope,
+                                         'conf_low': slope - t_value * std_error,
+                                         'conf_high': slope + t_value * std_error,
+                                         'rsquared': rsquared,
+                                         'n_points': n_points}, index=self.compounds)
+
+        if bootstrap_resamples:
+            for i_compound, compound in enumerate(self.compounds):
+                mask_compound = mask[:, i_compound]
+                slopes = bootstrap_slopes(x[mask_compound, 0], y[mask_compound, i_compound], bootstrap_resamples,
+                                          n_jobs=n_jobs, random_state=random_state)
+                self.calibration.loc[compound, ['bootstrap_low', 'bootstrap_high']] = \
+                    np.percentile(slopes, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+
+        n_outliers = np.sum(~mask & ~np.isnan(y), axis=0)
+        for compound, n_outliers_compound in zip(self.compounds, n_outliers):
+            if n_outliers_compound:
+                _logger.info('%s: %d outliers removed', compound, n_outliers_compound)
+
+        self._save_calibration(to_file)
+        return self.calibration
+
+    def _save_calibration(self, to_file):
+        """
+        Saves the calibration of all the compounds to a single json file, indexed by compound name.
+
+        Parameters
+        -----------
+        to_file: str
+                Filename of the file to be saved
+        """
+        dict_params = {compound: {"slope": row.slope, "conf_interval": [row.conf_low, row.conf_high],
+                                  "rsquared": row.rsquared, "n_points": int(row.n_points)}
+                       for compound, row in self.calibration.iterrows()}
+        if 'bootstrap_low' in self.calibration:
+            for compound, row in self.calibration.iterrows():
+                dict_params[compound]["bootstrap_conf_interval"] = [row.bootstrap_low, row.bootstrap_high]
+
+        with open(to_file, 'w') as fp:
+            json.dump(dict_params, fp, indent=4, sort_keys=True)
+
+    def plot_calibration(self, compound, save_plot=None):
+        """
+        Plots the calibration of a compound. If save_plot is a filename, it will save it, otherwise, it will show
+        it.
+
+        :param compound: str
+                Name of the compound to plot.
+        :param save_plot: str
+                Filename of the plot to be saved.
+        """
+        x = np.array(self.calibration_df["sample"].values)
+        y = np.array(self.calibration_df[compound].values)
+        mask = self.mask[compound].values
+        calibration = self.calibration.loc[compound]
+
+        xnew = np.linspace(0, np.nanmax(x) * 1.01, 1000)
+
+        fig, ax = plt.subplots()
+        ax.plot(x[mask], y[mask], 'o', label='experimental')
+        ax.plot(x[~mask], y[~mask], 'x', label='outliers')
+        ax.plot(xnew, xnew * calibration.slope, label='linear model')
+        ax.fill_between(xnew, xnew * calibration.conf_low, xnew * calibration.conf_high, label='Conf. Interv.',
+                        alpha=0.3)
+
+        ax.annotate(f'vol = {calibration.slope:.2f} mass', xy=(0.02, 0.95), xycoords='axes fraction')
+        ax.annotate(f'R$^2$ = {calibration.rsquared:.4f}', xy=(0.02, 0.85), xycoords='axes fraction')
+
+        ax.legend(loc="lower right")
+        ax.set_title(compound)
+        ax.set_xlabel('Mass, mg')
+        ax.set_ylabel('Blob volume, -')
+        ax.set_xlim(0, None)
+        if save_plot:
+            fig.savefig(save_plot)
+        else:
+            plt.show()
+
+
+def _log_removed(index_removed):
+    """
+    Logs the cases removed because they are incomplete (a single message with the distinct names).
+    """
+    if index_removed:
+        _logger.warning('%d cases are removed because they are incomplete: %s', len(index_removed),
+                        summarize_names(sorted(map(str, index_removed))))
+
+
+def bootstrap_slopes(x, y, n_resamples, n_jobs=1, random_state=None, chunk_size=BOOTSTRAP_CHUNK_SIZE):
+    """
+    Computes the slopes of the model y = a*x for bootstrap resamples of the calibration points.
+    The resamples are processed by chunks, each chunk as a single array operation (n_resamples x n_points).
+    The chunks can be distributed over a process pool. Every chunk has its own seed derived from random_state,
+    so the result does not depend on the number of processes.
+
+    Parameters
+    -----------
+    x: np.array
+        sample mass of the calibration points
+    y: np.array
+        volume from GC Image of the calibration points
+    n_resamples: int
+        number of bootstrap resamples
+    n_jobs: int
+        number of processes. If 1, everything is computed in the current process.
+    random_state: int or None
+        seed of the resampling
+    chunk_size: int
+        maximum number of elements (resamples x points) in each chunk, to limit the memory used and to split
+        the resamples over the processes.
+
+    Returns
+    --------
+    slopes: np.array
+        slope of each bootstrap resample
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    resamples_per_chunk = max(1, chunk_size // len(x))
+    chunks = [min(resamples_per_chunk, n_resamples - start)
+              for start in range(0, n_resamples, resamples_per_chunk)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(chunks))
+
+    if n_jobs == 1:
+        slopes = [_bootstrap_chunk(x, y, n_chunk, seed) for n_chunk, seed in zip(chunks, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            slopes = list(executor.map(_bootstrap_chunk, repeat(x), repeat(y), chunks, seeds))
+
+    return np.concatenate(slopes)
+
+
+def _bootstrap_chunk(x, y, n_resamples, seed):
+    """
+    Computes the bootstrap slopes of a chunk of resamples. Used by bootstrap_slopes.
+    """
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, len(x), size=(n_resamples, len(x)))
+    x_resampled = x[indices]
+    return np.einsum('ij,ij->i', x_resampled, y[indices]) / np.einsum('ij,ij->i', x_resampled, x_resampled)
+
+
+def _masked_slope(x, y, mask):
+    """
+    Computes the slope of the model y = a*x (no intercept) using only the points in the mask.
+    Works column-wise if y and mask are 2D arrays (one column per compound).
+
+    Parameters
+    -----------
+    x: np.array
+        sample mass
+    y: np.array
+        volume from GC Image
+    mask: np.array of bool
+        points to be used in the fit
+
+    Returns
+    --------
+    slope: float or np.array
+        slope of the fit (one per column if 2D)
+    """
+    x_masked = np.where(mask, x, 0.)
+    y_masked = np.where(mask, y, 0.)
+    return np.sum(x_masked * y_masked, axis=0) / np.sum(x_masked * x_masked, axis=0)
+
+
+def _find_outliers(x, y, mask, slope, threshold=0.5):
+    """
+    Finds the outliers of the fit y = a*x among the points in the mask.
+    Uses the externally studentized residuals and the bonferroni corrected p-values,
+    as done by statsmodels outlier_test, but computed in closed form for the no-intercept model.
+    Works column-wise if y and mask are 2D arrays (one column per compound).
+
+    Parameters
+    -----------
+    x: np.array
+        sample mass
+    y: np.array
+        volume from GC Image
+    mask: np.array of bool
+        points used in the fit
+    slope: float or np.array
+        slope of the fit
+    threshold: float
+        bonferroni p-value under which the point is considered an outlier
+
+    Returns
+    --------
+    outliers: np.array of bool
+        True for the points detected as outliers.
+    """
+    x_masked = np.where(mask, x, 0.)
+    residuals = np.where(mask, y - slope * x, 0.)
+
+    n_points = np.sum(mask, axis=0)
+    dof = n_points - 2  # one parameter in the model, and one point left out
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        leverage = x_masked ** 2 / np.sum(x_masked ** 2, axis=0)
+        sse = np.sum(residuals ** 2, axis=0)
+        # variance without the point i
+        variance_i = (sse - residuals ** 2 / (1 - leverage)) / dof
+        student_residuals = residuals / np.sqrt(variance_i * (1 - leverage))
+        p_values = 2 * stats.t.sf(np.abs(student_residuals), np.where(dof > 0, dof, np.nan))
+        p_bonferroni = np.minimum(p_values * n_points, 1)
+
+    return mask & (p_bonferroni < threshold)
@@ -1,9 +1,26 @@
 from shutil import copyfile
 
 import pandas as pd
-import pubchempy
-from openbabel import openbabel
-from tqdm import tqdm
+
+from .smiles import parse_smiles
+from .structures import PubChemResolver
+
+# the chemistry libraries are optional, the database can be generated with the structure resolvers and the
+# local SMILES parser instead
+try:
+    import pubchempy
+except ModuleNotFoundError:
+    pubchempy = None
+
+try:
+    from openbabel import openbabel
+except ModuleNotFoundError:
+    openbabel = None
+
+try:
+    from tqdm import tqdm
+except ModuleNotFoundError:
+    tqdm = None
 
 
 class GenerateDatabase:
@@ -24,9 +41,9 @@ class GenerateDatabase:
         Class method to load a xls file. Accepts kwargs for pandas.read_excel.
     from_csv(cls)
         Class method to load a csv file (not available yet).
-    get_formula_mw(self)
+    get_formula_mw(self, resolver=None, use_async=False, cache_file=None, **kwargs)
         Retrieves the MW, formula and smiles for the different compounds in the df.
-    get_benzene_rings(self)
+    get_benzene_rings(self, use_openbabel=None)
         Retrieves the number of rings for the different compounds in the df.
     to_csv(self, backup=True)
         Exports the resulting df to a csv
@@ -36,6 +53,8 @@ class GenerateDatabase:
         Actual compound finder from pubchempy
     _obtain_n_benz(compound_smiles)
         Actual ring counter
+    _obtain_n_benz_smiles(compound_smiles)
+        Ring counter without openbabel
     _create_backup(self)
         Auxiliary function to create backup of files
     """
@@ -80,12 +99,32 @@ class GenerateDatabase:
         database = database[database.index.notnull()]  # removes the extra rows with index NaN
         return cls(database, filename)
 
-    def get_formula_mw(self):
+    def get_formula_mw(self, resolver=None, use_async=False, cache_file=None, **kwargs):
         """
         Get the formula, the molecular weight, and the smiles
+
+        :param resolver: StructureResolver
+                resolver of the compounds (e.g. LocalResolver or ChainResolver to work offline).
+                If not given, the compounds are retrieved from PubChem.
+        :param use_async: bool
+                use the asyncio client (see PubChemClient), with concurrent requests on pooled connections and
+                retries, instead of one pubchempy request after the other.
+        :param cache_file: str
+                json file where the properties are kept between sessions (with use_async)
+        :param kwargs:
+                options of PubChemClient (with use_async), e.g. max_connections or rate_limit
         """
+        if resolver is None and use_async:
+            resolver = PubChemResolver(cache_file, **kwargs)
+        if resolver is not None:
+            self._get_formula_mw_resolver(resolver)
+            return
+
+        if pubchempy is None:
+            raise ModuleNotFoundError("pubchempy is required to get the compounds without a resolver")
+
         not_founds = []
-        for compound, _ in tqdm(self.df.iterrows(), total=self.df.shape[0]):
+        for compound, _ in _progress_bar(self.df.iterrows(), total=self.df.shape[0]):
             ## get the compound from pubchempy
             compound_pubchem = self._get_compound_pubchem(compound)
 
@@ -96,6 +135,28 @@ class GenerateDatabase:
             else:
                 not_founds.append(compound)
 
+        self._write_not_founds(not_founds)
+
+    def _get_formula_mw_resolver(self, resolver):
+        """
+        Get the formula, the molecular weight, and the smiles with a structure resolver
+        """
+        with _progress_bar(total=self.df.shape[0]) as progress_bar:
+            properties = resolver.resolve_many(self.df.index, callback=lambda name: progress_bar.update())
+
+        not_founds = []
+        for compound, compound_properties in properties.items():
+            if compound_properties is not None:
+                self.df.loc[compound, 'mw'] = compound_properties.get('mw')
+                self.df.loc[compound, 'formula'] = compound_properties.get('formula')
+                self.df.loc[compound, 'smiles'] = compound_properties.get('smiles')
+            else:
+                not_founds.append(compound)
+
+        self._write_not_founds(not_founds)
+
+    @staticmethod
+    def _write_not_founds(not_founds):
         if not_founds:
             with open("not_founds.txt", 'w') as f:
                 f.write("\n".join(map(str, not_founds)))
@@ -127,21 +188,49 @@ class GenerateDatabase:
 
         return object_compound
 
-    def get_benzene_rings(self):
+    def get_benzene_rings(self, use_openbabel=None):
         """
         Gets the number of benzene rings for each compound.
 
+        :param use_openbabel: bool
+                count the rings with openbabel, or with the local SMILES parser (see Molecule.n_aromatic_rings).
+                By default, openbabel is used if it is installed.
         """
-        for compound, row in tqdm(self.df.iterrows(), total=self.df.shape[0]):
+        if use_openbabel is None:
+            use_openbabel = openbabel is not None
+        elif use_openbabel and openbabel is None:
+            raise ModuleNotFoundError("openbabel is not installed")
+        obtain_n_benz = self._obtain_n_benz if use_openbabel else self._obtain_n_benz_smiles
+
+        for compound, row in _progress_bar(self.df.iterrows(), total=self.df.shape[0]):
             ## get the compound from pubchempy
             smiles = row['smiles']
             try:
-                n_Benz = self._obtain_n_benz(smiles)
-            except TypeError:
+                n_Benz = obtain_n_benz(smiles)
+            except (TypeError, ValueError):
                 n_Benz = -1
 
             self.df.loc[compound, 'n_benz'] = n_Benz
 
+    @staticmethod
+    def _obtain_n_benz_smiles(compound_smiles):
+        """
+        Gets the number of benzene rings from the smiles, without openbabel.
+
+        Parameters
+        -----------
+        compound_smiles: str
+            smiles of the compound
+
+        Return
+        ------
+        n_aromatic_rings: int
+            Number of aromatic rings
+        """
+        if not isinstance(compound_smiles, str):
+            raise TypeError(f'Invalid smiles: {compound_smiles}')
+        return parse_smiles(compound_smiles).n_aromatic_rings(min_size=6)
+
     @staticmethod
     def _obtain_n_benz(compound_smiles):
         """
@@ -181,3 +270,30 @@ class GenerateDatabase:
 
     def _create_backup(self):
         copyfile(self.filename, f'{self.filename}.bak')
+
+
+class _NoProgressBar:
+    """
+    Used instead of tqdm if it is not installed.
+    """
+
+    def __init__(self, iterable=None, total=None):
+        self.iterable = iterable
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def update(self, n=1):
+        pass
+
+
+def _progress_bar(iterable=None, total=None):
+    if tqdm is None:
+        return _NoProgressBar(iterable, total=total)
+    return tqdm(iterable, total=total)
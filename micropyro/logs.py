@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+
+# messages of the same kind allowed per interval by the rate limit filter of the micropyro loggers
+RATE_LIMIT_RECORDS = 20
+RATE_LIMIT_INTERVAL = 60.
+RATE_LIMIT_LEVEL = logging.INFO
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    A logging filter that lets pass at most max_records messages of the same kind (logger, level and message
+    template) per interval of time. The number of messages suppressed is added to the next message that passes.
+    Only the messages up to max_level are limited (e.g. the debug messages of each compound), the warnings and
+    errors (e.g. the summaries and failures of the runs) always pass.
+    ...
+
+    Attributes
+    ----------
+    max_records : int
+        maximum number of messages of each kind per interval
+    interval : float
+        length of the interval (s)
+    max_level : int
+        highest level of the messages limited
+    """
+
+    def __init__(self, max_records=RATE_LIMIT_RECORDS, interval=RATE_LIMIT_INTERVAL, max_level=RATE_LIMIT_LEVEL):
+        super().__init__()
+        self.max_records = max_records
+        self.interval = interval
+        self.max_level = max_level
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            start, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - start >= self.interval:
+                start, count = now, 0
+            if count >= self.max_records:
+                self._windows[key] = (start, count, suppressed + 1)
+                return False
+            self._windows[key] = (start, count + 1, 0)
+
+        if suppressed:
+            record.msg = f'{record.msg} ({suppressed} similar messages suppressed)'
+        return True
+
+
+_rate_limit_filter = RateLimitFilter()
+
+# the library does not output anything unless the application configures logging
+logging.getLogger('micropyro').addHandler(logging.NullHandler())
+
+
+def get_logger(name):
+    """
+    Logger of a module of micropyro, with the rate limit filter (see RateLimitFilter).
+
+    Parameters
+    ----------
+    name: str
+        name of the module
+
+    Returns
+    -------
+    logger: logging.Logger
+    """
+    logger = logging.getLogger(name)
+    if _rate_limit_filter not in logger.filters:
+        logger.addFilter(_rate_limit_filter)
+    return logger
+
+
+def summarize_names(names, max_names=10):
+    """
+    Short text with a list of names, for the log messages: the first max_names names and the number of remaining
+    ones.
+
+    Parameters
+    ----------
+    names: list of str
+    max_names: int
+
+    Returns
+    -------
+    summary: str
+    """
+    names = [str(name) for name in names]
+    summary = ', '.join(names[:max_names])
+    if len(names) > max_names:
+        summary += f' and {len(names) - max_names} more'
+    return summary
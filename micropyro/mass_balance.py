@@ -0,0 +1,149 @@
+import numpy as np
+
+
+class MassBalance:
+    """
+    A class used to compute the mass balance of the experimental matrix (read with ReadExperimentTable).
+    Each term of the balance is a derived column of the dataframe, computed as a columnar expression of other
+    columns. The class keeps track of the inputs of each term, so that after changing some columns, only the terms
+    that depend on them are recomputed.
+    All mass should be given in **mg**.
+
+    ...
+
+    Attributes
+    ----------
+    df : df
+        the dataframe of the experimental matrix. The derived columns are added to it.
+    used_is : bool
+        define if internal standard was used (True) or not (False)
+    is_concentration : float
+        concentration of the internal standard in the mixture (see ReadExperimentTable.compute_is_amount)
+    terms : tuple. Class attribute.
+        (name, inputs, method) of each derived column, in order of computation.
+
+    Methods
+    -------
+    mark_changed(self, *columns)
+        Flags columns as changed, so that the terms depending on them are recomputed in the next update.
+    set_column(self, column, values)
+        Sets the values of a column and flags it as changed.
+    update(self, force=False)
+        Computes the terms whose inputs changed (or all of them, if force).
+    """
+
+    terms = (
+        ('is_amount', ('is',), '_is_amount'),
+        ('total before w/o holder', ('cup', 'sample', 'wool', 'hook', 'is'), '_total_before'),
+        ('char mass', ('sample', 'is_amount', 'total after w/o holder', 'total before w/o holder'), '_char_mass'),
+        ('% char', ('char mass', 'sample'), '_percent_char'),
+        ('volatiles mass', ('sample', 'char mass'), '_volatiles_mass'),
+        ('% volatiles', ('volatiles mass', 'sample'), '_percent_volatiles'),
+    )
+
+    def __init__(self, df, used_is=True, is_concentration=1):
+        """
+        :param df: dataframe of the experimental matrix, with the columns in lower case (see ReadExperimentTable).
+        :param used_is: bool internal standard used or not.
+        :param is_concentration: float concentration of the standard in the mixture.
+        """
+        self.df = df
+        self.used_is = used_is
+        self.is_concentration = is_concentration
+
+        # maybe the wool was not added, if so, we set it to 0
+        if 'wool' not in self.df:
+            self.df['wool'] = 0.
+        # maybe the is was not used
+        if not self.used_is:
+            self.df['is'] = 0.
+
+        # at the beginning, everything has to be computed
+        self._changed = set(self.df.columns)
+        self._computed = set()
+
+    def mark_changed(self, *columns):
+        """
+        Flags columns as changed (if modified directly in the dataframe),
+        so the terms depending on them are recomputed in the next update.
+
+        :param columns: str
+                names of the changed columns
+        """
+        self._changed.update(column.lower() for column in columns)
+
+    def set_column(self, column, values):
+        """
+        Sets the values of an input column and flags it as changed.
+
+        :param column: str
+                name of the column
+        :param values: array-like or float
+                new values
+        """
+        self.df[column] = values
+        self.mark_changed(column)
+
+    def set_is_concentration(self, is_concentration):
+        """
+        Changes the concentration of the internal standard, the amount of IS (and dependencies) will be recomputed.
+
+        :param is_concentration: float
+                concentration of the standard in the mixture.
+        """
+        self.is_concentration = is_concentration
+        self._computed.discard('is_amount')
+
+    def update(self, force=False):
+        """
+        Computes the terms of the mass balance. Only the terms with changed inputs (or never computed) are
+        recomputed, the changes are propagated to the terms depending on them.
+        Terms whose inputs are not available in the dataframe are skipped
+        (e.g. the char if the mass after the experiment is not given).
+
+        :param force: bool
+                recompute all the terms.
+        :return: list of str
+                names of the recomputed columns.
+        """
+        changed = set(self.df.columns) if force else self._changed
+        recomputed = []
+
+        for name, inputs, method in self.terms:
+            if not all(column in self.df for column in inputs):
+                continue
+            if name in self._computed and not changed.intersection(inputs):
+                continue
+
+            self.df[name] = getattr(self, method)()
+            self._computed.add(name)
+            changed.add(name)
+            recomputed.append(name)
+
+        self._changed = set()
+        return recomputed
+
+    def _values(self, column):
+        return self.df[column].to_numpy(dtype=float)
+
+    def _is_amount(self):
+        if not self.used_is:
+            return np.zeros(len(self.df))
+        return self._values('is') * self.is_concentration
+
+    def _total_before(self):
+        return self._values('cup') + self._values('sample') + self._values('wool') + self._values('hook') + \
+               self._values('is')
+
+    def _char_mass(self):
+        return self._values('sample') + self._values('is_amount') + self._values('total after w/o holder') - \
+               self._values('total before w/o holder')
+
+    def _percent_char(self):
+        return self._values('char mass') / self._values('sample') * 100
+
+    def _volatiles_mass(self):
+        return self._values('sample') - self._values('char mass')
+
+    def _percent_volatiles(self):
+        return self._values('volatiles mass') / self._values('sample') * 100
@@ -0,0 +1,117 @@
+import pandas as pd
+
+
+class MatchReport:
+    """
+    A class used to collect the compounds that were not matched with the database, and the compounds dropped
+    (or not found to be dropped) when computing the yields, for one or several runs.
+    It is returned by perform_matching_database and check_matches_database, and can be given to the
+    yields functions (compute_yields_is, etc.) to collect several runs in a single report.
+    ...
+
+    Attributes
+    ----------
+    unmatched : dict
+        for each run, the names of the compounds not found in the database (one per blob)
+    dropped : dict
+        for each run, the names of the compounds dropped
+    not_dropped : dict
+        for each run, the names of the compounds to drop that were not found
+
+    Methods
+    -------
+    add(self, kind, run, names)
+        Adds compounds to the report
+    counts(self)
+        Table with the number of compounds of each kind per run
+    distinct(self, kind='unmatched')
+        Sorted distinct names of the compounds of a kind, for all the runs
+    update(self, other)
+        Adds the compounds of another report
+    to_dict(self)
+        Report as dictionary (e.g. to be saved as json)
+
+    Examples
+    ---------
+    >>> report = mp.MatchReport()
+    >>> for experiment, blob_df in blob_dfs.items():
+    ...     mp.perform_matching_database(blob_df, database.df, report=report, run=experiment)
+    >>> report.counts()
+    >>> report.distinct('unmatched')
+    """
+
+    kinds = ('unmatched', 'dropped', 'not_dropped')
+
+    def __init__(self):
+        self.unmatched = {}
+        self.dropped = {}
+        self.not_dropped = {}
+
+    def __repr__(self):
+        counts = ', '.join(f'{kind}={sum(len(names) for names in getattr(self, kind).values())}'
+                           for kind in self.kinds)
+        return f'MatchReport({counts})'
+
+    def add(self, kind, run, names):
+        """
+        Adds compounds to the report.
+
+        Parameters
+        ----------
+        kind: str
+            unmatched, dropped or not_dropped
+        run: str
+            name of the run (e.g. the experiment), can be None
+        names: list of str
+            names of the compounds
+        """
+        getattr(self, kind).setdefault(run, []).extend(names)
+
+    def counts(self):
+        """
+        Table with the number of compounds of each kind (columns) per run (rows).
+
+        Returns
+        -------
+        counts: df
+        """
+        runs = list(dict.fromkeys(run for kind in self.kinds for run in getattr(self, kind)))
+        data = {kind: [len(getattr(self, kind).get(run, [])) for run in runs] for kind in self.kinds}
+        return pd.DataFrame(data, index=pd.Index(runs, name='run'), columns=list(self.kinds))
+
+    def distinct(self, kind='unmatched'):
+        """
+        Sorted distinct names of the compounds of a kind, for all the runs.
+
+        Parameters
+        ----------
+        kind: str
+            unmatched, dropped or not_dropped
+
+        Returns
+        -------
+        names: list of str
+        """
+        return sorted({name for names in getattr(self, kind).values() for name in names})
+
+    def update(self, other):
+        """
+        Adds the compounds of another report (e.g. from another process).
+
+        Parameters
+        ----------
+        other: MatchReport
+        """
+        for kind in self.kinds:
+            for run, names in getattr(other, kind).items():
+                self.add(kind, run, names)
+
+    def to_dict(self):
+        """
+        Report as dictionary, with the compounds of each kind per run.
+
+        Returns
+        -------
+        report: dict
+        """
+        return {kind: {str(run): list(names) for run, names in getattr(self, kind).items()} for kind in self.kinds}
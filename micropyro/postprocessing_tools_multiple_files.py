@@ -1,11 +1,351 @@
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 from matplotlib import cm
-from micropyro import get_markers, get_linestyles
+from micropyro import get_atom_mw_dict, get_markers, get_linestyles, totals_to_dataframe
+from .logs import get_logger, summarize_names
+from .profiling import profile_stage
 
-def compare_yields(blob_dfs, compounds, x_axis=None, save_plot=None):
+_logger = get_logger(__name__)
+
+def concat_results(blob_dfs, run_names=None, columns=None, vocabulary=None):
+    """
+    Concatenates the results of several files in a single long-format dataframe,
+    with one row per experiment and compound.
+    If a vocabulary is given, the experiment and compound columns are categoricals (the compounds on the
+    vocabulary, see CompoundVocabulary), which takes several times less memory for large campaigns.
+
+    Parameters
+    ----------
+    blob_dfs: list of dfs
+            List of Dataframes with the results
+    run_names: list of str
+            Names of the runs (should be unique). If not given, the position in the list is used.
+    columns: list of str
+            Columns to keep. If not given, all the columns are kept.
+    vocabulary: CompoundVocabulary
+            Vocabulary of the compounds. The compounds not found are added to it.
+
+    Return
+    ----------
+    results: df
+        with the columns experiment, compound and the columns of the results.
+    """
+    if run_names is None:
+        run_names = range(len(blob_dfs))
+    if columns is not None:
+        blob_dfs = [df[columns] for df in blob_dfs]
+
+    if vocabulary is None:
+        results = pd.concat(blob_dfs, keys=run_names, names=['experiment', 'compound'])
+        return results.reset_index()
+
+    # the names are encoded run by run, so the long table never holds the names of the compounds
+    compound_codes = np.concatenate([vocabulary.encode(df.index, add=True) for df in blob_dfs] or
+                                    [np.array([], dtype=np.int32)])
+    run_codes = np.repeat(np.arange(len(blob_dfs), dtype=np.int32), [len(df) for df in blob_dfs])
+
+    values = pd.concat(blob_dfs, ignore_index=True) if blob_dfs else pd.DataFrame(columns=columns)
+    values.insert(0, 'compound', pd.Categorical.from_codes(compound_codes, dtype=vocabulary.dtype))
+    values.insert(0, 'experiment', pd.Categorical.from_codes(run_codes, categories=pd.Index(run_names)))
+    return values
+
+
+def yields_matrix(blob_dfs, compounds=None, run_names=None, column="yield mrf", vocabulary=None):
+    """
+    Builds the matrix of yields (experiments x compounds) of several results files,
+    with a single concatenation and pivot. Compounds not found in a file are nan.
+    If a vocabulary is given (see CompoundVocabulary), the pivot is done on the integer codes of the compounds.
+
+    Parameters
+    ----------
+    blob_dfs: list of dfs
+            List of Dataframes with the results
+    compounds: list of strings
+            Compounds to be included (columns, in this order). If not given, all the compounds are included.
+    run_names: list of str
+            Names of the runs (should be unique). If not given, the position in the list is used.
+    column: str
+            Column with the yields
+    vocabulary: CompoundVocabulary
+            Vocabulary of the compounds. The compounds not found are added to it.
+
+    Return
+    ----------
+    matrix: df
+        yields with one row per run and one column per compound
+    """
+    if run_names is None:
+        run_names = range(len(blob_dfs))
+
+    if vocabulary is not None:
+        return _yields_matrix_codes(blob_dfs, compounds, run_names, column, vocabulary)
+
+    results = concat_results(blob_dfs, run_names, columns=[column])
+    if compounds is not None:
+        results = results[results['compound'].isin(compounds)]
+
+    matrix = results.pivot_table(index='experiment', columns='compound', values=column, aggfunc='sum',
+                                 dropna=False)
+    matrix = matrix.reindex(index=pd.Index(run_names, name='experiment'), columns=compounds)
+    return matrix
+
+
+def _yields_matrix_codes(blob_dfs, compounds, run_names, column, vocabulary):
+    """
+    yields_matrix on the codes of the compounds: the yields are summed in a dense array (runs x codes),
+    and only the columns of the compounds found (or requested) are kept.
+    """
+    results = concat_results(blob_dfs, run_names, columns=[column], vocabulary=vocabulary)
+    run_codes = results['experiment'].cat.codes.to_numpy()
+    compound_codes = results['compound'].cat.codes.to_numpy()
+    yields = results[column].to_numpy(dtype=float)
+
+    # dense array over the compounds found only
+    used_codes, columns = np.unique(compound_codes, return_inverse=True)
+    n_runs = len(blob_dfs)
+    sums = np.zeros((n_runs, len(used_codes)))
+    found = np.zeros((n_runs, len(used_codes)), dtype=bool)
+    np.add.at(sums, (run_codes, columns), np.nan_to_num(yields))
+    found[run_codes, columns] = True
+    sums[~found] = np.nan
+
+    if compounds is None:
+        # same order of the columns as the pivot (sorted names)
+        names = vocabulary.decode(used_codes)
+        order = np.argsort(names.astype(str), kind='stable')
+        matrix, names = sums[:, order], names[order]
+    else:
+        codes = vocabulary.encode(compounds)
+        positions = np.searchsorted(used_codes, codes).clip(max=max(len(used_codes) - 1, 0))
+        valid = (codes >= 0) & (used_codes[positions] == codes) if len(used_codes) else np.zeros(len(codes), bool)
+        matrix = np.full((n_runs, len(codes)), np.nan)
+        matrix[:, valid] = sums[:, positions[valid]]
+        names = compounds
+
+    return pd.DataFrame(matrix, index=pd.Index(run_names, name='experiment'),
+                        columns=pd.Index(names, name='compound'))
+
+
+def top_n_yields(results, ncompounds, run_column='experiment', compound_column='compound',
+                 yield_column='yield mrf'):
+    """
+    Gets the n compounds with the highest yield of every run, from a long-format table (see concat_results).
+    All the runs are processed at once: the table is sorted by run and yield, and the first n of each run are kept.
+
+    Parameters
+    ----------
+    results: df
+            long-format table with one row per run and compound
+    ncompounds: int
+            number of compounds per run
+    run_column: str
+            column with the names of the runs
+    compound_column: str
+            column with the names of the compounds
+    yield_column: str
+            column with the yields
+
+    Return
+    ----------
+    top: df
+        table with the columns run, compound, yield and rank (1 for the highest yield) of the n compounds of each
+        run
+    """
+    results = results[results[yield_column].notna()]
+
+    run_codes, run_names = pd.factorize(results[run_column])
+    yields = results[yield_column].to_numpy(dtype=float)
+
+    # sort by run (as they appear) and decreasing yield, then the rank is the position within the run
+    order = np.lexsort((-yields, run_codes))
+    sorted_runs = run_codes[order]
+    run_starts = np.searchsorted(sorted_runs, np.arange(len(run_names)))
+    rank = np.arange(len(order)) - run_starts[sorted_runs] + 1
+
+    keep = rank <= ncompounds
+    top = results.iloc[order[keep]][[run_column, compound_column, yield_column]].reset_index(drop=True)
+    top['rank'] = rank[keep]
+    return top
+
+
+def rank_changes(results, ncompounds, run_column='experiment', compound_column='compound',
+                 yield_column='yield mrf'):
+    """
+    Ranks of the compounds that are in the top n of any run, and their change from one run to the next
+    (in the order of the table). The ranks are computed among all the compounds of each run.
+
+    Parameters
+    ----------
+    results: df
+            long-format table with one row per run and compound (see concat_results)
+    ncompounds: int
+            number of compounds per run considered in the top
+    run_column: str
+            column with the names of the runs
+    compound_column: str
+            column with the names of the compounds
+    yield_column: str
+            column with the yields
+
+    Return
+    ----------
+    ranks: df
+        rank (1 for the highest yield) of the compounds (columns) in each run (rows), nan if not found.
+    changes: df
+        previous rank - current rank, positive if the compound climbed with respect to the previous run.
+    """
+    all_ranks = top_n_yields(results, len(results), run_column, compound_column, yield_column)
+    compounds = union_top_n(results, ncompounds, run_column, compound_column, yield_column).index
+
+    all_ranks = all_ranks[all_ranks[compound_column].isin(compounds)]
+    ranks = all_ranks.pivot_table(index=run_column, columns=compound_column, values='rank', aggfunc='min',
+                                  observed=True)
+    ranks = ranks.reindex(index=pd.unique(results[run_column]), columns=compounds)
+
+    changes = -ranks.diff()
+    return ranks, changes
+
+
+def union_top_n(results, ncompounds, run_column='experiment', compound_column='compound',
+                yield_column='yield mrf'):
+    """
+    Campaign view of the top n compounds: all the compounds in the top n of any run,
+    with the number of runs where they are in the top, their best rank and their mean and max yield in the top.
+
+    Parameters
+    ----------
+    results: df
+            long-format table with one row per run and compound (see concat_results)
+    ncompounds: int
+            number of compounds per run considered in the top
+    run_column: str
+            column with the names of the runs
+    compound_column: str
+            column with the names of the compounds
+    yield_column: str
+            column with the yields
+
+    Return
+    ----------
+    union: df
+        one row per compound, sorted by number of runs in the top and mean yield.
+    """
+    top = top_n_yields(results, ncompounds, run_column, compound_column, yield_column)
+    union = top.groupby(compound_column, observed=True).agg(n_runs=(run_column, 'size'), best_rank=('rank', 'min'),
+                                                            mean_yield=(yield_column, 'mean'),
+                                                            max_yield=(yield_column, 'max'))
+    return union.sort_values(['n_runs', 'mean_yield'], ascending=False)
+
+
+def plot_top_n_ranks(ranks, x_axis=None, save_plot=None, ax=None, fig=None):
+    """
+    Plots the ranks of the compounds over the runs (see rank_changes), one line per compound.
+
+    Parameters
+    ----------
+    ranks: df
+            ranks of the compounds (columns) in each run (rows)
+    x_axis: list
+            what to plot in the x axis, could be temperature, or whatever. If not given, the position of the run.
+    save_plot: str
+            Name of the output file
+    ax: matplotlib axis
+            axis where to plot. If not given, a new figure is created.
+    fig: matplotlib figure
+            figure of the axis
+
+    Return
+    ----------
+    fig: plt.figure
+        matplolib figure for further modifications/saving
+    ax: plt.axis
+        matplotlib axis for further modifications/saving
+    """
+    fig, ax = _get_figure_axis(fig, ax)
+
+    if x_axis is None:
+        x_axis = np.arange(len(ranks))
+
+    markers = get_markers()
+    for i_comp, compound in enumerate(ranks.columns):
+        ax.plot(x_axis, ranks[compound].values, marker=markers[i_comp % len(markers)], label=compound)
+
+    ax.invert_yaxis()  # rank 1 on top
+    ax.set_ylabel('Rank')
+    ax.legend(loc='best')
+    if save_plot:
+        fig.savefig(save_plot)
+
+    return fig, ax
+
+
+@profile_stage()
+def get_yields_summary_runs(results, groupings=(), run_column='experiment', yield_column='yield mrf'):
+    """
+    Computes the summary of the yields (see get_yields_summary) of many runs at once, for several groupings.
+    From a long-format table (see concat_results), it gives in a single table:
+
+    - the sum of the yields of each group, for each grouping column and run,
+    - the total FID yield of each run (grouping total_FID, group total),
+    - the yield per atom of each run (grouping atoms_FID, group c, h, o, etc.), if the atoms columns are available.
+
+    Parameters
+    ----------
+    results: df
+            long-format table with one row per run and compound
+    groupings: list of str
+            Names of the grouping columns to be used (e.g. group, grouping_fran)
+    run_column: str
+            column with the names of the runs
+    yield_column: str
+            column with the yields
+
+    Returns
+    ---------
+    summary: df
+            table with the columns run, grouping, group and yield.
+    """
+    yields = pd.to_numeric(results[yield_column], errors='coerce')
+    summaries = []
+
+    # all the groupings at once: one row per compound and grouping, and a single groupby
+    if groupings:
+        n_rows = len(results)
+        groups = pd.DataFrame({run_column: np.tile(results[run_column].to_numpy(), len(groupings)),
+                               'grouping': np.repeat(list(groupings), n_rows),
+                               'group': np.concatenate([results[grouping].to_numpy(dtype=object)
+                                                        for grouping in groupings]),
+                               yield_column: np.tile(yields.to_numpy(dtype=float), len(groupings))})
+        summaries.append(groups.groupby([run_column, 'grouping', 'group'], sort=False)[yield_column].sum()
+                         .reset_index())
+
+    totals = yields.groupby(results[run_column], sort=False, observed=True).sum()
+    summaries.append(pd.DataFrame({run_column: totals.index, 'grouping': 'total_FID', 'group': 'total',
+                                   yield_column: totals.values}))
+
+    # yield per atom: yield / mw * number of atoms * mw of the atom, for all the atoms at once
+    data_atoms = get_atom_mw_dict()
+    atoms = [atom for atom in data_atoms if atom in results.columns]
+    if atoms:
+        mw = pd.to_numeric(results['mw'], errors='coerce').to_numpy(dtype=float)
+        n_atoms = results[atoms].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        mw_atoms = np.array([data_atoms[atom]['mw'] for atom in atoms])
+        yields_atoms = pd.DataFrame(yields.to_numpy(dtype=float)[:, np.newaxis] / mw[:, np.newaxis] * n_atoms *
+                                    mw_atoms, columns=atoms)
+        yields_atoms = yields_atoms.groupby(results[run_column].to_numpy(), sort=False).sum()
+        yields_atoms = yields_atoms.rename_axis(run_column).reset_index().melt(
+            id_vars=run_column, var_name='group', value_name=yield_column)
+        yields_atoms.insert(1, 'grouping', 'atoms_FID')
+        summaries.append(yields_atoms)
+
+    return pd.concat(summaries, ignore_index=True)
+
+
+def compare_yields(blob_dfs, compounds, x_axis=None, save_plot=None, ax=None, fig=None):
     """
     This utility compares the yields of different files (repetitions, temperatures, etc) .
+    The data is obtained with yields_matrix, use it directly if the plot is not needed.
 
     Parameters
     ----------
@@ -17,6 +357,10 @@ def compare_yields(blob_dfs, compounds, x_axis=None, save_plot=None):
             what to plot in the x axis, could be temperature, or whatever.
     save_plot: str
             Name of the output file
+    ax: matplotlib axis
+            axis where to plot. If not given, a new figure is created.
+    fig: matplotlib figure
+            figure of the axis
 
     Return
     ----------
@@ -28,16 +372,21 @@ def compare_yields(blob_dfs, compounds, x_axis=None, save_plot=None):
 
     cmap = cm.get_cmap('tab10', 10)  # PiYG
 
-    fig, ax = plt.subplots()
+    fig, ax = _get_figure_axis(fig, ax)
 
+    matrix = yields_matrix(blob_dfs, compounds)
+
+    # one artist per compound, the nans (compound not found) are not drawn
+    not_found = {}
     for i_comp, compound in enumerate(compounds):
         color = cmap(i_comp)[:3]
-        for i_df, df in enumerate(blob_dfs):
-            try:
-                yield_mrf = df.loc[compound, "yield mrf"]
-                ax.plot(x_axis[i_df], yield_mrf, 'o', color=color)
-            except KeyError:
-                print(f'{compound} not found in {i_df}-th dataframe')
+        yields_compound = matrix[compound].values
+        ax.plot(x_axis, yields_compound, 'o', color=color)
+
+        not_found_compound = np.flatnonzero(np.isnan(yields_compound))
+        if not_found_compound.size:
+            not_found[compound] = list(not_found_compound)
+    _log_not_found(not_found, 'dataframes')
 
     for i_comp, compound in enumerate(compounds):
         ax.plot([], [], color=cmap(i_comp)[:3], linestyle='-', label=compound)
@@ -59,7 +408,7 @@ def plot_ranges_MW(blob_dfs, ranges, x_axis=None, save_plot=None, lines=True,
     blob_dfs: list of dfs
             List of Dataframes with the results
     ranges: list of floats
-            Each pair of numbers define the range
+            Each pair of consecutive numbers define the range, the lower bound included (see bin_yields_mw)
     x_axis: list
             what to plot in the x axis, could be temperature, or whatever.
     save_plot: str
@@ -78,10 +427,9 @@ def plot_ranges_MW(blob_dfs, ranges, x_axis=None, save_plot=None, lines=True,
     """
 
     cmap = cm.get_cmap('tab10', 10)  # PiYG
-    plt.gca().set_prop_cycle(None)
 
-    if not ax:
-        fig, ax = plt.subplots()
+    fig, ax = _get_figure_axis(fig, ax)
+    ax.set_prop_cycle(None)
 
     markers = get_markers()
     if lines:
@@ -89,23 +437,14 @@ def plot_ranges_MW(blob_dfs, ranges, x_axis=None, save_plot=None, lines=True,
     else:
         linestyle = len(ranges)*[""]
 
-    dict_ranges_data = {k: [] for k in ranges[1:]}
-
-    for i_range, range_data in enumerate(ranges):
-        # skip the first since it is forced to be 0
-        if i_range == 0:
-            continue
-        for i_df, df in enumerate(blob_dfs):
-            aux_df = df[(df.mw > ranges[i_range - 1]) & (df.mw < ranges[i_range])]
-            yield_mrf = aux_df["yield mrf"].sum()
-            dict_ranges_data[range_data].append(yield_mrf)
+    yields_ranges = bin_yields_mw(blob_dfs, ranges)
 
-    for i_range, range_data in enumerate(dict_ranges_data.keys()):
+    for i_range, range_data in enumerate(ranges[1:]):
         if legend:
-            label = f'{ranges[i_range]}$<$MW$<${range_data}'
+            label = f'{ranges[i_range]}$\\leq$MW$<${range_data}'
         else:
             label = None
-        ax.plot(x_axis, dict_ranges_data[range_data], 'o', color=cmap(i_range + 1)[:3],
+        ax.plot(x_axis, yields_ranges.iloc[:, i_range].values, 'o', color=cmap(i_range + 1)[:3],
                 label=label, marker=markers[i_range], linestyle=linestyle[i_range], **kwargs)
 
     if plot_total:
@@ -120,6 +459,56 @@ def plot_ranges_MW(blob_dfs, ranges, x_axis=None, save_plot=None, lines=True,
     return fig, ax
 
 
+def bin_yields_mw(blob_dfs, edges, run_names=None, column="yield mrf"):
+    """
+    Sums the yields of several results files by ranges of MW.
+    All the files are concatenated once, each compound is assigned to its bin with a binary search on the edges,
+    and a single grouped sum gives the matrix (runs x bins).
+    The bins include the lower edge and exclude the upper one: edges[i] <= MW < edges[i+1].
+    Compounds without MW or outside the edges are not counted.
+
+    Parameters
+    ----------
+    blob_dfs: list of dfs
+            List of Dataframes with the results
+    edges: list of floats
+            Edges of the MW bins, in increasing order
+    run_names: list of str
+            Names of the runs (index of the result). If not given, the position in the list is used.
+    column: str
+            Column to be summed
+
+    Return
+    ----------
+    yields_ranges: df
+        Sum of the column for each run (rows) and bin (columns)
+    """
+    edges = np.asarray(edges, dtype=float)
+    n_runs = len(blob_dfs)
+    n_bins = len(edges) - 1
+
+    # concatenate all the frames at once, keeping the position of the run
+    lengths = [len(df) for df in blob_dfs]
+    mw = np.concatenate([pd.to_numeric(df['mw'], errors='coerce').to_numpy(dtype=float) for df in blob_dfs]) \
+        if n_runs else np.array([])
+    yields = np.concatenate([pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+                             for df in blob_dfs]) if n_runs else np.array([])
+    runs = np.repeat(np.arange(n_runs), lengths)
+
+    # bin i is edges[i] <= mw < edges[i+1], nan MW go to the end and are removed
+    bins = np.searchsorted(edges, mw, side='right') - 1
+    valid = (bins >= 0) & (bins < n_bins) & ~np.isnan(yields)
+
+    yields_ranges = np.bincount(runs[valid] * n_bins + bins[valid], weights=yields[valid],
+                                minlength=n_runs * n_bins).reshape(n_runs, n_bins)
+
+    if run_names is None:
+        run_names = range(n_runs)
+
+    return pd.DataFrame(yields_ranges, index=pd.Index(run_names, name='experiment'),
+                        columns=pd.IntervalIndex.from_breaks(edges, closed='left', name='mw'))
+
+
 def compare_quantites_totals(list_totals_dict, quantity, subgroups=None, x_axis=None, save_plot=None, ax=None, fig=None,
                              legend=True, **kwargs):
     """
@@ -127,8 +516,8 @@ def compare_quantites_totals(list_totals_dict, quantity, subgroups=None, x_axis=
 
     Parameters
     ----------
-    list_totals_dict: list of dfs
-            List of dicts with the totals.
+    list_totals_dict: list of dicts or df
+            List of dicts with the totals, or the table from totals_to_dataframe.
     quantity: str
             Quantity to compare (atoms, total, grouping, etc)
     subgroup: list of str
@@ -149,21 +538,30 @@ def compare_quantites_totals(list_totals_dict, quantity, subgroups=None, x_axis=
 
     cmap = cm.get_cmap('tab10', 10)  # PiYG
 
-    if not ax:
-        fig, ax = plt.subplots()
+    fig, ax = _get_figure_axis(fig, ax)
+
+    totals = totals_to_dataframe(list_totals_dict)
+    prefix = f'{quantity}.'
 
     if not subgroups:
-        subgroups = list_totals_dict[0][quantity].keys()  # if subgroup not given, guess it from the first file.
+        # if subgroup not given, guess it from the columns of the table.
+        subgroups = [column[len(prefix):] for column in totals.columns if column.startswith(prefix)]
 
-    # TODO: refurbish this: first get the data, then plot it after. like this we can implement cumulative if needed.
+    # one artist per group, with the values of all the files
+    not_found = {}
     for i_group, group in enumerate(subgroups):
         color = cmap(i_group)[:3]
-        for i_dict_totals, dict_totals in enumerate(list_totals_dict):
-            try:
-                quantity_group = dict_totals[quantity][group]
-                ax.plot(x_axis[i_dict_totals], quantity_group, 'o', color=color, **kwargs)
-            except KeyError:
-                print(f'{group} not found in {i_dict_totals}-th dictionary')
+        try:
+            quantity_group = totals[prefix + group].to_numpy(dtype=float)
+        except KeyError:
+            not_found[group] = 'any'
+            continue
+        ax.plot(x_axis, quantity_group, 'o', color=color, **kwargs)
+
+        not_found_group = np.flatnonzero(np.isnan(quantity_group))
+        if not_found_group.size:
+            not_found[group] = list(not_found_group)
+    _log_not_found(not_found, 'dictionaries')
 
     if legend:
         for i_group, group in enumerate(subgroups):
@@ -178,7 +576,8 @@ def compare_quantites_totals(list_totals_dict, quantity, subgroups=None, x_axis=
     return fig, ax
 
 
-def compare_elements_totals(list_totals_dict, elements=['c', 'o', 'h', 'n'], x_axis=None, save_plot=None):
+def compare_elements_totals(list_totals_dict, elements=['c', 'o', 'h', 'n'], x_axis=None, save_plot=None, ax=None,
+                            fig=None):
     """
         This utility compares the elements for given results files (repetitions, temperatures, etc).
         Basically particularizes compare_quantites_totals
@@ -201,7 +600,8 @@ def compare_elements_totals(list_totals_dict, elements=['c', 'o', 'h', 'n'], x_a
         ax: plt.axis
             matplotlib axis for further modifications/saving
         """
-    fig, ax = compare_quantites_totals(list_totals_dict, 'atoms_FID', elements, x_axis, save_plot=False)
+    fig, ax = compare_quantites_totals(list_totals_dict, 'atoms_FID', elements, x_axis, save_plot=False, ax=ax,
+                                       fig=fig)
     ax.set_ylabel('Mass Yield, \\%')
     ax.set_xlabel('Temperature, \N{DEGREE SIGN}C')
 
@@ -211,7 +611,7 @@ def compare_elements_totals(list_totals_dict, elements=['c', 'o', 'h', 'n'], x_a
     return fig, ax
 
 
-def compare_group_totals(list_totals_dict, group_name, x_axis=None, save_plot=None):
+def compare_group_totals(list_totals_dict, group_name, x_axis=None, save_plot=None, ax=None, fig=None):
     """
         This utility compares the groups for given results files (repetitions, temperatures, etc).
         Basically particularizes compare_quantites_totals
@@ -234,7 +634,8 @@ def compare_group_totals(list_totals_dict, group_name, x_axis=None, save_plot=No
         ax: plt.axis
             matplotlib axis for further modifications/saving
         """
-    fig, ax = compare_quantites_totals(list_totals_dict, quantity=group_name, x_axis=x_axis, save_plot=False)
+    fig, ax = compare_quantites_totals(list_totals_dict, quantity=group_name, x_axis=x_axis, save_plot=False,
+                                       ax=ax, fig=fig)
     ax.set_ylabel('Mass Yield, \\%')
     ax.set_xlabel('Temperature, \N{DEGREE SIGN}C')
 
@@ -251,8 +652,8 @@ def plot_total_globals(list_totals_dict, x_axis=None, save_plot=None, annotate=F
 
     Parameters
     ----------
-    list_totals_dict: list of dfs
-        List of dicts with the totals.
+    list_totals_dict: list of dicts or df
+        List of dicts with the totals, or the table from totals_to_dataframe.
     annotate: bool
         annotates the filenames
     save_plot: bool or str
@@ -269,32 +670,27 @@ def plot_total_globals(list_totals_dict, x_axis=None, save_plot=None, annotate=F
     ax: plt.axis
         matplotlib axis for further modifications/saving
     """
-    plt.gca().set_prop_cycle(None)
-
     markers = get_markers()
 
-    if ax is None:
-        fig, ax = plt.subplots()
+    fig, ax = _get_figure_axis(fig, ax)
+    ax.set_prop_cycle(None)
 
-    yield_names = ('char_yield', 'total_FID', 'total_gases')
-    dict_totals_plot = {'char_yield': [], 'total_FID': [], 'total_gases': [], 'total_sum': []}
-    annotations = []
+    yield_names = ['char_yield', 'total_FID', 'total_gases']
+    columns = yield_names + ['total_sum', 'mass ug', '1st_react_temp', '2nd_react_temp']
+    totals = totals_to_dataframe(list_totals_dict).reindex(columns=columns)
 
-    for dict_totals in list_totals_dict:
-        yields = []  # container to add the yields of a single measurement (gas, char, fid)
-        for yield_to_add in yield_names:
-            extracted_yield_from_json = dict_totals.get(yield_to_add, np.nan)  # get it from the json file
-            yields.append(extracted_yield_from_json)  # add it to the container
-            dict_totals_plot[yield_to_add].append(extracted_yield_from_json)  # add it to the dictionary
-
-        total = np.nansum(yields)  # adds all of them considering nans = 0
-        dict_totals_plot['total_sum'].append(total)
-        if annotate:
-            mass = f'{dict_totals["mass ug"]:.0f} ug' if not np.isnan(dict_totals["mass ug"]) else ''
-            first_react = f'{dict_totals["1st_react_temp"]:.0f} C' if not np.isnan(
-                dict_totals["1st_react_temp"]) else ''
-            second_react = f'{dict_totals["2nd_react_temp"]:.0f} C' if not np.isnan(
-                dict_totals["2nd_react_temp"]) else ''
+    # adds all of them considering nans = 0
+    totals['total_sum'] = np.nansum(totals[yield_names].to_numpy(dtype=float), axis=1)
+    dict_totals_plot = {quantity_plot: totals[quantity_plot].to_numpy(dtype=float)
+                        for quantity_plot in yield_names + ['total_sum']}
+
+    annotations = []
+    if annotate:
+        conditions = totals[['mass ug', '1st_react_temp', '2nd_react_temp']].to_numpy(dtype=float)
+        for mass_ug, first_react_temp, second_react_temp in conditions:
+            mass = f'{mass_ug:.0f} ug' if not np.isnan(mass_ug) else ''
+            first_react = f'{first_react_temp:.0f} C' if not np.isnan(first_react_temp) else ''
+            second_react = f'{second_react_temp:.0f} C' if not np.isnan(second_react_temp) else ''
             annotations.append(f'{mass} {first_react} {second_react}')
 
     conversion_names_label = {'char_yield': 'Char', 'total_FID': 'Vapors',
@@ -302,9 +698,7 @@ def plot_total_globals(list_totals_dict, x_axis=None, save_plot=None, annotate=F
 
     if x_axis is None:
         # x axis will be set to the temperature of the first reactor
-        x_axis = []
-        for dict_totals in list_totals_dict:
-            x_axis.append(dict_totals['1st_react_temp'])
+        x_axis = totals['1st_react_temp'].to_numpy(dtype=float)
 
     if not errorbars:
         for idx, (quantity_plot, values_plot) in enumerate(dict_totals_plot.items()):
@@ -334,3 +728,25 @@ def plot_total_globals(list_totals_dict, x_axis=None, save_plot=None, annotate=F
         fig.savefig(save_plot)
 
     return fig, ax
+
+
+def _get_figure_axis(fig, ax):
+    """
+    Returns the figure and axis to plot on. If the axis is not given, a new figure is created with pyplot,
+    otherwise the figure of the axis is used (so it also works with figures created without pyplot).
+    """
+    if ax is None:
+        return plt.subplots()
+    if fig is None:
+        fig = ax.figure
+    return fig, ax
+
+
+def _log_not_found(not_found, where):
+    """
+    Logs the compounds (or groups) not found in some of the files, in a single message.
+    not_found maps each name to the positions of the files where it is missing (or 'any').
+    """
+    if not_found:
+        _logger.warning('%d not found in %s: %s', len(not_found), where,
+                        summarize_names([f'{name} {positions}' for name, positions in not_found.items()]))
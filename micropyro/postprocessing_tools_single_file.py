@@ -6,9 +6,13 @@ import pkg_resources
 import seaborn as sns
 
 import micropyro as mp
+from .logs import get_logger
+from .profiling import profile_stage
 
+_logger = get_logger(__name__)
 
-def plot_n_highest_yields(blob_df, ncompounds, save_plot=None):
+
+def plot_n_highest_yields(blob_df, ncompounds, save_plot=None, ax=None):
     """
     This utility plots the n compounds with the highest mrf yield.
 
@@ -20,10 +24,12 @@ def plot_n_highest_yields(blob_df, ncompounds, save_plot=None):
             Number of compounds to be plotted
     save_plot: str
             Name of the output file
+    ax: matplotlib axis
+            axis where to plot. If not given, the current axis of pyplot is used.
     """
     n_largest = blob_df.nlargest(ncompounds, 'yield mrf')
 
-    ax = sns.barplot(x="index", y="yield mrf", data=n_largest.reset_index())
+    ax = sns.barplot(x="index", y="yield mrf", data=n_largest.reset_index(), ax=ax)
 
     max_width = 12
     ax.set_xticklabels(textwrap.fill(x.get_text(), max_width) for x in ax.get_xticklabels())
@@ -32,10 +38,11 @@ def plot_n_highest_yields(blob_df, ncompounds, save_plot=None):
 
     # if you save in a file, I won't show it.
     if save_plot:
-        plt.savefig(save_plot)
+        ax.figure.savefig(save_plot)
 
     return ax
 
+@profile_stage()
 def get_yields_summary(blob_df, grouping=None, to_file=None):
     """
     This utility computes the yields for the atoms based on the grouping.
@@ -58,12 +65,11 @@ def get_yields_summary(blob_df, grouping=None, to_file=None):
     """
 
     if grouping:
-        sum_groups = blob_df.groupby(grouping)['yield mrf'].sum()
+        sum_groups = blob_df.groupby(grouping)['yield mrf'].sum().to_dict()
     else:
         sum_groups = {}
 
     total = blob_df['yield mrf'].sum()
-    sum_groups = sum_groups.to_dict()
 
     dict_per_atom = compute_elemental_composition(blob_df)
 
@@ -75,6 +81,7 @@ def get_yields_summary(blob_df, grouping=None, to_file=None):
     return dict_data
 
 
+@profile_stage()
 def compute_elemental_composition(blob_df):
     """
     This function computes the elemental compositon per atom of the blob_df.
@@ -101,7 +108,7 @@ def compute_elemental_composition(blob_df):
             blob_df[f'%{atom}'] = blob_df.apply(lambda row: row["yield mrf"] / float(row["mw"]) * float(row[atom]) * MW_atom, axis=1)
             data_per_atom[atom] = blob_df[f'%{atom}'].sum()
         except KeyError:
-            print(f"Compounds with {atom.upper()} not found.")
+            _logger.info('Compounds with %s not found.', atom.upper())
             pass
 
     return data_per_atom
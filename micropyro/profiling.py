@@ -0,0 +1,284 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from functools import wraps
+
+import pandas as pd
+
+# profiler collecting the stages, None when the profiling is disabled
+_active_profiler = None
+
+
+class Profiler:
+    """
+    A class used to profile the stages of the processing (reading the blob files, matching the database,
+    computing the yields, summaries and writers). While a profiler is active (with block), every stage records
+    its wall time, CPU time, number of rows and, optionally, the peak memory allocated.
+    When no profiler is active, the stages only cost a global lookup.
+    ...
+
+    Attributes
+    ----------
+    memory : bool
+        also record the peak memory of each stage (with tracemalloc, which slows down the code)
+    records : list of dicts
+        one record per stage: run, stage, depth, start (s), wall_time (s), cpu_time (s), rows, peak_memory (bytes),
+        pid and thread.
+
+    Methods
+    -------
+    run(self, name)
+        Context manager to set the name of the run of the stages recorded inside
+    to_dataframe(self)
+        Table with all the records
+    timing_table(self, column='wall_time')
+        Table with the time spent per run and stage
+    to_chrome_trace(self, filename)
+        Writes the records as a Chrome trace (json) file
+
+    Examples
+    ---------
+    >>> with mp.Profiler() as profiler:
+    ...     with profiler.run('100 ug Py_600C'):
+    ...         blob_df = mp.read_blob_file(blob_file)
+    ...         mp.perform_matching_database(blob_df, database.df)
+    >>> profiler.timing_table()
+    >>> profiler.to_chrome_trace('trace.json')
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.records = []
+        self.current_run = None
+        self._local = threading.local()
+        self._previous = None
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        global _active_profiler
+        self._previous = _active_profiler
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        _active_profiler = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active_profiler
+        _active_profiler = self._previous
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        # the records of a nested profiler are also kept by the enclosing one
+        if self._previous is not None:
+            self._previous.records.extend(self.records)
+        self._previous = None
+
+    def run(self, name):
+        """
+        Context manager to set the name of the run of the stages recorded inside.
+
+        Parameters
+        ----------
+        name: str
+            name of the run (e.g. the experiment)
+        """
+        return _Run(self, name)
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _start_stage(self, name):
+        stack = self._stack()
+        record = {'run': self.current_run, 'stage': name, 'depth': len(stack), 'rows': None, 'peak_memory': None,
+                  'pid': os.getpid(), 'thread': threading.get_ident()}
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # the peak of the enclosing stage so far is kept before resetting it for this one
+                stack[-1]['_peak'] = max(stack[-1]['_peak'], peak)
+            tracemalloc.reset_peak()
+            record['_memory_start'] = current
+            record['_peak'] = current
+        stack.append(record)
+        record['_cpu_start'] = time.process_time()
+        record['start'] = time.perf_counter()
+        return record
+
+    def _end_stage(self, record):
+        end = time.perf_counter()
+        record['wall_time'] = end - record['start']
+        record['cpu_time'] = time.process_time() - record.pop('_cpu_start')
+        stack = self._stack()
+        stack.pop()
+        if '_peak' in record:
+            peak = max(record.pop('_peak'), tracemalloc.get_traced_memory()[1])
+            record['peak_memory'] = peak - record.pop('_memory_start')
+            if stack:
+                stack[-1]['_peak'] = max(stack[-1]['_peak'], peak)
+            tracemalloc.reset_peak()
+        self.records.append(record)
+
+    def to_dataframe(self):
+        """
+        Table with all the records, in the order in which the stages finished.
+
+        Returns
+        -------
+        records: df
+            with the columns run, stage, depth, start, wall_time, cpu_time, rows, peak_memory, pid and thread.
+        """
+        columns = ['run', 'stage', 'depth', 'start', 'wall_time', 'cpu_time', 'rows', 'peak_memory', 'pid',
+                   'thread']
+        return pd.DataFrame(self.records, columns=columns)
+
+    def timing_table(self, column='wall_time'):
+        """
+        Table with the time (or any other column of the records) spent per run (rows) and stage (columns).
+        Stages called several times in a run are summed.
+
+        Parameters
+        ----------
+        column: str
+            column of the records, e.g. wall_time, cpu_time or peak_memory
+
+        Returns
+        -------
+        table: df
+        """
+        records = self.to_dataframe()
+        records['run'] = records['run'].fillna('')
+        return records.pivot_table(index='run', columns='stage', values=column, aggfunc='sum')
+
+    def to_chrome_trace(self, filename):
+        """
+        Writes the records as a Chrome trace file (json), which can be opened with chrome://tracing or Perfetto.
+
+        Parameters
+        ----------
+        filename: str
+            name of the file
+        """
+        write_chrome_trace(filename, self.records)
+
+
+class _Run:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.previous = self.profiler.current_run
+        self.profiler.current_run = self.name
+        return self.profiler
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.current_run = self.previous
+
+
+class _Stage:
+    """
+    Stage of the processing, used as decorator or as context manager (see profile_stage).
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        profiler = _active_profiler
+        if profiler is None:
+            self._profiler = None
+            return {}
+        self._profiler = profiler
+        self._record = profiler._start_stage(self.name)
+        return self._record
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._profiler is not None:
+            self._profiler._end_stage(self._record)
+            self._profiler = self._record = None
+
+    def __call__(self, function):
+        name = self.name or function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = _active_profiler
+            if profiler is None:
+                return function(*args, **kwargs)
+
+            record = profiler._start_stage(name)
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                profiler._end_stage(record)
+            record['rows'] = _count_rows(result, args)
+            return result
+
+        return wrapper
+
+
+def profile_stage(name=None):
+    """
+    Profiles a stage of the processing, when a Profiler is active (see Profiler).
+    It can be used as a decorator (the name defaults to the function name, the rows are taken from the
+    dataframe returned, or the first one given) or as a context manager (the record is returned,
+    and the rows can be set in it).
+
+    Parameters
+    ----------
+    name: str
+        name of the stage
+
+    Examples
+    ---------
+    >>> @profile_stage()
+    ... def read_blob_file(filename):
+    ...     ...
+    >>> with profile_stage('write_results') as record:
+    ...     save_results_yields(results_df, filename)
+    ...     record['rows'] = len(results_df)
+    """
+    # used as @profile_stage without parentheses
+    if callable(name):
+        return _Stage(None)(name)
+    return _Stage(name)
+
+
+def write_chrome_trace(filename, records):
+    """
+    Writes stages records (see Profiler) as a Chrome trace file, with one complete event per stage.
+    The records can come from several processes (e.g. the runs of process_campaign).
+
+    Parameters
+    ----------
+    filename: str
+        name of the file
+    records: list of dicts
+        records of the stages
+    """
+    origin = min((record['start'] for record in records), default=0)
+    events = []
+    for record in records:
+        args = {key: record[key] for key in ('run', 'rows', 'cpu_time', 'peak_memory')
+                if record.get(key) is not None}
+        events.append({'name': record['stage'], 'cat': 'micropyro', 'ph': 'X',
+                       'ts': (record['start'] - origin) * 1e6, 'dur': record['wall_time'] * 1e6,
+                       'pid': record['pid'], 'tid': record['thread'], 'args': args})
+
+    with open(filename, 'w') as fp:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, fp)
+
+
+def _count_rows(result, args):
+    for candidate in (result, *args[:1]):
+        shape = getattr(candidate, 'shape', None)
+        if shape:
+            return shape[0]
+    return None
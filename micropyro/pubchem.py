@@ -0,0 +1,346 @@
+import asyncio
+import json
+import ssl
+import time
+from urllib.parse import quote, urlsplit
+
+from ._http import keep_alive, read_response, write_request
+from .logs import get_logger
+from .utilities import write_json
+
+PUBCHEM_URL = 'https://pubchem.ncbi.nlm.nih.gov/rest/pug'
+# PubChem asks for at most 5 requests per second
+PUBCHEM_RATE_LIMIT = 5.
+# throttled (PubChem answers 503 when busy)
+RETRY_STATUSES = (429, 503)
+
+_logger = get_logger(__name__)
+
+
+class PubChemError(Exception):
+    """
+    Error of the PubChem service (other than compound not found), after the retries.
+    """
+
+
+class PubChemCache:
+    """
+    A class used to keep the properties retrieved from PubChem in a json file, so that each compound is only
+    requested once, also between sessions. The compounds not found are kept as well (as null).
+    ...
+
+    Attributes
+    ----------
+    filename : str
+        name of the json file
+
+    Methods
+    -------
+    get(self, name, default=None)
+        Properties of the compound (None if not found), or default if it is not in the cache
+    set(self, name, properties)
+        Adds the properties of a compound
+    save(self)
+        Writes the cache to the file, if it changed
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        try:
+            with open(filename, 'r') as fp:
+                self._data = json.load(fp)
+        except FileNotFoundError:
+            self._data = {}
+        self._modified = False
+
+    def __contains__(self, name):
+        return _cache_key(name) in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, name, default=None):
+        """
+        :param name: str
+                name of the compound
+        :param default:
+                returned if the compound is not in the cache
+        :return: dict or None
+                properties of the compound, None if it was not found in PubChem.
+        """
+        return self._data.get(_cache_key(name), default)
+
+    def set(self, name, properties):
+        """
+        :param name: str
+                name of the compound
+        :param properties: dict or None
+                properties of the compound, None if it was not found.
+        """
+        self._data[_cache_key(name)] = properties
+        self._modified = True
+
+    def save(self):
+        """
+        Writes the cache to the file (atomically), if it changed.
+        """
+        if self._modified:
+            write_json(self.filename, self._data)
+            self._modified = False
+
+
+def _cache_key(name):
+    return name.strip().lower()
+
+
+class PubChemClient:
+    """
+    A class used to retrieve the properties (formula, MW and smiles) of compounds from the PubChem REST API
+    with asyncio. The connections are kept alive and reused (up to max_connections at the same time),
+    the requests are spaced to respect the rate limit of the service, and the throttled (429 and 503) or failed
+    requests are retried with exponential backoff. Each compound needs a single request.
+    Cancelling a task (or the whole get_many) closes the connections in use, the client can still be used after.
+    ...
+
+    Attributes
+    ----------
+    base_url : str
+        url of the PUG REST API
+    cache : PubChemCache
+        cache of the properties, if any
+
+    Methods
+    -------
+    get_properties(self, name)
+        Properties of a compound (coroutine)
+    get_many(self, names, callback=None)
+        Properties of many compounds, requested concurrently (coroutine)
+    close(self)
+        Closes the connections and saves the cache (coroutine)
+
+    Examples
+    ---------
+    >>> async with mp.PubChemClient(cache=mp.PubChemCache('pubchem_cache.json')) as client:
+    ...     properties = await client.get_many(['phenol', 'toluene'])
+    >>> properties['phenol']['formula']
+    'C6H6O'
+    """
+
+    def __init__(self, base_url=PUBCHEM_URL, max_connections=5, rate_limit=PUBCHEM_RATE_LIMIT, max_retries=5,
+                 backoff=0.5, max_backoff=30., timeout=30., cache=None):
+        """
+        :param base_url: str
+                url of the PUG REST API
+        :param max_connections: int
+                maximum number of connections (and of requests at the same time)
+        :param rate_limit: float
+                maximum number of requests per second, None for no limit
+        :param max_retries: int
+                number of retries of a throttled or failed request
+        :param backoff: float
+                wait (s) before the first retry, doubled for each retry (unless the service gives a Retry-After)
+        :param max_backoff: float
+                maximum wait (s) between retries
+        :param timeout: float
+                timeout (s) of each request
+        :param cache: PubChemCache
+                cache of the properties
+        """
+        self.base_url = base_url.rstrip('/')
+        url = urlsplit(self.base_url)
+        self._host = url.hostname
+        self._port = url.port or (443 if url.scheme == 'https' else 80)
+        self._host_header = url.netloc
+        self._path = url.path
+        self._ssl = ssl.create_default_context() if url.scheme == 'https' else None
+
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.cache = cache
+
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self._idle = []
+        self._interval = 1 / rate_limit if rate_limit else 0.
+        self._next_request = 0.
+        self._rate_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the idle connections and saves the cache.
+        """
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+        if self.cache is not None:
+            self.cache.save()
+
+    async def get_properties(self, name):
+        """
+        Properties of a compound, from the cache or from PubChem (first compound found with the name).
+
+        :param name: str
+                name of the compound
+        :return: dict or None
+                cid, formula, mw and smiles of the compound, None if not found.
+        """
+        if self.cache is not None and name in self.cache:
+            return self.cache.get(name)
+
+        path = (f'/compound/name/{quote(name.strip(), safe="")}'
+                f'/property/MolecularFormula,MolecularWeight,IsomericSMILES/JSON')
+        response = await self._get(path)
+        if response.status == 404:
+            properties = None
+        else:
+            try:
+                properties = _parse_properties(json.loads(response.body))
+            except (ValueError, KeyError, IndexError) as error:
+                raise PubChemError(f'Unexpected response for {name}: {error}')
+
+        if self.cache is not None:
+            self.cache.set(name, properties)
+        return properties
+
+    async def get_many(self, names, callback=None):
+        """
+        Properties of many compounds, requested concurrently.
+
+        :param names: list of str
+                names of the compounds
+        :param callback: function
+                called with the name of each compound once it is done (e.g. to update a progress bar)
+        :return: dict
+                properties of each compound (None if not found)
+        """
+        async def get(name):
+            properties = await self.get_properties(name)
+            if callback is not None:
+                callback(name)
+            return properties
+
+        names = list(dict.fromkeys(names))
+        try:
+            results = await asyncio.gather(*(get(name) for name in names))
+        finally:
+            if self.cache is not None:
+                self.cache.save()
+        return dict(zip(names, results))
+
+    async def _get(self, path):
+        """
+        GET request with the retries, the response is returned for 2xx and 404.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._wait_rate_limit()
+            try:
+                response = await asyncio.wait_for(self._request(f'{self._path}{path}'), self.timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as error:
+                # OSError includes the connection and ssl errors
+                reason, retry_after = f'{type(error).__name__}: {error}', None
+            else:
+                if 200 <= response.status < 300 or response.status == 404:
+                    return response
+                if response.status not in RETRY_STATUSES:
+                    raise PubChemError(f'{response.status} for {path}: {response.body[:200]!r}')
+                reason, retry_after = f'status {response.status}', response.headers.get('retry-after')
+
+            if attempt == self.max_retries:
+                raise PubChemError(f'{reason} for {path}, after {self.max_retries} retries')
+            delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+            try:
+                delay = max(delay, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+            _logger.debug('%s for %s, retrying in %.2f s', reason, path, delay)
+            await asyncio.sleep(delay)
+
+    async def _wait_rate_limit(self):
+        if not self._interval:
+            return
+        async with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request - now
+            self._next_request = max(now, self._next_request) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _request(self, target):
+        async with self._semaphore:
+            reused = bool(self._idle)
+            reader, writer = self._idle.pop() if reused else await self._open()
+            try:
+                response = await self._exchange(reader, writer, target)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # the server closed the idle connection, try once with a new one
+                reader, writer = await self._open()
+                response = await self._exchange(reader, writer, target)
+
+            if keep_alive(response):
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+            return response
+
+    async def _open(self):
+        return await asyncio.open_connection(self._host, self._port, ssl=self._ssl)
+
+    async def _exchange(self, reader, writer, target):
+        # if anything fails (including the cancellation), the connection is in an unknown state and is closed
+        try:
+            await write_request(writer, 'GET', target, self._host_header, {'Accept': 'application/json'})
+            return await read_response(reader)
+        except BaseException:
+            writer.close()
+            raise
+
+
+def _parse_properties(data):
+    properties = data['PropertyTable']['Properties'][0]
+    return {'cid': properties['CID'], 'formula': properties['MolecularFormula'],
+            'mw': float(properties['MolecularWeight']),
+            # recent versions of the API give the isomeric smiles as SMILES
+            'smiles': properties.get('IsomericSMILES', properties.get('SMILES'))}
+
+
+def get_pubchem_properties(names, cache_file=None, callback=None, **kwargs):
+    """
+    Properties (formula, MW and smiles) of many compounds from PubChem (see PubChemClient), from synchronous code.
+
+    Parameters
+    ----------
+    names: list of str
+        names of the compounds
+    cache_file: str
+        json file of the cache (see PubChemCache), if any
+    callback: function
+        called with the name of each compound once it is done
+    kwargs:
+        options of PubChemClient (e.g. max_connections, rate_limit, max_retries)
+
+    Returns
+    -------
+    properties: dict
+        cid, formula, mw and smiles of each compound (None if not found)
+    """
+    cache = PubChemCache(cache_file) if cache_file else None
+
+    async def get_many():
+        async with PubChemClient(cache=cache, **kwargs) as client:
+            return await client.get_many(names, callback=callback)
+
+    return asyncio.run(get_many())
@@ -1,4 +1,7 @@
 import micropyro as mp
+from .logs import get_logger, summarize_names
+
+_logger = get_logger(__name__)
 
 
 def read_yields_excel(filename, sheet_name=0, **kwargs):
@@ -33,7 +36,7 @@ def read_yields_excel(filename, sheet_name=0, **kwargs):
     return data
 
 
-def add_gas_yield_to_totals_json(gas_yield_matrix):
+def add_gas_yield_to_totals_json(gas_yield_matrix, directory=None):
     """
     Add the totals from the gas yields to the json file with the results.
     Adds the total, the different gases, and their elemental composition.
@@ -41,6 +44,8 @@ def add_gas_yield_to_totals_json(gas_yield_matrix):
     Parameters
     ----------
     gas_yield_matrix
+    directory: str or None
+            Directory with the json files. If None, the current working directory is used.
     """
     # we do it for each experiment
     cols_to_remove = ['t py', 'temperature', 't (c)']
@@ -48,18 +53,32 @@ def add_gas_yield_to_totals_json(gas_yield_matrix):
 
     # get all the json files
 
-    for experiment, row in gas_yield_matrix.iterrows():
-        total_gases = row.sum()
+    missing = []
+    with mp.TotalsWriter() as writer:
+        for experiment, row in gas_yield_matrix.iterrows():
+            total_gases = row.sum()
+
+            atoms_gases = compute_elemental_composition_gases(row)
+
+            dict_data_yields = {'total_gases': total_gases, 'light_gases': dict(row),
+                                'atoms_gases': atoms_gases}
+            filename = mp.get_actual_filename(f'{experiment}.totals.json', directory)
 
-        atoms_gases = compute_elemental_composition_gases(row)
+            if filename is not None:
+                writer.update(filename, dict_data_yields)
+                _logger.debug('Added data to %s', experiment)
+            else:
+                missing.append(experiment)
+    _log_totals_added(len(gas_yield_matrix) - len(missing), missing)
 
-        dict_data_yields = {'total_gases': total_gases, 'light_gases': dict(row),
-                            'atoms_gases': atoms_gases}
-        filename = mp.get_actual_filename(f'{experiment}.totals.json')
 
-        if filename is not None:
-            mp.append_json(filename, dict_data_yields)
-            print(f'Added data to {experiment}')
+def _log_totals_added(n_added, missing):
+    """
+    Logs the number of totals files updated, and the experiments without totals file (a single message).
+    """
+    _logger.info('Added data to %d totals files', n_added)
+    if missing:
+        _logger.warning('%d experiments without totals file: %s', len(missing), summarize_names(missing))
 
 def compute_elemental_composition_gases(row_experiment):
     """
@@ -97,7 +116,7 @@ def compute_elemental_composition_gases(row_experiment):
 
     return yield_atoms
 
-def add_char_yield_to_totals_json(char_yield_matrix, in_percent=True):
+def add_char_yield_to_totals_json(char_yield_matrix, in_percent=True, directory=None):
     """
     Add the char yield to the json file with the results.
 
@@ -106,6 +125,8 @@ def add_char_yield_to_totals_json(char_yield_matrix, in_percent=True):
     char_yield_matrix: pandas.df
             Char matrix read using the class :meth:`micropyro.ReadExperimentTable`
     in_percent
+    directory: str or None
+            Directory with the json files. If None, the current working directory is used.
     """
     # we do it for each experiment
     cols_to_remove = ['t py', 'temperature', 't (c)']
@@ -118,10 +139,15 @@ def add_char_yield_to_totals_json(char_yield_matrix, in_percent=True):
         to_percent = 1
 
     # get all the json files
-    for experiment, row in char_yield_matrix.iterrows():
-        dict_data_yields = {'char_yield': row['% char']*to_percent}
-        filename = mp.get_actual_filename(f'{experiment}.totals.json')
-
-        if filename is not None:
-            mp.append_json(filename, dict_data_yields)
-            print(f'Added data to {experiment}')
\ No newline at end of file
+    missing = []
+    with mp.TotalsWriter() as writer:
+        for experiment, row in char_yield_matrix.iterrows():
+            dict_data_yields = {'char_yield': row['% char']*to_percent}
+            filename = mp.get_actual_filename(f'{experiment}.totals.json', directory)
+
+            if filename is not None:
+                writer.update(filename, dict_data_yields)
+                _logger.debug('Added data to %s', experiment)
+            else:
+                missing.append(experiment)
+    _log_totals_added(len(char_yield_matrix) - len(missing), missing)
@@ -1,9 +1,14 @@
+import os
 import re
+import tempfile
 
 import pandas as pd
 import numpy as np
 import pkg_resources
 
+from .vocabulary import CompoundVocabulary
+
+
 class ReadDatabase:
     """
     A class used to read df for micropyrolysis computations.
@@ -20,6 +25,8 @@ class ReadDatabase:
         a pandas dataframe with the actual df
     atoms : tuple. Class attribute.
         atoms to be studied
+    vocabulary : CompoundVocabulary
+        integer ids of the compounds of the database, shared by all the runs (built the first time it is used)
 
 
     Methods
@@ -30,6 +37,8 @@ class ReadDatabase:
         Class method to load a csv file.
     from_internal(cls)
         Class method to load an internal database located in "package_folder"/data/Database_micropyro.csv.
+    compact(self, memmap=None)
+        Converts the df to compact dtypes, optionally memory-mapping the numeric block.
     process_chon(self)
         Retrieves the number of carbons, hydrogen, oxygen and nitrogen for the different compounds in the df.
     process_ecn_mrf(self)
@@ -46,7 +55,7 @@ class ReadDatabase:
 
     atoms = ('c', 'h', 'o', 'n')  # This could be extended if needed
 
-    def __init__(self, database=None):
+    def __init__(self, database=None, compact=False, memmap=None):
         if database is None:
             self.df = pd.DataFrame()
         else:
@@ -67,47 +76,82 @@ class ReadDatabase:
 
         self.process_chon()
         self.process_ecn_mrf()
+        self._vocabulary = None
+
+        if compact or memmap:
+            self.compact(memmap)
+
+    def compact(self, memmap=None):
+        """
+        Converts the df to compact dtypes, to keep several databases loaded at once (see compact_database_df):
+        int16 atoms and ecn, float32 mw and mrf (if they do not lose precision), and categorical groupings.
+
+        :param memmap: str
+                If given, the numeric block is saved to this file and memory-mapped (read only).
+        """
+        self.df = compact_database_df(self.df, memmap)
+
+    @property
+    def vocabulary(self):
+        """
+        Vocabulary of the compounds of the database (see CompoundVocabulary), shared by all the runs.
+        """
+        if self._vocabulary is None:
+            self._vocabulary = CompoundVocabulary.from_database(self.df)
+        return self._vocabulary
 
     @classmethod
-    def from_xls(cls, filename, **kwargs):
+    def from_xls(cls, filename, compact=False, memmap=None, **kwargs):
         """
         This class method builds the df from an excel file.
         Should contain Compound as first column. Remaining columns should be MW, Formula, N_Benz, and any grouping.
         These columns do not have to be in any specific order, but to respect the name.
         :param filename: str
                 filename (with path if needed) to the df file.
+        :param compact: bool
+                use compact dtypes (see compact)
+        :param memmap: str
+                file to memory-map the numeric block (see compact)
         :return: constructor for the class.
         """
         database = pd.read_excel(filename, index_col=0,
                                  converters={'MW': float},
                                  **kwargs)  # reads the file and sets the first column as index
-        return cls(database)
+        return cls(database, compact=compact, memmap=memmap)
 
     @classmethod
-    def from_csv(cls, filename, **kwargs):
+    def from_csv(cls, filename, compact=False, memmap=None, **kwargs):
         """
         This class method builds the df from a csv file.
         Should contain Compound as first column. Remaining columns should be MW, Formula, N_Benz, and any grouping.
         These columns do not have to be in any specific order, but to respect the name.
         :param filename:
+        :param compact: bool
+                use compact dtypes (see compact)
+        :param memmap: str
+                file to memory-map the numeric block (see compact)
         :return: constructor for the class.
         """
         database = pd.read_csv(filename, index_col=0,
                                  converters={'MW': float},
                                  **kwargs)  # reads the file and sets the first column as index
-        return cls(database)
+        return cls(database, compact=compact, memmap=memmap)
 
     @classmethod
-    def from_internal(cls):
+    def from_internal(cls, compact=False, memmap=None):
         """
         This class method builds the df from the internal database.
+        :param compact: bool
+                use compact dtypes (see compact)
+        :param memmap: str
+                file to memory-map the numeric block (see compact)
         :return: constructor for the class.
         """
         DATA_PATH = pkg_resources.resource_filename('micropyro', 'databases/Database_micropyro.csv')
 
         database = pd.read_csv(DATA_PATH, index_col=0,
                                  converters={'MW': float})  # reads the file and sets the first column as index
-        return cls(database)
+        return cls(database, compact=compact, memmap=memmap)
 
 
     def process_chon(self):
@@ -189,3 +233,113 @@ class ReadDatabase:
         except IndexError:
             num_atoms = 0
         return num_atoms
+
+
+# columns converted to the smallest integer type (int16 if possible) and to float32 by compact_database_df
+_INTEGER_COLUMNS = (*ReadDatabase.atoms, 'ecn', 'n_benz')
+_FLOAT_COLUMNS = ('mw', 'mrf')
+
+
+def compact_database_df(database_df, memmap=None, rtol=1e-6):
+    """
+    Converts a database dataframe (see ReadDatabase) to compact dtypes:
+
+    - atoms (c, h, o, n), ecn and n_benz to int16, if they are integers within the range,
+    - mw and mrf to float32, if the relative error of the conversion is below rtol,
+    - the grouping columns (starting with group) to categorical.
+
+    The columns that cannot be converted safely are left untouched.
+    If memmap is given, the numeric columns converted are saved to this file and memory-mapped (read only),
+    so they are not in the memory of the process, and are shared by the processes using the same file.
+
+    Parameters
+    ----------
+    database_df: df
+        database dataframe
+    memmap: str
+        file for the numeric block
+    rtol: float
+        maximum relative error allowed to use float32
+
+    Returns
+    ----------
+    database_df: df
+        new dataframe with the compact dtypes
+    """
+    columns = {}
+    for column in database_df.columns:
+        values = database_df[column]
+        if column in _INTEGER_COLUMNS:
+            values = _downcast_integer(values)
+        elif column in _FLOAT_COLUMNS:
+            values = _downcast_float(values, rtol)
+        elif column.startswith('group'):
+            values = values.astype('category')
+        columns[column] = values
+
+    numeric = [column for column in database_df.columns
+               if columns[column].dtype != database_df[column].dtype and columns[column].dtype.kind in 'if']
+    if memmap and numeric:
+        arrays = _memmap_columns(memmap, {column: columns[column].to_numpy() for column in numeric})
+        for column in numeric:
+            columns[column] = pd.Series(arrays[column], index=database_df.index, name=column, copy=False)
+
+    return pd.concat(columns, axis=1, copy=False)
+
+
+def _downcast_integer(values):
+    """
+    int16 values, only if they are all integers within its range.
+    """
+    array = values.to_numpy()
+    if array.dtype.kind not in 'iuf' or not np.isfinite(array).all() or (array != np.round(array)).any():
+        return values
+    info = np.iinfo(np.int16)
+    if array.size and (array.min() < info.min or array.max() > info.max):
+        return values
+    return values.astype(np.int16)
+
+
+def _downcast_float(values, rtol):
+    """
+    float32 values, only if the relative error of the conversion is below rtol.
+    """
+    array = values.to_numpy()
+    if array.dtype.kind != 'f':
+        return values
+    array32 = array.astype(np.float32)
+    with np.errstate(over='ignore', invalid='ignore'):
+        safe = np.allclose(array32, array, rtol=rtol, atol=0, equal_nan=True)
+    return values.astype(np.float32) if safe else values
+
+
+def _memmap_columns(filename, arrays):
+    """
+    Saves the arrays contiguously to a file (the largest items first, to keep them aligned),
+    and maps them again read only.
+    The file is written to a temporary file in the same directory and renamed (as in write_json), so the
+    processes that already mapped the previous file keep reading it untouched.
+    """
+    names = sorted(arrays, key=lambda name: -arrays[name].dtype.itemsize)
+    offsets = np.cumsum([0] + [arrays[name].nbytes for name in names])
+
+    directory, basename = os.path.split(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(prefix=f'.{basename}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            for name in names:
+                fp.write(np.ascontiguousarray(arrays[name]).tobytes())
+            if not offsets[-1]:
+                # an empty file cannot be mapped
+                fp.write(b'\0')
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.chmod(tmp_filename, 0o644)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.remove(tmp_filename)
+        raise
+
+    block = np.memmap(filename, dtype=np.uint8, mode='r', shape=(max(int(offsets[-1]), 1),))
+    return {name: block[start:end].view(arrays[name].dtype)
+            for name, start, end in zip(names, offsets[:-1], offsets[1:])}
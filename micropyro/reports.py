@@ -0,0 +1,131 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .blob_file import read_blob_file
+from .postprocessing_tools_single_file import plot_n_highest_yields
+
+
+def render_figure(plot_function, filename, *args, figsize=None, **kwargs):
+    """
+    Renders a figure to a file without using pyplot (no global state, no interactive backend).
+    The figure is created with the object-oriented API on an Agg canvas, the plot function draws on its axis,
+    and the figure is cleared once saved, so nothing is kept in memory.
+
+    Parameters
+    ----------
+    plot_function: callable
+            Any of the plotting functions accepting an ax keyword (plot_n_highest_yields, compare_yields,
+            plot_ranges_MW, plot_total_globals, etc.)
+    filename: str
+            Name of the output file (the format is given by the extension, png, pdf, etc.)
+    args:
+            Arguments of the plot function
+    figsize: tuple
+            Size of the figure in inches
+    kwargs:
+            Keyword arguments of the plot function
+
+    Returns
+    ----------
+    filename: str
+            Name of the output file
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    try:
+        plot_function(*args, ax=ax, **kwargs)
+        fig.savefig(filename, bbox_inches='tight')
+    finally:
+        fig.clear()
+
+    return filename
+
+
+def render_reports(tasks, n_jobs=1):
+    """
+    Renders several figures, in parallel over a pool of processes.
+    Each task is a tuple (plot_function, filename, args, kwargs), see render_figure.
+    The plot functions and the arguments have to be picklable (i.e. functions defined at module level).
+    For large data, it is better to pass filenames and read them in the plot function, than dataframes.
+
+    Parameters
+    ----------
+    tasks: list of tuples
+            (plot_function, filename, args, kwargs) for each figure
+    n_jobs: int
+            number of processes. If 1, everything is rendered in the current process.
+
+    Returns
+    ----------
+    filenames: list of str
+            Names of the output files
+    """
+    if n_jobs == 1:
+        return [_render_task(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        return list(executor.map(_render_task, tasks, chunksize=max(1, len(tasks) // (4 * n_jobs))))
+
+
+def _render_task(task):
+    plot_function, filename, args, kwargs = task
+    return render_figure(plot_function, filename, *args, **kwargs)
+
+
+def plot_n_highest_yields_file(results_file, ncompounds, ax=None):
+    """
+    Reads a results file (see save_results_yields) and plots the n compounds with the highest mrf yield.
+    Used to render the per-run figures without sending the dataframes to the processes.
+
+    Parameters
+    ----------
+    results_file: str
+            Results file of a run
+    ncompounds: int
+            Number of compounds to be plotted
+    ax: matplotlib axis
+            axis where to plot.
+    """
+    results_df = read_blob_file(results_file, index_col=0)
+    return plot_n_highest_yields(results_df, ncompounds, ax=ax)
+
+
+def render_top_yields_reports(results_files, ncompounds, output_dir='.', fmt='png', n_jobs=1, figsize=None):
+    """
+    Renders the figures with the n compounds with the highest yield for many runs, over a pool of processes.
+    Each figure is named as the results file, replacing .results.csv by .top{ncompounds}.{fmt}.
+
+    Parameters
+    ----------
+    results_files: list of str
+            Results files of the runs
+    ncompounds: int
+            Number of compounds to be plotted
+    output_dir: str
+            Directory where to save the figures
+    fmt: str
+            Format of the figures (png, pdf, etc)
+    n_jobs: int
+            number of processes
+    figsize: tuple
+            Size of the figures in inches
+
+    Returns
+    ----------
+    filenames: list of str
+            Names of the output files
+    """
+    tasks = []
+    for results_file in results_files:
+        run_name = os.path.basename(results_file)
+        if run_name.endswith('.results.csv'):
+            run_name = run_name[:-len('.results.csv')]
+        filename = os.path.join(output_dir, f'{run_name}.top{ncompounds}.{fmt}')
+        tasks.append((plot_n_highest_yields_file, filename, (results_file, ncompounds), {'figsize': figsize}))
+
+    return render_reports(tasks, n_jobs=n_jobs)
@@ -0,0 +1,237 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .utilities import write_json
+from .vocabulary import CompoundVocabulary
+
+METADATA_FILENAME = 'metadata.json'
+
+
+class ResultsStore:
+    """
+    A class used to store the results (yields) of many runs in a directory, as fixed-width columns in binary files
+    that are memory-mapped when read, so campaigns with tens of millions of (run, compound) rows do not need to
+    fit in memory. The store is append-only: the results of each run (from compute_yields) are added at the end.
+    A small json sidecar keeps the number of rows, the rows of each run, and the names of the compounds
+    (the compound ids are codes of a CompoundVocabulary).
+    ...
+
+    Attributes
+    ----------
+    directory : str
+        directory of the store
+    vocabulary : CompoundVocabulary
+        names of the compounds, the compound ids are their codes
+    columns : dict. Class attribute.
+        for each column of the store, dtype and column of the results of compute_yields
+
+    Methods
+    -------
+    append(self, run_name, results_df)
+        Adds the results of a run
+    column(self, name)
+        Read-only view (memory map) of a column for all the rows
+    run(self, run_name)
+        Results of a run, as given by compute_yields
+    sum_by_run(self, column='yield')
+        Sum of a column for each run
+    to_frame(self, runs=None, database_df=None, database_columns=None)
+        Long-format table of some (or all) the runs, to be used with the post-processing functions
+
+    Examples
+    ---------
+    >>> store = mp.ResultsStore('campaign_store', vocabulary=database.vocabulary)
+    >>> store.append('100 ug Py_600C', results_df)
+    >>> store.sum_by_run('yield')
+    >>> results = store.to_frame(database_df=database.df, database_columns=['group'])
+    >>> mp.top_n_yields(results, 10)
+    """
+
+    columns = {'run_id': (np.int32, None),
+               'compound_id': (np.int32, None),
+               'volume': (np.float64, 'volume'),
+               'moles': (np.float64, 'moles mrf'),
+               'mass': (np.float64, 'mass mrf'),
+               'yield': (np.float64, 'yield mrf')}
+
+    def __init__(self, directory, vocabulary=None):
+        """
+        Opens the store in the directory, or creates a new one if it does not exist.
+
+        :param directory: str
+                directory of the store
+        :param vocabulary: CompoundVocabulary
+                names of the compounds used for a new store (e.g. ReadDatabase.vocabulary).
+                The compounds of an existing store are always kept (and new ones are added at the end).
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self._metadata_filename = os.path.join(directory, METADATA_FILENAME)
+        try:
+            with open(self._metadata_filename, 'r') as fp:
+                metadata = json.load(fp)
+        except FileNotFoundError:
+            compounds = list(vocabulary.names) if vocabulary is not None else []
+            metadata = {'n_rows': 0, 'runs': {}, 'compounds': compounds}
+
+        self.n_rows = metadata['n_rows']
+        self._runs = {name: tuple(rows) for name, rows in metadata['runs'].items()}
+        self.vocabulary = CompoundVocabulary(metadata['compounds'])
+        self._views = {}
+
+    def __len__(self):
+        return self.n_rows
+
+    def __repr__(self):
+        return f'ResultsStore({self.directory!r}, {len(self._runs)} runs, {self.n_rows} rows)'
+
+    @property
+    def run_names(self):
+        """
+        Names of the runs, in the order they were added (the run id is the position).
+        """
+        return list(self._runs)
+
+    def _filename(self, name):
+        return os.path.join(self.directory, f'{name}.bin')
+
+    def append(self, run_name, results_df):
+        """
+        Adds the results of a run at the end of the store. The data is written before the sidecar,
+        so if the process stops in between, the run is not in the store (and the extra rows are overwritten).
+
+        :param run_name: str
+                name of the run (should be unique)
+        :param results_df: df
+                results of the run (from compute_yields), with the compounds as index and the columns
+                volume, moles mrf, mass mrf and yield mrf (missing ones are stored as nan).
+        """
+        if run_name in self._runs:
+            raise ValueError(f'Run "{run_name}" already in the store')
+
+        n_rows = len(results_df)
+        data = {'run_id': np.full(n_rows, len(self._runs), dtype=np.int32),
+                'compound_id': self.vocabulary.encode(results_df.index, add=True)}
+        for name, (dtype, results_column) in self.columns.items():
+            if results_column is None:
+                continue
+            if results_column in results_df.columns:
+                data[name] = pd.to_numeric(results_df[results_column], errors='coerce').to_numpy(dtype=dtype)
+            else:
+                data[name] = np.full(n_rows, np.nan, dtype=dtype)
+
+        for name, (dtype, _) in self.columns.items():
+            filename = self._filename(name)
+            with open(filename, 'ab') as fp:
+                # drop the rows of an append that did not finish
+                fp.truncate(self.n_rows * np.dtype(dtype).itemsize)
+                fp.write(data[name].tobytes())
+
+        self._runs[run_name] = (self.n_rows, self.n_rows + n_rows)
+        self.n_rows += n_rows
+        self._write_metadata()
+        self._views = {}
+
+    def _write_metadata(self):
+        metadata = {'n_rows': self.n_rows, 'runs': {name: list(rows) for name, rows in self._runs.items()},
+                    'columns': {name: np.dtype(dtype).str for name, (dtype, _) in self.columns.items()},
+                    'compounds': list(self.vocabulary.names)}
+        write_json(self._metadata_filename, metadata, compact=True)
+
+    def column(self, name):
+        """
+        Read-only view of a column for all the rows, mapped from its file (no copy).
+
+        :param name: str
+                run_id, compound_id, volume, moles, mass or yield
+        :return: np.array
+        """
+        if name not in self._views:
+            dtype = self.columns[name][0]
+            if self.n_rows:
+                self._views[name] = np.memmap(self._filename(name), dtype=dtype, mode='r', shape=(self.n_rows,))
+            else:
+                self._views[name] = np.empty(0, dtype=dtype)
+        return self._views[name]
+
+    def run_rows(self, run_name):
+        """
+        Rows of a run in the store.
+
+        :param run_name: str
+        :return: slice
+        """
+        try:
+            start, stop = self._runs[run_name]
+        except KeyError:
+            raise KeyError(f'Run "{run_name}" not found in the store')
+        return slice(start, stop)
+
+    def run(self, run_name):
+        """
+        Results of a run, with the compounds as index and the columns of compute_yields.
+
+        :param run_name: str
+        :return: df
+        """
+        rows = self.run_rows(run_name)
+        data = {results_column: self.column(name)[rows] for name, (_, results_column) in self.columns.items()
+                if results_column is not None}
+        return pd.DataFrame(data, index=self.vocabulary.decode(self.column('compound_id')[rows]))
+
+    def sum_by_run(self, column='yield'):
+        """
+        Sum of a column for each run, computed on the memory-mapped columns.
+
+        :param column: str
+                volume, moles, mass or yield
+        :return: pd.Series
+                indexed by the name of the runs
+        """
+        values = self.column(column)
+        sums = np.bincount(self.column('run_id'), weights=np.nan_to_num(values), minlength=len(self._runs))
+        return pd.Series(sums, index=pd.Index(self.run_names, name='experiment'), name=column)
+
+    def to_frame(self, runs=None, database_df=None, database_columns=None):
+        """
+        Long-format table (see concat_results) of some or all the runs, with the columns experiment and
+        compound (categoricals) and the columns of compute_yields. Columns of the database (e.g. groupings, mw,
+        atoms) can be added, so that the table can be used with the post-processing functions
+        (top_n_yields, get_yields_summary_runs, etc).
+
+        :param runs: list of str
+                names of the runs. If not given, all the runs.
+        :param database_df: df
+                database (ReadDatabase.df)
+        :param database_columns: list of str
+                columns of the database to add
+        :return: df
+        """
+        if runs is None:
+            rows = np.arange(self.n_rows)
+        else:
+            rows = np.concatenate([np.arange(*self._runs[run]) for run in runs] or [np.array([], dtype=int)])
+        rows = rows.astype(np.intp)
+
+        run_names = pd.Index(self.run_names)
+        results = pd.DataFrame({
+            'experiment': pd.Categorical.from_codes(self.column('run_id')[rows], categories=run_names),
+            'compound': pd.Categorical.from_codes(self.column('compound_id')[rows], dtype=self.vocabulary.dtype)})
+        for name, (_, results_column) in self.columns.items():
+            if results_column is not None:
+                results[results_column] = self.column(name)[rows]
+
+        if database_columns:
+            # row of the database of each compound of the vocabulary (-1 if not found)
+            database_df = database_df[~database_df.index.duplicated()]
+            database_rows = database_df.index.get_indexer(self.vocabulary.names)
+            positions = database_rows[self.column('compound_id')[rows]]
+            found = positions >= 0
+            for column in database_columns:
+                values = database_df[column].iloc[np.where(found, positions, 0)].to_numpy()
+                results[column] = pd.Series(values).where(found).to_numpy() if len(values) else values
+        return results
@@ -0,0 +1,261 @@
+"""
+Local HTTP service to compute yields, keeping the databases and calibrations loaded in memory.
+The instruments (or any client) send the blob table (csv) and the row of the experimental matrix,
+and get back the yields and the totals. The requests are handled concurrently, and the computations are done
+in a pool of processes, where the databases are loaded once.
+
+Examples
+---------
+    $ micropyro serve --port 8000 --database internal --database mine=database.csv \\
+        --calibration phenol=calibration.json
+
+    POST /yields
+    {"blob_csv": "<content of the blob table>",
+     "experiment": {"Filename": "100 ug Py_600C", "T (C)": 600, "Sample (mg)": 0.1, "IS (mg)": 0.32},
+     "database": "internal", "internal_standard": "fluoranthene", "concentration": 0.03, "grouping": "group"}
+"""
+import asyncio
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from ._http import HTTPError, keep_alive, read_json, read_request, write_json_response
+from .blob_file import perform_matching_database, read_blob_file
+from .compute_yields import compute_yields_calibration, compute_yields_is
+from .experimental_matrix import ReadExperimentTable
+from .logs import get_logger
+from .postprocessing_tools_single_file import get_yields_summary
+from .read_database import ReadDatabase
+
+_logger = get_logger(__name__)
+
+MAX_BODY_SIZE = 64 * 2 ** 20
+
+
+class YieldService:
+    """
+    A class used to serve the computation of yields over HTTP (asyncio, standard library only).
+    ...
+
+    Attributes
+    ----------
+    databases : dict
+        prepared databases (ReadDatabase) by name
+    calibrations : dict
+        content of the calibration files by name
+    n_jobs : int
+        number of processes of the pool where the yields are computed
+    host, port : str, int
+        address of the server (the port is the actual one once started, also if 0 was given)
+
+    Methods
+    -------
+    start(self)
+        Starts the server (coroutine)
+    serve_forever(self)
+        Starts the server and serves until cancelled (coroutine)
+    close(self)
+        Stops the server and the pool (coroutine)
+
+    Endpoints
+    ---------
+    GET /health
+        names of the databases and calibrations loaded
+    POST /yields
+        json with blob_csv (content of the blob table), experiment (row of the experimental matrix, as in the
+        files, e.g. {"Filename": ..., "T (C)": ..., "Sample (mg)": ..., "IS (mg)": ...}), database (name, default
+        internal), and internal_standard and concentration (default 1), or calibration (name), reference and drop.
+        Optional grouping for the totals. Returns the yields (per compound), totals and report (MatchReport).
+    """
+
+    def __init__(self, databases=None, calibrations=None, n_jobs=1, host='127.0.0.1', port=8000,
+                 max_body_size=MAX_BODY_SIZE):
+        """
+        :param databases: dict
+                ReadDatabase (or dataframes) by name. If not given, the internal database is loaded as "internal".
+        :param calibrations: dict
+                calibration files (json, see ExternalCalibration) by name.
+        :param n_jobs: int
+                number of processes to compute the yields.
+        :param host: str
+        :param port: int
+                0 to use any free port.
+        :param max_body_size: int
+                maximum size of the requests (bytes).
+        """
+        if databases is None:
+            databases = {'internal': ReadDatabase.from_internal()}
+        self.databases = databases
+        self.calibrations = {}
+        for name, filename in (calibrations or {}).items():
+            with open(filename, 'r') as fp:
+                self.calibrations[name] = json.load(fp)
+
+        self.n_jobs = n_jobs
+        self.host = host
+        self.port = port
+        self.max_body_size = max_body_size
+        self._server = None
+        self._executor = None
+
+    async def start(self):
+        """
+        Starts the pool of processes (with the databases) and the server.
+        """
+        database_dfs = {name: getattr(database, 'df', database) for name, database in self.databases.items()}
+        self._executor = ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                             initargs=(database_dfs, self.calibrations))
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        _logger.info('Serving on %s:%d', self.host, self.port)
+        return self
+
+    async def serve_forever(self):
+        """
+        Starts the server and serves until cancelled.
+        """
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """
+        Stops the server and the pool of processes.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader, self.max_body_size)
+                except HTTPError as error:
+                    # the rest of the stream cannot be trusted, the connection is closed
+                    await write_json_response(writer, error.status, {'error': str(error)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                try:
+                    status, data = await self._dispatch(request)
+                except HTTPError as error:
+                    status, data = error.status, {'error': str(error)}
+                except Exception as error:
+                    _logger.exception('Request to %s failed', request.path)
+                    status, data = 500, {'error': f'{type(error).__name__}: {error}'}
+                await write_json_response(writer, status, data, keep_alive=keep_alive(request))
+                if not keep_alive(request):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request):
+        if request.path == '/health':
+            if request.method != 'GET':
+                raise HTTPError(405)
+            return 200, {'status': 'ok', 'databases': list(self.databases),
+                         'calibrations': list(self.calibrations)}
+
+        if request.path == '/yields':
+            if request.method != 'POST':
+                raise HTTPError(405)
+            payload = read_json(request)
+            self._check_payload(payload)
+            loop = asyncio.get_running_loop()
+            try:
+                return 200, await loop.run_in_executor(self._executor, _compute_yields_request, payload)
+            except (KeyError, ValueError, FileNotFoundError) as error:
+                return 422, {'error': f'{type(error).__name__}: {error}'}
+            except Exception as error:
+                # e.g. a blob table that cannot be read, the client still gets an answer
+                _logger.exception('Request to /yields failed')
+                return 500, {'error': f'{type(error).__name__}: {error}'}
+
+        raise HTTPError(404)
+
+    def _check_payload(self, payload):
+        if not isinstance(payload, dict):
+            raise HTTPError(400, 'The body should be a json object')
+        for key in ('blob_csv', 'experiment'):
+            if key not in payload:
+                raise HTTPError(400, f'Missing "{key}"')
+        if payload.get('database', 'internal') not in self.databases:
+            raise HTTPError(400, f'Unknown database "{payload.get("database", "internal")}"')
+        if 'calibration' in payload:
+            if payload['calibration'] not in self.calibrations:
+                raise HTTPError(400, f'Unknown calibration "{payload["calibration"]}"')
+            if 'reference' not in payload:
+                raise HTTPError(400, 'Missing "reference" (with "calibration")')
+        elif 'internal_standard' not in payload:
+            raise HTTPError(400, 'Missing "internal_standard" or "calibration"')
+
+
+def serve(databases=None, calibrations=None, n_jobs=1, host='127.0.0.1', port=8000):
+    """
+    Runs the service (see YieldService) until interrupted.
+    """
+    service = YieldService(databases, calibrations, n_jobs=n_jobs, host=host, port=port)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+# databases and calibrations of the worker processes, set once by the initializer
+_worker_databases = {}
+_worker_calibrations = {}
+
+
+def _init_worker(database_dfs, calibrations):
+    global _worker_databases, _worker_calibrations
+    _worker_databases = database_dfs
+    _worker_calibrations = calibrations
+
+
+def _compute_yields_request(payload):
+    """
+    Computes the yields and totals of a request (in a worker process).
+    """
+    database_df = _worker_databases[payload.get('database', 'internal')]
+    grouping = payload.get('grouping')
+    extra_columns = [column for column in (grouping, *ReadDatabase.atoms)
+                     if column is not None and column in database_df.columns]
+
+    experiment = dict(payload['experiment'])
+    experiment.setdefault('Filename', 'run')
+    use_is = 'calibration' not in payload
+    experiment_table = ReadExperimentTable.from_dict([experiment], use_is=use_is)
+    if use_is:
+        experiment_table.compute_is_amount(payload.get('concentration', 1))
+    experiment_name, experiment_row = next(experiment_table.df.iterrows())
+
+    blob_df = read_blob_file(io.StringIO(payload['blob_csv']))
+    report = perform_matching_database(blob_df, database_df, extra_columns=extra_columns, run=experiment_name)
+    if use_is:
+        results_df = compute_yields_is(experiment_row, blob_df, payload['internal_standard'], report=report,
+                                       run=experiment_name)
+    else:
+        results_df = compute_yields_calibration(experiment_row, blob_df, payload['reference'],
+                                                _worker_calibrations[payload['calibration']],
+                                                compounds_drop=payload.get('drop'), report=report,
+                                                run=experiment_name)
+
+    totals = get_yields_summary(results_df, grouping)
+    return {'experiment': experiment_name, 'yields': json.loads(results_df.to_json(orient='index')),
+            'totals': totals, 'report': report.to_dict()}
@@ -0,0 +1,381 @@
+import re
+from collections import deque
+
+from .utilities import get_atom_mw_dict
+
+# atoms that can be written without brackets, and their normal valences (for the implicit hydrogens)
+_VALENCES = {'B': (3,), 'C': (4,), 'N': (3, 5), 'O': (2,), 'P': (3, 5), 'S': (2, 4, 6), 'F': (1,), 'Cl': (1,),
+             'Br': (1,), 'I': (1,)}
+_AROMATIC_ATOMS = 'bcnops'
+_BONDS = {'-': 1, '=': 2, '#': 3, '$': 4, ':': 1.5, '/': 1, '\\': 1}
+AROMATIC_BOND = 1.5
+
+_BRACKET_ATOM = re.compile(r'\[(?P<isotope>\d*)(?P<element>[A-Z][a-z]?|se|as|[bcnops])'
+                           r'(?P<chirality>@(?:@|TH[12]|AL[12]|SP[1-3]|TB\d{1,2}|OH\d{1,2})?)?'
+                           r'(?P<hydrogens>H\d*)?(?P<charge>[+-]+\d*)?(?::\d+)?\]')
+
+
+class Molecule:
+    """
+    A class used to keep the graph of a molecule read from a SMILES (see parse_smiles): atoms, with their
+    hydrogens, and bonds. It gives the formula, the molecular weight and the rings, without any chemistry library.
+    ...
+
+    Attributes
+    ----------
+    elements : list of str
+        element of each atom (e.g. C, Cl)
+    aromatic : list of bool
+        atoms written as aromatic (lower case) in the SMILES
+    hydrogens : list of int
+        hydrogens of each atom (explicit or implicit)
+    bonds : list of tuples
+        atoms and order of each bond (1.5 for aromatic bonds)
+
+    Methods
+    -------
+    atom_counts(self)
+        Number of atoms of each element
+    formula(self)
+        Empirical formula (Hill notation)
+    molecular_weight(self, atom_mw=None)
+        Molecular weight from the atom properties
+    rings(self)
+        Smallest set of smallest rings
+    n_aromatic_rings(self, min_size=6)
+        Number of aromatic rings
+    """
+
+    def __init__(self):
+        self.elements = []
+        self.aromatic = []
+        self.hydrogens = []
+        self.bonds = []
+        self._neighbours = []
+
+    def __len__(self):
+        return len(self.elements)
+
+    def _add_atom(self, element, aromatic, hydrogens):
+        self.elements.append(element)
+        self.aromatic.append(aromatic)
+        self.hydrogens.append(hydrogens)
+        self._neighbours.append([])
+        return len(self.elements) - 1
+
+    def _add_bond(self, atom_1, atom_2, order=None):
+        if atom_1 == atom_2 or any(other == atom_2 for other, _ in self._neighbours[atom_1]):
+            raise ValueError(f'Invalid bond between atoms {atom_1} and {atom_2}')
+        if order is None:
+            order = AROMATIC_BOND if self.aromatic[atom_1] and self.aromatic[atom_2] else 1
+        self.bonds.append((atom_1, atom_2, order))
+        self._neighbours[atom_1].append((atom_2, len(self.bonds) - 1))
+        self._neighbours[atom_2].append((atom_1, len(self.bonds) - 1))
+
+    def _add_implicit_hydrogens(self):
+        for atom, hydrogens in enumerate(self.hydrogens):
+            if hydrogens is not None:
+                continue
+            # aromatic bonds count as single, the aromatic atoms also have a double bond in the Kekulé structure
+            bond_sum = sum(int(self.bonds[bond][2]) for _, bond in self._neighbours[atom])
+            valences = _VALENCES[self.elements[atom]]
+            if self.aromatic[atom]:
+                self.hydrogens[atom] = max(valences[0] - bond_sum - 1, 0)
+            else:
+                self.hydrogens[atom] = next((valence - bond_sum for valence in valences if valence >= bond_sum), 0)
+
+    def atom_counts(self):
+        """
+        Number of atoms of each element, including the hydrogens.
+
+        :return: dict
+                element: number of atoms
+        """
+        counts = {}
+        for element in self.elements:
+            counts[element] = counts.get(element, 0) + 1
+        n_hydrogens = sum(self.hydrogens)
+        if n_hydrogens:
+            counts['H'] = counts.get('H', 0) + n_hydrogens
+        return counts
+
+    def formula(self):
+        """
+        Empirical formula in Hill notation (C, H, then the other elements alphabetically), as given by PubChem.
+
+        :return: str
+        """
+        counts = self.atom_counts()
+        if 'C' in counts:
+            order = ['C', 'H'] + sorted(element for element in counts if element not in ('C', 'H'))
+        else:
+            order = sorted(counts)
+        return ''.join(f'{element}{counts[element] if counts[element] > 1 else ""}'
+                       for element in order if element in counts)
+
+    def molecular_weight(self, atom_mw=None):
+        """
+        Molecular weight, from the mw of the atoms in databases/atom_properties.json.
+
+        :param atom_mw: dict
+                properties of the atoms (see get_atom_mw_dict), read from the file if not given
+        :return: float
+        """
+        if atom_mw is None:
+            atom_mw = get_atom_mw_dict()
+        mw = 0.
+        for element, count in self.atom_counts().items():
+            try:
+                mw += atom_mw[element.lower()]['mw'] * count
+            except KeyError:
+                raise ValueError(f'{element} not in the atom properties')
+        return mw
+
+    def rings(self):
+        """
+        Smallest set of smallest rings: the shortest ring through each bond, kept if independent of the smaller
+        ones, until the number of rings of the molecule.
+
+        :return: list of lists
+                atoms of each ring, in order
+        """
+        n_rings = len(self.bonds) - len(self) + self._count_components()
+        candidates = {}
+        for bond, (atom_1, atom_2, _) in enumerate(self.bonds):
+            path = self._shortest_path(atom_1, atom_2, excluded_bond=bond)
+            if path is not None:
+                atoms, path_bonds = path
+                bonds_mask = sum(1 << path_bond for path_bond in set(path_bonds + [bond]))
+                candidates.setdefault(bonds_mask, atoms)
+
+        rings = []
+        basis = {}
+        for bonds_mask, atoms in sorted(candidates.items(), key=lambda candidate: len(candidate[1])):
+            if len(rings) == n_rings:
+                break
+            # independent (modulo 2) of the rings already kept
+            reduced = bonds_mask
+            while reduced:
+                pivot = reduced.bit_length() - 1
+                if pivot not in basis:
+                    basis[pivot] = reduced
+                    rings.append(atoms)
+                    break
+                reduced ^= basis[pivot]
+        return rings
+
+    def n_aromatic_rings(self, min_size=6):
+        """
+        Number of aromatic rings (by default with at least 6 atoms, i.e. benzene-like rings).
+        A ring is aromatic if all its atoms are aromatic in the SMILES, or, for Kekulé SMILES (as given by
+        PubChem), if all its atoms are conjugated and it has 4n+2 pi electrons: one for the atoms with a double
+        bond in a ring, two for the N, O and S with a lone pair, none for the atoms with an exocyclic double bond
+        (e.g. C=O).
+        Conjugated rings that are not aromatic alone are aromatic if the fused system of conjugated rings they
+        belong to has 4n+2 pi electrons (e.g. azulene, indolizine).
+
+        :param min_size: int
+                minimum number of atoms of the rings counted
+        :return: int
+        """
+        rings = self.rings()
+        ring_atoms = {atom for ring in rings for atom in ring}
+        electrons = {atom: self._pi_electrons(atom, ring_atoms) for atom in ring_atoms}
+
+        conjugated = [all(electrons[atom] is not None for atom in ring) for ring in rings]
+        aromatic = [all(self.aromatic[atom] for atom in ring)
+                    or (is_conjugated and _is_huckel(sum(electrons[atom] for atom in ring)))
+                    for ring, is_conjugated in zip(rings, conjugated)]
+
+        for index, ring in enumerate(rings):
+            if aromatic[index] or not conjugated[index]:
+                continue
+            # fused system of conjugated rings (sharing a bond) with this ring
+            system, system_atoms = {index}, set(ring)
+            added = True
+            while added:
+                added = False
+                for other, other_ring in enumerate(rings):
+                    if (other not in system and conjugated[other]
+                            and len(system_atoms.intersection(other_ring)) > 1):
+                        system.add(other)
+                        system_atoms.update(other_ring)
+                        added = True
+            if _is_huckel(sum(electrons[atom] for atom in system_atoms)):
+                for other in system:
+                    aromatic[other] = True
+
+        return sum(is_aromatic and len(ring) >= min_size for ring, is_aromatic in zip(rings, aromatic))
+
+    def _pi_electrons(self, atom, ring_atoms):
+        """
+        Pi electrons given by a ring atom to the ring, None if it is not conjugated (e.g. sp3 carbon).
+        """
+        element = self.elements[atom]
+        neighbours = self._neighbours[atom]
+        double_bonds = [other for other, bond in neighbours if self.bonds[bond][2] == 2]
+        if self.aromatic[atom]:
+            if double_bonds:
+                return 0
+            if element in ('O', 'S') or (element == 'N' and (self.hydrogens[atom] or len(neighbours) == 3)):
+                return 2
+            return 1
+        if any(other in ring_atoms for other in double_bonds):
+            return 1
+        if double_bonds:
+            return 0
+        if element in ('O', 'S') or (element == 'N' and len(neighbours) + self.hydrogens[atom] == 3):
+            return 2
+        return None
+
+    def _shortest_path(self, start, end, excluded_bond):
+        """
+        Shortest path between two atoms without a bond (breadth first search), as atoms and bonds.
+        """
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            atom = queue.popleft()
+            if atom == end:
+                atoms, bonds = [], []
+                while previous[atom] is not None:
+                    atoms.append(atom)
+                    atom, bond = previous[atom]
+                    bonds.append(bond)
+                return atoms + [start], bonds
+            for other, bond in self._neighbours[atom]:
+                if bond != excluded_bond and other not in previous:
+                    previous[other] = (atom, bond)
+                    queue.append(other)
+        return None
+
+    def _count_components(self):
+        seen = set()
+        n_components = 0
+        for start in range(len(self)):
+            if start in seen:
+                continue
+            n_components += 1
+            stack = [start]
+            seen.add(start)
+            while stack:
+                for other, _ in self._neighbours[stack.pop()]:
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+        return n_components
+
+
+def _is_huckel(n_electrons):
+    return n_electrons % 4 == 2
+
+
+def parse_smiles(smiles):
+    """
+    Reads a SMILES into a Molecule: atoms (organic subset and bracket atoms), bonds, branches, ring closures and
+    disconnected parts. The implicit hydrogens are added from the normal valences.
+    Stereochemistry, isotopes and charges are read but not kept.
+
+    Parameters
+    ----------
+    smiles: str
+
+    Returns
+    -------
+    molecule: Molecule
+
+    Raises
+    ------
+    ValueError
+        if the SMILES is not valid
+    """
+    molecule = Molecule()
+    previous = None
+    bond = None
+    branches = []
+    ring_bonds = {}
+
+    position = 0
+    while position < len(smiles):
+        char = smiles[position]
+        atom = None
+        if char == '[':
+            match = _BRACKET_ATOM.match(smiles, position)
+            if match is None:
+                raise ValueError(f'Invalid atom at position {position} of {smiles}')
+            element = match['element']
+            hydrogens = match['hydrogens']
+            atom = molecule._add_atom(element.capitalize(), element.islower(), int(hydrogens[1:] or 1) if hydrogens
+                                      else 0)
+            position = match.end()
+        elif smiles.startswith(('Cl', 'Br'), position):
+            atom = molecule._add_atom(smiles[position:position + 2], False, None)
+            position += 2
+        elif char in _VALENCES or char in _AROMATIC_ATOMS:
+            atom = molecule._add_atom(char.upper(), char.islower(), None)
+            position += 1
+        elif char == '(':
+            if previous is None:
+                raise ValueError(f'Branch without atom at position {position} of {smiles}')
+            branches.append(previous)
+            position += 1
+        elif char == ')':
+            if not branches:
+                raise ValueError(f'Unmatched ")" at position {position} of {smiles}')
+            previous = branches.pop()
+            position += 1
+        elif char in _BONDS:
+            bond = _BONDS[char]
+            position += 1
+        elif char == '.':
+            previous = None
+            position += 1
+        elif char.isdigit() or char == '%':
+            if char == '%':
+                number = smiles[position + 1:position + 3]
+                position += 3
+            else:
+                number = char
+                position += 1
+            if previous is None or not number.isdigit():
+                raise ValueError(f'Invalid ring closure at position {position} of {smiles}')
+            if number in ring_bonds:
+                other, other_bond = ring_bonds.pop(number)
+                molecule._add_bond(previous, other, bond or other_bond)
+            else:
+                ring_bonds[number] = (previous, bond)
+            bond = None
+        else:
+            raise ValueError(f'Invalid character "{char}" at position {position} of {smiles}')
+
+        if atom is not None:
+            if previous is not None:
+                molecule._add_bond(previous, atom, bond)
+            previous = atom
+            bond = None
+
+    if ring_bonds or branches or not len(molecule):
+        raise ValueError(f'Incomplete SMILES: {smiles}')
+    molecule._add_implicit_hydrogens()
+    return molecule
+
+
+def smiles_properties(smiles, atom_mw=None):
+    """
+    Formula, molecular weight (rounded to 2 decimals, as given by PubChem) and number of benzene-like aromatic
+    rings (see Molecule.n_aromatic_rings) of a compound, computed from its SMILES.
+
+    Parameters
+    ----------
+    smiles: str
+    atom_mw: dict
+        properties of the atoms (see get_atom_mw_dict), read from the file if not given
+
+    Returns
+    -------
+    properties: dict
+        formula, mw and n_benz
+    """
+    molecule = parse_smiles(smiles)
+    return {'formula': molecule.formula(), 'mw': round(molecule.molecular_weight(atom_mw), 2),
+            'n_benz': molecule.n_aromatic_rings()}
@@ -0,0 +1,311 @@
+import abc
+import os
+
+import pandas as pd
+
+from .logs import get_logger
+from .pubchem import PubChemCache, get_pubchem_properties
+from .smiles import smiles_properties
+
+# fields of the SDF files (e.g. PubChem downloads) with the names and the properties of the compounds
+SDF_NAME_FIELDS = ('PUBCHEM_IUPAC_NAME', 'PUBCHEM_IUPAC_TRADITIONAL_NAME', 'NAME', 'SYNONYMS')
+SDF_PROPERTY_FIELDS = {'smiles': ('PUBCHEM_SMILES', 'PUBCHEM_OPENEYE_ISO_SMILES', 'PUBCHEM_OPENEYE_CAN_SMILES',
+                                  'SMILES'),
+                       'formula': ('PUBCHEM_MOLECULAR_FORMULA', 'FORMULA'),
+                       'mw': ('PUBCHEM_MOLECULAR_WEIGHT', 'MW')}
+
+_logger = get_logger(__name__)
+
+
+class StructureResolver(abc.ABC):
+    """
+    Base class of the structure resolvers, which give the formula, MW and smiles of compounds from their names,
+    used to generate databases (see GenerateDatabase.get_formula_mw). The resolvers only need to implement
+    resolve, resolve_many can be overridden to resolve many compounds at once.
+    ...
+
+    Methods
+    -------
+    resolve(self, name)
+        Properties of a compound
+    resolve_many(self, names, callback=None)
+        Properties of many compounds
+    """
+
+    @abc.abstractmethod
+    def resolve(self, name):
+        """
+        Properties of a compound.
+
+        :param name: str
+                name of the compound
+        :return: dict or None
+                formula, mw and smiles of the compound (some may be None), None if not found.
+        """
+
+    def resolve_many(self, names, callback=None):
+        """
+        Properties of many compounds.
+
+        :param names: list of str
+                names of the compounds
+        :param callback: function
+                called with the name of each compound once it is done (e.g. to update a progress bar)
+        :return: dict
+                properties of each compound (None if not found)
+        """
+        results = {}
+        for name in dict.fromkeys(names):
+            results[name] = self.resolve(name)
+            if callback is not None:
+                callback(name)
+        return results
+
+
+class PubChemResolver(StructureResolver):
+    """
+    Resolves the compounds with the PubChem REST API, with concurrent requests (see PubChemClient).
+    ...
+
+    Attributes
+    ----------
+    cache_file : str
+        json file of the cache of the client (see PubChemCache), if any
+    options : dict
+        options of PubChemClient (e.g. max_connections, rate_limit)
+    """
+
+    def __init__(self, cache_file=None, **kwargs):
+        self.cache_file = cache_file
+        self.options = kwargs
+
+    def resolve(self, name):
+        return self.resolve_many([name])[name]
+
+    def resolve_many(self, names, callback=None):
+        return get_pubchem_properties(names, cache_file=self.cache_file, callback=callback, **self.options)
+
+
+class LocalResolver(StructureResolver):
+    """
+    Resolves the compounds from a local dump of compounds, so the database can be generated offline.
+    The dump can be:
+
+    - a csv file with the names of the compounds as first column, and the columns smiles, formula and mw
+      (any of them, the formula and mw are computed from the smiles if missing). An optional column synonyms gives
+      other names of the compounds, separated by |.
+    - an SDF file (e.g. downloaded from PubChem), where the names are the title of the records and the IUPAC
+      names and synonyms fields, and the properties are taken from the PubChem fields (or SMILES, FORMULA and MW).
+
+    The names are case insensitive.
+    ...
+
+    Attributes
+    ----------
+    filename : str
+        file of the dump
+    df : df
+        properties (smiles, formula, mw) of the compounds, with the names (lower case) as index
+
+    Examples
+    ---------
+    >>> resolver = mp.LocalResolver('compounds.sdf')
+    >>> resolver.resolve('Phenol')
+    {'formula': 'C6H6O', 'mw': 94.11, 'smiles': 'C1=CC=C(C=C1)O'}
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        if os.path.splitext(filename)[1].lower() in ('.sdf', '.sd'):
+            df = _read_sdf_properties(filename)
+        else:
+            df = _read_csv_properties(filename)
+        self.df = df[~df.index.duplicated()]
+
+    def resolve(self, name):
+        try:
+            row = self.df.loc[name.strip().lower()]
+        except KeyError:
+            return None
+        properties = {column: row.get(column) for column in ('formula', 'mw', 'smiles')}
+        properties = {column: None if pd.isna(value) else value for column, value in properties.items()}
+        return complete_properties(properties)
+
+
+class CacheResolver(StructureResolver):
+    """
+    Resolves the compounds from a json cache (the same file as PubChemCache), and optionally from another resolver
+    for the compounds not in the cache, which are then added to it. Without resolver, it only reads the cache
+    (e.g. a cache filled online, copied to an offline machine).
+    ...
+
+    Attributes
+    ----------
+    cache : PubChemCache
+        cache of the properties
+    resolver : StructureResolver
+        resolver of the compounds not in the cache, if any
+    """
+
+    def __init__(self, cache_file, resolver=None):
+        self.cache = PubChemCache(cache_file)
+        self.resolver = resolver
+
+    def resolve(self, name):
+        return self.resolve_many([name])[name]
+
+    def resolve_many(self, names, callback=None):
+        names = list(dict.fromkeys(names))
+        results = {}
+        missing = []
+        for name in names:
+            if name in self.cache:
+                results[name] = self.cache.get(name)
+                if callback is not None:
+                    callback(name)
+            else:
+                missing.append(name)
+
+        if missing and self.resolver is not None:
+            resolved = self.resolver.resolve_many(missing, callback=callback)
+            for name, properties in resolved.items():
+                self.cache.set(name, properties)
+            self.cache.save()
+            results.update(resolved)
+        else:
+            results.update(dict.fromkeys(missing))
+            if callback is not None:
+                for name in missing:
+                    callback(name)
+        return {name: results[name] for name in names}
+
+
+class ChainResolver(StructureResolver):
+    """
+    Resolves the compounds with several resolvers, in order: each resolver only gets the compounds not found by
+    the previous ones.
+    ...
+
+    Attributes
+    ----------
+    resolvers : list of StructureResolver
+
+    Examples
+    ---------
+    >>> resolver = mp.ChainResolver([mp.CacheResolver('pubchem_cache.json'), mp.LocalResolver('compounds.csv'),
+    ...                              mp.PubChemResolver()])
+    >>> database.get_formula_mw(resolver=resolver)
+    """
+
+    def __init__(self, resolvers):
+        self.resolvers = list(resolvers)
+
+    def resolve(self, name):
+        return self.resolve_many([name])[name]
+
+    def resolve_many(self, names, callback=None):
+        names = list(dict.fromkeys(names))
+        results = dict.fromkeys(names)
+        remaining = names
+        for resolver in self.resolvers:
+            if not remaining:
+                break
+            resolved = resolver.resolve_many(remaining)
+            results.update({name: properties for name, properties in resolved.items() if properties is not None})
+            remaining = [name for name in remaining if results[name] is None]
+            if callback is not None:
+                for name in resolved:
+                    if results[name] is not None:
+                        callback(name)
+
+        if callback is not None:
+            for name in remaining:
+                callback(name)
+        return results
+
+
+def complete_properties(properties):
+    """
+    Adds the formula and mw computed from the smiles (see smiles_properties), if they are missing.
+
+    Parameters
+    ----------
+    properties: dict
+        formula, mw and smiles of a compound
+
+    Returns
+    -------
+    properties: dict
+    """
+    smiles = properties.get('smiles')
+    if smiles and (properties.get('formula') is None or properties.get('mw') is None):
+        try:
+            computed = smiles_properties(smiles)
+        except ValueError as error:
+            _logger.warning('Formula and mw not computed from %s: %s', smiles, error)
+            return properties
+        properties = {**properties, 'formula': properties.get('formula') or computed['formula'],
+                      'mw': properties.get('mw') if properties.get('mw') is not None else computed['mw']}
+    return properties
+
+
+def _read_csv_properties(filename):
+    df = pd.read_csv(filename, index_col=0)
+    df.columns = df.columns.str.lower()
+    df.index = df.index.astype(str).str.strip().str.lower()
+    df = df.reindex(columns=['formula', 'mw', 'smiles', 'synonyms'])
+
+    if df['synonyms'].notna().any():
+        synonyms = df['synonyms'].dropna().str.split('|').explode().str.strip().str.lower()
+        synonyms = synonyms[synonyms != '']
+        df = pd.concat([df, df.loc[synonyms.index].set_axis(synonyms.to_numpy())])
+    return df.drop(columns='synonyms')
+
+
+def _read_sdf_properties(filename):
+    records = []
+    with open(filename, 'r') as fp:
+        for record in _iter_sdf_records(fp):
+            title, fields = record
+            properties = {}
+            for column, field_names in SDF_PROPERTY_FIELDS.items():
+                properties[column] = next((fields[field][0] for field in field_names if fields.get(field)), None)
+            names = [title] + [name for field in SDF_NAME_FIELDS for name in fields.get(field, [])]
+            for name in dict.fromkeys(name.strip().lower() for name in names):
+                if name:
+                    records.append((name, properties))
+
+    df = pd.DataFrame([properties for _, properties in records], index=[name for name, _ in records],
+                      columns=list(SDF_PROPERTY_FIELDS))
+    df['mw'] = pd.to_numeric(df['mw'], errors='coerce')
+    return df
+
+
+def _iter_sdf_records(fp):
+    """
+    Title and data fields (lists of lines) of the records of an SDF file.
+    """
+    title = None
+    fields = {}
+    field = None
+    for line in fp:
+        line = line.rstrip('\r\n')
+        if title is None:
+            title = line
+        elif line == '$$$$':
+            yield title, fields
+            title, fields, field = None, {}, None
+        elif line.startswith('>'):
+            # data header, e.g. > <PUBCHEM_IUPAC_NAME>
+            start, end = line.find('<'), line.find('>', line.find('<'))
+            field = line[start + 1:end] if start >= 0 and end > start else None
+            if field is not None:
+                fields[field] = []
+        elif field is not None:
+            if line:
+                fields[field].append(line)
+            else:
+                field = None
+    # last record without $$$$
+    if title:
+        yield title, fields
@@ -0,0 +1,57 @@
+import json
+import os
+import shutil
+
+from ..cli import main
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'example')
+
+
+def test_process(tmp_path):
+    blob_dir = tmp_path / "blobs"
+    blob_dir.mkdir()
+    for filename in os.listdir(EXAMPLE_DIR):
+        if filename.endswith("Blob_Table.csv"):
+            shutil.copy(os.path.join(EXAMPLE_DIR, filename), blob_dir)
+
+    args = ["process", "--matrix", os.path.join(EXAMPLE_DIR, "experimental_matrix.csv"),
+            "--database", os.path.join(EXAMPLE_DIR, "database_example.csv"), "--blob-dir", str(blob_dir),
+            "--internal-standard", "fluoranthene", "--concentration", "0.03", "--grouping", "group",
+            "--output", str(tmp_path / "results"), "--timings", str(tmp_path / "timings.json")]
+
+    assert main(args + ["--trace", str(tmp_path / "trace.json")]) == 0
+    with open(tmp_path / "timings.json") as fp:
+        runs = json.load(fp)["runs"]
+    assert [run["status"] for run in runs] == ["processed", "processed"]
+    assert set(runs[0]["timings"]) == {"read_blob_file", "perform_matching_database", "compute_yields",
+                                       "write_results"}
+    with open(tmp_path / "trace.json") as fp:
+        stages = {event["name"] for event in json.load(fp)["traceEvents"]}
+    assert {"read_blob_file", "compute_yields", "write_results", "get_yields_summary"} <= stages
+    with open(tmp_path / "results" / "100 ug py_600c-r_350c.totals.json") as fp:
+        assert json.load(fp)["total_FID"] > 0
+
+    # unchanged runs are skipped, modified ones are processed again
+    assert main(args) == 0
+    with open(tmp_path / "timings.json") as fp:
+        assert [run["status"] for run in json.load(fp)["runs"]] == ["skipped", "skipped"]
+
+    os.utime(blob_dir / "180 ug Py_800C-R_350C.cdf_img01_Blob_Table.csv", ns=(0, 0))
+    assert main(args + ["--jobs", "2"]) == 0
+    with open(tmp_path / "timings.json") as fp:
+        assert sorted(run["status"] for run in json.load(fp)["runs"]) == ["processed", "skipped"]
+
+
+def test_watch(tmp_path):
+    blob_dir = tmp_path / "blobs"
+    blob_dir.mkdir()
+    shutil.copy(os.path.join(EXAMPLE_DIR, "100 ug Py_600C-R_350C.cdf_img01_Blob_Table.csv"), blob_dir)
+
+    args = ["watch", "--matrix", os.path.join(EXAMPLE_DIR, "experimental_matrix.csv"),
+            "--database", os.path.join(EXAMPLE_DIR, "database_example.csv"), "--blob-dir", str(blob_dir),
+            "--internal-standard", "fluoranthene", "--concentration", "0.03",
+            "--output", str(tmp_path / "results"), "--store", str(tmp_path / "store"),
+            "--interval", "0.05", "--settle-time", "0.1", "--timeout", "0.5"]
+    assert main(args) == 0
+    with open(tmp_path / "store" / "metadata.json") as fp:
+        assert len(json.load(fp)["runs"]) == 1
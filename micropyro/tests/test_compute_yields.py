@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from ..blob_file import perform_matching_database, read_blob_file
+from ..compute_yields import compute_yields, compute_yields_is
+from ..experimental_matrix import ReadExperimentTable
+from ..postprocessing_tools_single_file import get_yields_summary
+from ..read_database import ReadDatabase
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'example')
+
+
+def test_compute_yields_is_drops_internal_standard():
+    experiment_table = ReadExperimentTable.from_csv(os.path.join(EXAMPLE_DIR, 'experimental_matrix.csv'))
+    experiment_table.compute_is_amount(0.03)
+    experiment_row = experiment_table.df.loc['100 ug py_600c-r_350c']
+    database = ReadDatabase.from_csv(os.path.join(EXAMPLE_DIR, 'database_example.csv'))
+    blob_df = read_blob_file(os.path.join(EXAMPLE_DIR, '100 ug Py_600C-R_350C.cdf_img01_Blob_Table.csv'))
+    perform_matching_database(blob_df, database.df)
+
+    # the name of the internal standard used to be iterated character by character, so it was never dropped
+    kept_df = compute_yields(experiment_row, blob_df.copy(), 'fluoranthene', None, None)
+    results_df = compute_yields_is(experiment_row, blob_df.copy(), 'fluoranthene')
+
+    assert 'fluoranthene' not in results_df.index
+    assert list(results_df.index) == [name for name in kept_df.index if name != 'fluoranthene']
+    total = get_yields_summary(results_df)['total_FID']
+    is_yield = kept_df.loc['fluoranthene', 'yield mrf']
+    assert total == pytest.approx(get_yields_summary(kept_df)['total_FID'] - is_yield)
+    assert total == pytest.approx(4.1779, abs=1e-4)
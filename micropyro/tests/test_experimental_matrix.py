@@ -0,0 +1,51 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..experimental_matrix import ReadExperimentTable
+
+EXAMPLE_MATRIX = os.path.join(os.path.dirname(__file__), '..', '..', 'example', 'experimental_matrix.csv')
+
+
+@pytest.fixture
+def matrix_csv():
+    return ReadExperimentTable.from_csv(EXAMPLE_MATRIX, header=0)
+
+
+def test_from_dict_records(matrix_csv):
+    records = pd.read_csv(EXAMPLE_MATRIX).to_dict(orient='records')
+    matrix = ReadExperimentTable.from_dict(records)
+    pd.testing.assert_frame_equal(matrix.df, matrix_csv.df)
+
+
+def test_from_dict_index(matrix_csv):
+    data = pd.read_csv(EXAMPLE_MATRIX, index_col='Filename').to_dict(orient='index')
+    matrix = ReadExperimentTable.from_dict(data, orient='index')
+    pd.testing.assert_frame_equal(matrix.df, matrix_csv.df[matrix.df.columns])
+
+
+@pytest.mark.parametrize("orient", ['records', 'list'])
+def test_from_json(matrix_csv, tmp_path, orient):
+    with open(tmp_path / "matrix.json", 'w') as fp:
+        json.dump(pd.read_csv(EXAMPLE_MATRIX).to_dict(orient=orient), fp)
+    matrix = ReadExperimentTable.from_json(tmp_path / "matrix.json")
+    pd.testing.assert_frame_equal(matrix.df, matrix_csv.df)
+
+
+def test_mass_balance_incremental(matrix_csv):
+    matrix_csv.df["total after w/o holder"] = [135.0, 135.1]
+    matrix_csv.compute_is_amount(0.03)
+    matrix_csv.compute_char()
+    expected = matrix_csv.df[["is_amount", "total before w/o holder", "char mass", "% char"]].copy()
+
+    mass_balance = matrix_csv.mass_balance(concentration=0.03)
+    pd.testing.assert_frame_equal(mass_balance.df[expected.columns], expected)
+    assert mass_balance.update() == []
+
+    mass_balance.set_column("hook", matrix_csv.df["hook"] + 0.01)
+    assert mass_balance.update() == ["total before w/o holder", "char mass", "% char", "volatiles mass",
+                                     "% volatiles"]
+    np.testing.assert_allclose(mass_balance.df["char mass"], expected["char mass"] - 0.01)
@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+
+from ..compute_yields import get_mass_calibration
+from ..external_calibration import (BOOTSTRAP_CHUNK_SIZE, ExternalCalibration, MultiExternalCalibration,
+                                    _find_outliers, _masked_slope, bootstrap_slopes)
+
+
+def _calibration_df(sample, volume):
+    calibration_df = pd.DataFrame({"Sample": sample, "Volume": volume},
+                                  index=pd.Index([f"Run_{i}" for i in range(len(sample))], name="Filename"))
+    return calibration_df
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_outliers_match_statsmodels(seed):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0.05, 1, 20)
+    y = 3 * x + rng.normal(0, 0.1, 20)
+    y[seed] += 2
+
+    regression = sm.OLS(y, x).fit()
+    expected = np.asarray(regression.outlier_test())[:, 2] < 0.5
+
+    mask = np.ones_like(x, dtype=bool)
+    slope = _masked_slope(x, y, mask)
+    assert slope == pytest.approx(regression.params[0])
+    np.testing.assert_array_equal(_find_outliers(x, y, mask, slope), expected)
+
+
+def test_linear_calibration_large_set(tmp_path):
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0.05, 1, 5000)
+    x[50:101] = x[0]  # outliers and good points sharing the same mass
+    y = 3 * x + rng.normal(0, 0.01, 5000)
+    y[:50] += 5
+
+    calibration = ExternalCalibration(_calibration_df(x, y))
+    calibration.linear_calibration(to_file=tmp_path / "calibration.json")
+
+    assert not calibration.mask[:50].any()
+    assert calibration.mask[50:101].all()
+    with open(tmp_path / "calibration.json") as fp:
+        data = json.load(fp)
+    assert data["slope"] == pytest.approx(3, rel=1e-3)
+
+
+def test_multi_calibration_matches_single(tmp_path):
+    rng = np.random.default_rng(1)
+    x = rng.uniform(0.05, 1, 30)
+    volumes = {"Phenol": 3 * x + rng.normal(0, 0.05, 30),
+               "Benzene": 5 * x + rng.normal(0, 0.05, 30)}
+    volumes["Phenol"][3] += 4
+    volumes["Benzene"][[5, 7]] = np.nan
+
+    calibration_df = _calibration_df(x, volumes["Phenol"]).rename(columns={"Volume": "Phenol"})
+    calibration_df["Benzene"] = volumes["Benzene"]
+    multi = MultiExternalCalibration(calibration_df)
+    multi.linear_calibration(to_file=tmp_path / "calibration.json")
+
+    for compound, volume in volumes.items():
+        single = ExternalCalibration(_calibration_df(x, volume))
+        regression = single.linear_calibration(to_file=tmp_path / f"{compound}.json")
+        row = multi.calibration.loc[compound.lower()]
+        assert row.slope == pytest.approx(regression.params[0])
+        np.testing.assert_allclose([row.conf_low, row.conf_high], regression.conf_int()[0])
+        assert row.rsquared == pytest.approx(regression.rsquared)
+
+    assert get_mass_calibration(tmp_path / "calibration.json", 6, compound="phenol") == \
+        pytest.approx(6 / multi.calibration.loc["phenol", "slope"])
+
+
+def test_bootstrap_slopes_independent_of_processes():
+    rng = np.random.default_rng(2)
+    x = rng.uniform(0.05, 1, 15)
+    y = 3 * x + rng.normal(0, 0.05, 15)
+
+    slopes = bootstrap_slopes(x, y, 1000, random_state=0, chunk_size=15 * 128)
+    slopes_pool = bootstrap_slopes(x, y, 1000, n_jobs=2, random_state=0, chunk_size=15 * 128)
+
+    assert slopes.shape == (1000,)
+    np.testing.assert_array_equal(slopes, slopes_pool)
+    assert np.percentile(slopes, 2.5) < 3 < np.percentile(slopes, 97.5)
+
+    # with the default chunk size, 10^4 resamples of 30 points are split in several chunks for the pool
+    x, y = np.tile(x, 2), np.tile(y, 2)
+    assert 10 ** 4 * len(x) > 4 * BOOTSTRAP_CHUNK_SIZE
+    np.testing.assert_array_equal(bootstrap_slopes(x, y, 10 ** 4, random_state=0),
+                                  bootstrap_slopes(x, y, 10 ** 4, n_jobs=2, random_state=0))
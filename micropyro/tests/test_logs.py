@@ -0,0 +1,73 @@
+import logging
+
+import pandas as pd
+
+from ..blob_file import perform_matching_database
+from ..compute_yields import compute_yields
+from ..logs import RATE_LIMIT_RECORDS, RateLimitFilter, get_logger, summarize_names
+from ..match_report import MatchReport
+
+
+def _database_df():
+    return pd.DataFrame({'mw': [94.11, 202.25], 'ecn': [5.75, 16.], 'mrf': [0.8, 1.2]},
+                        index=['phenol', 'fluoranthene'])
+
+
+def test_match_report(caplog):
+    database_df = _database_df()
+    experiment_row = pd.Series({'sample': 0.1, 'is_amount': 0.01})
+    report = MatchReport()
+
+    for run in ('run 1', 'run 2'):
+        blob_df = pd.DataFrame({'volume': [1., 2., 3., 4.]}, index=['phenol', 'fluoranthene', 'furan', 'furan'])
+        with caplog.at_level(logging.WARNING, logger='micropyro'):
+            perform_matching_database(blob_df, database_df, report=report, run=run)
+        blob_df = blob_df.loc[['phenol', 'fluoranthene']]
+        results_df = compute_yields(experiment_row, blob_df, 'fluoranthene', None, ['fluoranthene'], report=report,
+                                    run=run)
+        assert list(results_df.index) == ['phenol']
+
+    assert report.unmatched == {'run 1': ['furan', 'furan'], 'run 2': ['furan', 'furan']}
+    assert report.distinct() == ['furan']
+    assert report.distinct('dropped') == ['fluoranthene']
+    counts = report.counts()
+    assert list(counts.index) == ['run 1', 'run 2']
+    assert counts.loc['run 1'].tolist() == [2, 1, 0]
+
+    # a single message per run, with the distinct names
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == ['1 compounds not found in database in run 1: furan',
+                        '1 compounds not found in database in run 2: furan']
+
+    merged = MatchReport()
+    merged.update(report)
+    assert merged.to_dict() == report.to_dict()
+
+
+def test_rate_limit_filter():
+    rate_limit = RateLimitFilter(max_records=2, interval=3600)
+    records = [logging.LogRecord('micropyro', logging.DEBUG, __file__, 0, '%s not found', (i,), None)
+               for i in range(5)]
+    assert [rate_limit.filter(record) for record in records] == [True, True, False, False, False]
+
+    rate_limit.interval = 0
+    record = logging.LogRecord('micropyro', logging.DEBUG, __file__, 0, '%s not found', ('x',), None)
+    assert rate_limit.filter(record)
+    assert record.getMessage() == 'x not found (3 similar messages suppressed)'
+
+
+def test_rate_limit_warnings_errors(caplog):
+    # the summaries and failures of the runs are never suppressed
+    logger = get_logger('micropyro.test_logs')
+    with caplog.at_level(logging.DEBUG, logger='micropyro'):
+        for i in range(RATE_LIMIT_RECORDS + 5):
+            logger.debug('%s not found in database', i)
+            logger.warning('%d compounds not found in database', i)
+            logger.error('%s failed', i)
+    levels = [record.levelno for record in caplog.records]
+    assert levels.count(logging.DEBUG) == RATE_LIMIT_RECORDS
+    assert levels.count(logging.WARNING) == levels.count(logging.ERROR) == RATE_LIMIT_RECORDS + 5
+
+
+def test_summarize_names():
+    assert summarize_names(['a', 'b', 'c'], max_names=2) == 'a, b and 1 more'
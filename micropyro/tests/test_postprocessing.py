@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..postprocessing_tools_multiple_files import (bin_yields_mw, compare_elements_totals, concat_results,
+                                                   get_yields_summary_runs, plot_total_globals, rank_changes,
+                                                   top_n_yields, union_top_n, yields_matrix)
+from ..postprocessing_tools_single_file import get_yields_summary
+from ..vocabulary import CompoundVocabulary
+
+
+def _results_df(mw, yields):
+    return pd.DataFrame({"mw": mw, "yield mrf": yields}, index=[f"compound {i}" for i in range(len(mw))])
+
+
+def test_bin_yields_mw():
+    blob_dfs = [_results_df([16.04, 50., 94.11, 300.], [1., 2., 3., 4.]),
+                _results_df(["nan", 100., 150.], [5., 6., 7.])]
+    yields_ranges = bin_yields_mw(blob_dfs, [0, 50, 100, 200], run_names=["a", "b"])
+
+    assert yields_ranges.shape == (2, 3)
+    # the compounds on the edges are counted once, in the upper bin
+    np.testing.assert_allclose(yields_ranges.loc["a"], [1., 5., 0.])
+    np.testing.assert_allclose(yields_ranges.loc["b"], [0., 0., 13.])
+
+
+def test_yields_matrix():
+    blob_dfs = [_results_df([16.04, 94.11], [1., 2.]),
+                _results_df([16.04], [3.])]
+    matrix = yields_matrix(blob_dfs, compounds=["compound 1", "compound 0", "missing"], run_names=["a", "b"])
+
+    assert list(matrix.columns) == ["compound 1", "compound 0", "missing"]
+    np.testing.assert_allclose(matrix.loc["a"], [2., 1., np.nan])
+    np.testing.assert_allclose(matrix.loc["b"], [np.nan, 3., np.nan])
+
+
+def test_plot_totals_from_table():
+    list_totals_dict = [{"total_FID": 10., "atoms_FID": {"c": 8., "h": 1.}, "1st_react_temp": 600.},
+                        {"total_FID": 12., "atoms_FID": {"c": 9.}, "char_yield": 20., "1st_react_temp": 700.}]
+    fig, ax = compare_elements_totals(list_totals_dict, elements=["c", "h"], x_axis=[600, 700])
+    assert len(ax.lines) == 4  # one per element, and one per legend entry
+    fig, ax = plot_total_globals(list_totals_dict, annotate=True)
+    np.testing.assert_allclose(ax.collections[-1].get_offsets()[:, 1], [10., 32.])
+
+
+def test_top_n_yields():
+    results = pd.DataFrame({"experiment": ["a", "a", "a", "b", "b", "b"],
+                            "compound": ["phenol", "benzene", "methane", "phenol", "benzene", "methane"],
+                            "yield mrf": [1., 3., 2., 5., 4., np.nan]})
+    top = top_n_yields(results, 2)
+    assert top[["experiment", "compound", "rank"]].values.tolist() == \
+        [["a", "benzene", 1], ["a", "methane", 2], ["b", "phenol", 1], ["b", "benzene", 2]]
+
+    ranks, changes = rank_changes(results, 1)
+    assert list(ranks.columns) == ["phenol", "benzene"]
+    np.testing.assert_allclose(ranks.values, [[3, 1], [1, 2]])
+    np.testing.assert_allclose(changes.loc["b"], [2, -1])
+
+    union = union_top_n(results, 2)
+    assert union.loc["benzene", "n_runs"] == 2
+    assert union.index[0] == "benzene"
+
+
+def test_get_yields_summary_runs():
+    blob_dfs = []
+    for i_run in range(2):
+        results_df = pd.DataFrame({"mw": [16.04, 94.11, 108.14], "yield mrf": [1., 2. + i_run, 3.],
+                                   "c": [1, 6, 7], "h": [4, 6, 8], "o": [0, 1, 1],
+                                   "group": ["gas", "phenols", "phenols"], "grouping_fran": [1, 2, 2]},
+                                  index=["methane", "phenol", "p-cresol"])
+        blob_dfs.append(results_df)
+    results = concat_results(blob_dfs, run_names=["a", "b"])
+
+    summary = get_yields_summary_runs(results, ["group", "grouping_fran"]).set_index(
+        ["experiment", "grouping", "group"])["yield mrf"]
+
+    for run_name, results_df in zip(["a", "b"], blob_dfs):
+        expected = get_yields_summary(results_df.copy(), "group")
+        for group, value in expected["group"].items():
+            assert summary[run_name, "group", group] == pytest.approx(value)
+        assert summary[run_name, "total_FID", "total"] == pytest.approx(expected["total_FID"])
+        for atom, value in expected["atoms_FID"].items():
+            assert summary[run_name, "atoms_FID", atom] == pytest.approx(value)
+    assert summary["b", "grouping_fran", 2] == pytest.approx(6.)
+
+
+def test_vocabulary():
+    vocabulary = CompoundVocabulary(['phenol', 'furan'])
+    np.testing.assert_array_equal(vocabulary.encode(['furan', 'toluene']), [1, -1])
+    assert vocabulary.encode(['toluene', 'furan'], add=True).dtype == np.int32
+    assert vocabulary.names == ['phenol', 'furan', 'toluene']
+    assert vocabulary['toluene'] == 2 and 'toluene' in vocabulary
+    assert list(vocabulary.decode([2, 0])) == ['toluene', 'phenol']
+
+
+def test_results_with_vocabulary():
+    blob_dfs = [pd.DataFrame({'yield mrf': [1., 2.]}, index=['phenol', 'toluene']),
+                pd.DataFrame({'yield mrf': [3., np.nan, 4.]}, index=['furan', 'phenol', 'phenol'])]
+    vocabulary = CompoundVocabulary(['phenol', 'furan'])
+
+    results = concat_results(blob_dfs, ['a', 'b'], vocabulary=vocabulary)
+    pd.testing.assert_frame_equal(results.astype({'experiment': object, 'compound': object}),
+                                  concat_results(blob_dfs, ['a', 'b']))
+    assert results['compound'].cat.categories.tolist() == ['phenol', 'furan', 'toluene']
+    assert list(union_top_n(results, 1).index) == ['phenol', 'toluene']
+
+    pd.testing.assert_frame_equal(yields_matrix(blob_dfs, vocabulary=vocabulary), yields_matrix(blob_dfs))
+    pd.testing.assert_frame_equal(yields_matrix(blob_dfs, ['toluene', 'benzene'], vocabulary=vocabulary),
+                                  yields_matrix(blob_dfs, ['toluene', 'benzene']), check_column_type=False)
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from ..blob_file import read_blob_file
+from ..profiling import Profiler, profile_stage
+
+
+@profile_stage()
+def _build_table(n_rows):
+    return pd.DataFrame({'volume': np.ones(n_rows)})
+
+
+def test_disabled():
+    # without an active profiler, the stages only call the function
+    assert len(_build_table(5)) == 5
+    with profile_stage('outside') as record:
+        record['rows'] = 5
+
+
+def test_profiler_records(tmp_path):
+    with Profiler(memory=True) as profiler:
+        with profiler.run('run 1'):
+            with profile_stage('outer') as record:
+                _build_table(10)
+                _build_table(100000)
+                record['rows'] = 3
+        with profiler.run('run 2'):
+            _build_table(20)
+
+    records = profiler.to_dataframe()
+    assert list(records['stage']) == ['_build_table', '_build_table', 'outer', '_build_table']
+    assert list(records['run']) == ['run 1', 'run 1', 'run 1', 'run 2']
+    assert list(records['depth']) == [1, 1, 0, 0]
+    assert list(records['rows']) == [10, 100000, 3, 20]
+    # the outer stage contains the inner ones
+    assert records['wall_time'][2] >= records['wall_time'][:2].sum()
+    assert records['peak_memory'][1] >= 100000 * 8
+    assert records['peak_memory'][2] >= records['peak_memory'][1]
+
+    table = profiler.timing_table()
+    assert table.loc['run 1', '_build_table'] == records['wall_time'][:2].sum()
+    assert np.isnan(table.loc['run 2', 'outer'])
+
+    profiler.to_chrome_trace(tmp_path / 'trace.json')
+    with open(tmp_path / 'trace.json') as fp:
+        events = json.load(fp)['traceEvents']
+    assert [event['name'] for event in events] == list(records['stage'])
+    assert min(event['ts'] for event in events) == 0
+    assert events[0]['args']['rows'] == 10
+
+
+def test_nested_profilers(tmp_path):
+    blob_file = tmp_path / 'blob.csv'
+    blob_df = pd.DataFrame({'BlobID': [1, 2], 'Compound Name': ['Phenol', 'Furan'], 'Volume': [1., 2.]})
+    blob_df.to_csv(blob_file, index=False)
+    with Profiler() as outer:
+        with Profiler() as inner:
+            read_blob_file(blob_file)
+        assert len(inner.records) == 1
+
+    assert [record['stage'] for record in outer.records] == ['read_blob_file']
+    assert outer.records[0]['rows'] == 2
+    assert outer.records[0]['peak_memory'] is None
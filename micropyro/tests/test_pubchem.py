@@ -0,0 +1,114 @@
+import asyncio
+import json
+from urllib.parse import unquote
+
+import pytest
+
+from .._http import read_request
+from ..pubchem import PubChemCache, PubChemClient, PubChemError
+
+PROPERTIES = {'phenol': ('C6H6O', '94.11', 'C1=CC=C(C=C1)O'), 'toluene': ('C7H8', '92.14', 'CC1=CC=CC=C1')}
+
+
+class MockPubChem:
+    """
+    Local server answering the property requests like PubChem. The compound "busy" is throttled (503) the first
+    times, "slow" never answers in time.
+    """
+
+    def __init__(self, busy_times=2):
+        self.busy_times = busy_times
+        self.connections = 0
+        self.requests = []
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while (request := await read_request(reader, 1024)) is not None:
+                name = unquote(request.path.split('/')[5])
+                self.requests.append(name)
+                if name == 'slow':
+                    await asyncio.sleep(10)
+                if name == 'busy' and self.requests.count(name) <= self.busy_times:
+                    status, body = 503, b'{"Fault": {"Code": "PUGREST.ServerBusy"}}'
+                elif name in PROPERTIES or name == 'busy':
+                    formula, mw, smiles = PROPERTIES.get(name, PROPERTIES['phenol'])
+                    properties = {'CID': 1, 'MolecularFormula': formula, 'MolecularWeight': mw, 'SMILES': smiles}
+                    body = json.dumps({'PropertyTable': {'Properties': [properties]}}).encode()
+                    status = 200
+                else:
+                    status, body = 404, b'{"Fault": {"Code": "PUGREST.NotFound"}}'
+                # chunked, as PubChem does
+                headers = f'HTTP/1.1 {status} X\r\nTransfer-Encoding: chunked\r\nRetry-After: 0\r\n\r\n'
+                writer.write(headers.encode() + f'{len(body):x}\r\n'.encode() + body + b'\r\n0\r\n\r\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.url = f'http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/rest/pug'
+        return self
+
+    async def __aexit__(self, *args):
+        self.server.close()
+
+
+def test_pubchem_client(tmp_path):
+    async def main():
+        async with MockPubChem() as server:
+            cache = PubChemCache(tmp_path / 'cache.json')
+            names = ['phenol', 'toluene', 'unknown', 'busy'] + [f'unknown {i}' for i in range(20)]
+            async with PubChemClient(server.url, max_connections=3, rate_limit=None, backoff=0.01,
+                                     cache=cache) as client:
+                properties = await client.get_many(names)
+            # the connections are kept alive and reused
+            assert server.connections <= 3
+            assert server.requests.count('busy') == 3
+
+            # a new cache read from the file
+            cache = PubChemCache(tmp_path / 'cache.json')
+            async with PubChemClient(server.url, rate_limit=None, cache=cache) as client:
+                assert await client.get_properties('Phenol') == properties['phenol']
+            assert len(server.requests) == len(names) + 2
+            return properties
+
+    properties = asyncio.run(main())
+    assert properties['phenol'] == {'cid': 1, 'formula': 'C6H6O', 'mw': 94.11, 'smiles': 'C1=CC=C(C=C1)O'}
+    assert properties['unknown'] is None and properties['busy']['formula'] == 'C6H6O'
+
+
+def test_pubchem_client_errors():
+    async def main():
+        async with MockPubChem(busy_times=10) as server:
+            async with PubChemClient(server.url, rate_limit=None, max_retries=2, backoff=0.01) as client:
+                with pytest.raises(PubChemError):
+                    await client.get_properties('busy')
+
+                # the cancelled request closes its connection, the client can still be used
+                task = asyncio.create_task(client.get_properties('slow'))
+                await asyncio.sleep(0.1)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                assert (await client.get_properties('toluene'))['formula'] == 'C7H8'
+
+            client = PubChemClient(server.url, rate_limit=None, max_retries=0, timeout=0.1)
+            with pytest.raises(PubChemError):
+                await client.get_properties('slow')
+            await client.close()
+
+    asyncio.run(main())
+
+
+def test_pubchem_rate_limit():
+    async def main():
+        async with MockPubChem() as server:
+            async with PubChemClient(server.url, rate_limit=50.) as client:
+                start = asyncio.get_running_loop().time()
+                await client.get_many(['phenol', 'toluene', 'a', 'b', 'c', 'd'])
+                return asyncio.get_running_loop().time() - start
+
+    assert asyncio.run(main()) >= 0.09
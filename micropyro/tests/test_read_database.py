@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ..blob_file import perform_matching_database, read_blob_file
+from ..compute_yields import compute_yields_is
+from ..experimental_matrix import ReadExperimentTable
+from ..read_database import ReadDatabase, compact_database_df
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'example')
+
+
+def test_compact_dtypes():
+    database_df = pd.DataFrame({'mw': [94.11, 1e-60], 'c': [6, 40000], 'h': [6., 6.5], 'ecn': [6, 7],
+                                'mrf': [0.669, 1.1], 'group': ['phenols', 'phenols']}, index=['phenol', 'x'])
+    compact_df = compact_database_df(database_df)
+
+    # values that would lose precision or overflow are left untouched
+    assert compact_df['mw'].dtype == np.float64
+    assert compact_df['c'].dtype == np.int64
+    assert compact_df['h'].dtype == np.float64
+    assert compact_df['ecn'].dtype == np.int16
+    assert compact_df['mrf'].dtype == np.float32
+    assert isinstance(compact_df['group'].dtype, pd.CategoricalDtype)
+
+
+def test_compact_yields(tmp_path):
+    experiment_table = ReadExperimentTable.from_csv(os.path.join(EXAMPLE_DIR, 'experimental_matrix.csv'))
+    experiment_table.compute_is_amount(0.03)
+    experiment_row = experiment_table.df.loc['100 ug py_600c-r_350c']
+    blob_file = os.path.join(EXAMPLE_DIR, '100 ug Py_600C-R_350C.cdf_img01_Blob_Table.csv')
+
+    database_file = os.path.join(EXAMPLE_DIR, 'database_example.csv')
+    results = []
+    for database in (ReadDatabase.from_csv(database_file),
+                     ReadDatabase.from_csv(database_file, memmap=str(tmp_path / 'database.bin'))):
+        blob_df = read_blob_file(blob_file)
+        perform_matching_database(blob_df, database.df, extra_columns=['group'])
+        results.append(compute_yields_is(experiment_row, blob_df, 'fluoranthene'))
+
+    # the numeric block is mapped read only
+    assert database.df['mw'].dtype == np.float32
+    assert not database.df['mw'].to_numpy().flags.writeable
+    np.testing.assert_allclose(results[1]['yield mrf'].astype(float), results[0]['yield mrf'].astype(float),
+                               rtol=1e-6)
+
+
+def test_memmap_shared_file(tmp_path):
+    # loading a database again to the same file does not change the columns mapped before
+    database_file = os.path.join(EXAMPLE_DIR, 'database_example.csv')
+    memmap = str(tmp_path / 'database.bin')
+    first = ReadDatabase.from_csv(database_file, memmap=memmap)
+    expected = first.df[['mw', 'mrf', 'c']].to_numpy(dtype=float).copy()
+
+    second = ReadDatabase.from_csv(database_file, memmap=memmap)
+    database_df = ReadDatabase.from_csv(database_file).df
+    other_df = compact_database_df(database_df.iloc[:10].assign(mw=database_df['mw'] * 2), memmap=memmap)
+
+    np.testing.assert_array_equal(first.df[['mw', 'mrf', 'c']].to_numpy(dtype=float), expected)
+    np.testing.assert_array_equal(second.df[['mw', 'mrf', 'c']].to_numpy(dtype=float), expected)
+    np.testing.assert_allclose(other_df['mw'], database_df['mw'].iloc[:10] * 2, rtol=1e-6)
+    assert os.listdir(tmp_path) == ['database.bin']
@@ -0,0 +1,39 @@
+import os
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from ..postprocessing_tools_multiple_files import plot_ranges_MW
+from ..reports import render_figure, render_top_yields_reports
+
+
+def _write_results(directory, n_runs):
+    results_files = []
+    for i_run in range(n_runs):
+        results_df = pd.DataFrame({"mw": [16.04, 94.11, 108.14, 78.11], "yield mrf": [1., 2. + i_run, 3., 0.5]},
+                                  index=["methane", "phenol", "p-cresol", "benzene"])
+        results_file = os.path.join(directory, f"run {i_run}.results.csv")
+        results_df.to_csv(results_file)
+        results_files.append(results_file)
+    return results_files
+
+
+def test_render_top_yields_reports(tmp_path):
+    plt.close('all')
+    results_files = _write_results(str(tmp_path), 3)
+
+    filenames = render_top_yields_reports(results_files, 2, output_dir=str(tmp_path), n_jobs=2)
+
+    assert filenames == [str(tmp_path / f"run {i_run}.top2.png") for i_run in range(3)]
+    assert all(os.path.getsize(filename) > 0 for filename in filenames)
+    assert plt.get_fignums() == []
+
+
+def test_render_figure_campaign(tmp_path):
+    plt.close('all')
+    results_dfs = [pd.read_csv(results_file, index_col=0) for results_file in _write_results(str(tmp_path), 2)]
+
+    render_figure(plot_ranges_MW, str(tmp_path / "ranges.pdf"), results_dfs, [0, 50, 100, 200], x_axis=[600, 700])
+
+    assert os.path.getsize(tmp_path / "ranges.pdf") > 0
+    assert plt.get_fignums() == []
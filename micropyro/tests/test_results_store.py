@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..postprocessing_tools_multiple_files import concat_results, get_yields_summary_runs, top_n_yields
+from ..results_store import ResultsStore
+from ..vocabulary import CompoundVocabulary
+
+
+def _results_df(compounds, yields):
+    yields = np.asarray(yields, dtype=float)
+    return pd.DataFrame({'volume': yields * 10, 'moles ecn': yields, 'moles mrf': yields / 100,
+                         'mass mrf': yields / 10, 'yield mrf': yields}, index=compounds)
+
+
+def test_results_store(tmp_path):
+    database_df = pd.DataFrame({'group': ['phenols', 'aromatics'], 'mw': [94.11, 92.14]},
+                               index=['phenol', 'toluene'])
+    blob_dfs = [_results_df(['phenol', 'toluene'], [1., 2.]),
+                _results_df(['furan', 'phenol', 'toluene'], [3., 4., 5.])]
+
+    store = ResultsStore(tmp_path / 'store', vocabulary=CompoundVocabulary.from_database(database_df))
+    store.append('run 1', blob_dfs[0])
+    store.append('run 2', blob_dfs[1])
+    with pytest.raises(ValueError):
+        store.append('run 1', blob_dfs[0])
+
+    # the store is read again from the files
+    store = ResultsStore(tmp_path / 'store')
+    assert len(store) == 5 and store.run_names == ['run 1', 'run 2']
+    assert store.vocabulary.names == ['phenol', 'toluene', 'furan']
+    assert isinstance(store.column('yield'), np.memmap)
+    np.testing.assert_array_equal(store.column('compound_id'), [0, 1, 2, 0, 1])
+
+    run = store.run('run 2')
+    pd.testing.assert_frame_equal(run, blob_dfs[1].drop(columns='moles ecn'))
+    np.testing.assert_allclose(store.sum_by_run('yield'), [3., 12.])
+
+    results = store.to_frame(database_df=database_df, database_columns=['group', 'mw'])
+    expected = concat_results(blob_dfs, ['run 1', 'run 2']).drop(columns='moles ecn')
+    results_types = {'experiment': object, 'compound': object}
+    pd.testing.assert_frame_equal(results.drop(columns=['group', 'mw']).astype(results_types), expected)
+    assert results['group'].fillna('-').tolist() == ['phenols', 'aromatics', '-', 'phenols', 'aromatics']
+    assert top_n_yields(results, 1)['compound'].tolist() == ['toluene', 'toluene']
+    summary = get_yields_summary_runs(results, groupings=['group'])
+    assert summary.loc[summary['group'] == 'total', 'yield mrf'].tolist() == [3., 12.]
+
+    assert store.to_frame(runs=['run 2'])['compound'].tolist() == ['furan', 'phenol', 'toluene']
+
+
+def test_results_store_interrupted_append(tmp_path):
+    store = ResultsStore(tmp_path)
+    store.append('run 1', _results_df(['phenol'], [1.]))
+    # rows written without the sidecar (e.g. the process stopped) are not in the store, and are overwritten
+    with open(tmp_path / 'yield.bin', 'ab') as fp:
+        fp.write(np.zeros(3).tobytes())
+
+    store = ResultsStore(tmp_path)
+    store.append('run 2', _results_df(['furan'], [2.]))
+    np.testing.assert_array_equal(ResultsStore(tmp_path).column('yield'), [1., 2.])
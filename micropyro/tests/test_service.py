@@ -0,0 +1,72 @@
+import asyncio
+import json
+import os
+import urllib.error
+import urllib.request
+
+from ..read_database import ReadDatabase
+from ..service import YieldService
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'example')
+
+
+def _post(port, path, data):
+    request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=json.dumps(data).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error)
+
+
+def _get(port, path):
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=60) as response:
+        return response.status, json.load(response)
+
+
+def test_service():
+    database = ReadDatabase.from_csv(os.path.join(EXAMPLE_DIR, 'database_example.csv'))
+    with open(os.path.join(EXAMPLE_DIR, '100 ug Py_600C-R_350C.cdf_img01_Blob_Table.csv')) as fp:
+        blob_csv = fp.read()
+    payload = {'blob_csv': blob_csv, 'database': 'example', 'internal_standard': 'fluoranthene',
+               'concentration': 0.03, 'grouping': 'group',
+               'experiment': {'Filename': '100 ug Py_600C-R_350C', 'T (C)': 600, 'Sample (mg)': 0.1,
+                              'IS (mg)': 0.32}}
+
+    async def run():
+        async with YieldService({'example': database}, n_jobs=2, port=0) as service:
+            port = service.port
+            health = await asyncio.to_thread(_get, port, '/health')
+            # concurrent requests
+            responses = await asyncio.gather(*[asyncio.to_thread(_post, port, '/yields', payload)
+                                               for _ in range(4)])
+            bad = await asyncio.gather(asyncio.to_thread(_post, port, '/yields', {'blob_csv': blob_csv}),
+                                       asyncio.to_thread(_post, port, '/yields', {**payload, 'database': 'x'}),
+                                       asyncio.to_thread(_post, port, '/yields',
+                                                         {**payload, 'internal_standard': 'nothing'}))
+            # the requests that cannot be processed still get an answer, and the service keeps running
+            experiment = {**payload['experiment'], 'Sample (mg)': 'abc'}
+            failed = await asyncio.gather(*[asyncio.to_thread(_post, port, '/yields', {**payload, **change})
+                                            for change in ({'blob_csv': 'garbage'}, {'experiment': experiment})])
+            after = await asyncio.to_thread(_post, port, '/yields', payload)
+        return health, responses, bad, failed, after
+
+    health, responses, bad, failed, after = asyncio.run(run())
+    assert health == (200, {'status': 'ok', 'databases': ['example'], 'calibrations': []})
+
+    status, data = responses[0]
+    assert status == 200
+    assert all(response == responses[0] for response in responses)
+    assert data['experiment'] == '100 ug py_600c-r_350c'
+    assert 'fluoranthene' not in data['yields']
+    assert data['yields']['phenol']['yield mrf'] > 0
+    assert data['totals']['total_FID'] > 0
+
+    assert [status for status, _ in bad] == [400, 400, 422]
+    assert 'Internal Standard' in bad[2][1]['error']
+
+    for status, data in failed:
+        assert status == 500
+        assert 'error' in data
+    assert after == responses[0]
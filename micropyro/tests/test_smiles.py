@@ -0,0 +1,48 @@
+import pytest
+
+from ..read_database import ReadDatabase
+from ..smiles import parse_smiles, smiles_properties
+
+
+@pytest.mark.parametrize("smiles, formula, mw, n_benz", [
+    ("C1=CC=C(C=C1)O", "C6H6O", 94.11, 1),  # phenol, Kekulé as given by PubChem
+    ("c1ccc2ccccc2c1", "C10H8", 128.17, 2),  # naphthalene, aromatic
+    ("C1=CC=C2C=C3C=CC=CC3=CC2=C1", "C14H10", 178.23, 3),  # anthracene
+    ("C1=CC=C2C(=C1)C(=O)C3=CC=CC=C3C2=O", "C14H8O2", 208.21, 2),  # anthraquinone
+    ("O=C1C=CC(=O)C=C1", "C6H4O2", 108.10, 0),  # benzoquinone
+    ("C1=CC=NC=C1", "C5H5N", 79.10, 1),  # pyridine
+    ("c1cc[nH]c1", "C4H5N", 67.09, 0),  # pyrrole, five-membered
+    ("C1=CC=C2C=CC=C2C=C1", "C10H8", 128.17, 1),  # azulene, aromatic as a fused system
+    ("C1CCC2=CC=CC=C2C1", "C10H12", 132.20, 1),  # tetralin
+    ("C1=CC=CC=CC=C1", "C8H8", 104.15, 0),  # cyclooctatetraene
+    ("CC(=O)OC1=CC=CC=C1C(=O)O", "C9H8O4", 180.16, 1),  # aspirin
+    ("C1=CC(=CC=C1Cl)[N+](=O)[O-]", "C6H4ClNO2", 157.55, 1),
+    ("C/C=C/C.[Na+].[Cl-]", "C4H8ClNa", None, 0),
+])
+def test_smiles_properties(smiles, formula, mw, n_benz):
+    molecule = parse_smiles(smiles)
+    assert molecule.formula() == formula
+    assert molecule.n_aromatic_rings() == n_benz
+    if mw is None:
+        with pytest.raises(ValueError):
+            molecule.molecular_weight()
+    else:
+        assert smiles_properties(smiles)["mw"] == pytest.approx(mw, abs=0.01)
+
+
+def test_parse_smiles_errors():
+    for smiles in ["C1CC", "C(C", "CC)", "C[Xx", "CQ", ""]:
+        with pytest.raises(ValueError):
+            parse_smiles(smiles)
+
+
+def test_smiles_properties_internal_database():
+    # the formulas and rings of the internal database were obtained with PubChem and openbabel
+    database_df = ReadDatabase.from_internal().df
+    database_df = database_df[database_df["smiles"].str.fullmatch(r"[^,\s]+", na=False)]
+    properties = [smiles_properties(smiles) for smiles in database_df["smiles"]]
+
+    same_formula = [p["formula"].lower() == formula for p, formula in zip(properties, database_df["formula"])]
+    same_rings = [p["n_benz"] == n_benz for p, n_benz in zip(properties, database_df["n_benz"])]
+    assert sum(same_formula) / len(properties) > 0.98
+    assert sum(same_rings) / len(properties) > 0.97
@@ -0,0 +1,84 @@
+import json
+
+import pandas as pd
+import pytest
+
+from ..generate_database import GenerateDatabase
+from ..structures import CacheResolver, ChainResolver, LocalResolver, StructureResolver
+
+SDF = """phenol
+  -OEChem-
+
+  7  7  0     0  0  0  0  0  0999 V2000
+M  END
+> <PUBCHEM_IUPAC_NAME>
+phenol
+
+> <PUBCHEM_IUPAC_TRADITIONAL_NAME>
+carbolic acid
+
+> <PUBCHEM_MOLECULAR_FORMULA>
+C6H6O
+
+> <PUBCHEM_MOLECULAR_WEIGHT>
+94.11
+
+> <PUBCHEM_SMILES>
+C1=CC=C(C=C1)O
+
+$$$$
+1-methylnaphthalene
+
+> <PUBCHEM_SMILES>
+CC1=CC=CC2=CC=CC=C12
+
+$$$$
+"""
+
+
+def test_local_resolver(tmp_path):
+    (tmp_path / "compounds.sdf").write_text(SDF)
+    resolver = LocalResolver(str(tmp_path / "compounds.sdf"))
+    assert resolver.resolve("Carbolic acid") == {"formula": "C6H6O", "mw": 94.11, "smiles": "C1=CC=C(C=C1)O"}
+    # formula and mw computed from the smiles
+    assert resolver.resolve("1-methylnaphthalene")["formula"] == "C11H10"
+    assert resolver.resolve("benzene") is None
+
+    df = pd.DataFrame({"compound": ["Toluene"], "SMILES": ["CC1=CC=CC=C1"], "synonyms": ["methylbenzene|toluol"]})
+    df.to_csv(tmp_path / "compounds.csv", index=False)
+    resolver = LocalResolver(str(tmp_path / "compounds.csv"))
+    assert resolver.resolve("toluol") == {"formula": "C7H8", "mw": 92.14, "smiles": "CC1=CC=CC=C1"}
+
+
+def test_generate_database_offline(tmp_path, monkeypatch):
+    # the compounds not found are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "compounds.sdf").write_text(SDF)
+    with open(tmp_path / "cache.json", "w") as fp:
+        json.dump({"benzene": {"formula": "C6H6", "mw": 78.11, "smiles": "C1=CC=CC=C1"}, "unknown": None}, fp)
+    resolver = ChainResolver([CacheResolver(str(tmp_path / "cache.json")),
+                              LocalResolver(str(tmp_path / "compounds.sdf"))])
+
+    database = GenerateDatabase(pd.DataFrame({"group": ["a", "b", "c", "d"]},
+                                             index=["Benzene", "Phenol", "1-Methylnaphthalene", "unknown"]),
+                                str(tmp_path / "database.csv"))
+    database.get_formula_mw(resolver=resolver)
+    database.get_benzene_rings(use_openbabel=False)
+
+    assert database.df["formula"].tolist()[:3] == ["C6H6", "C6H6O", "C11H10"]
+    assert database.df["n_benz"].tolist() == [1, 1, 2, -1]
+    assert database.df.loc["phenol", "mw"] == 94.11
+    assert (tmp_path / "not_founds.txt").read_text() == "unknown"
+
+
+def test_structure_resolver():
+    with pytest.raises(TypeError):
+        StructureResolver()
+
+    class UpperResolver(StructureResolver):
+        def resolve(self, name):
+            return {"formula": name.upper(), "mw": None, "smiles": None}
+
+    results = UpperResolver().resolve_many(["co", "co", "h2"])
+    assert results == {"co": {"formula": "CO", "mw": None, "smiles": None},
+                       "h2": {"formula": "H2", "mw": None, "smiles": None}}
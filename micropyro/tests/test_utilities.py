@@ -0,0 +1,82 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..utilities import (TotalsWriter, get_actual_filename, get_directory_index, read_totals_directory,
+                         totals_to_dataframe)
+
+
+def test_totals_to_dataframe():
+    list_totals_dict = [{"total_FID": 10, "atoms_FID": {"c": 8., "h": 1.}, "grouping": {"phenols": 2.}},
+                        {"total_FID": 12., "atoms_FID": {"c": 9.}, "light_gases": {"co2": 3.}, "char_yield": 20.}]
+    totals = totals_to_dataframe(list_totals_dict)
+
+    assert set(totals.columns) == {"total_FID", "atoms_FID.c", "atoms_FID.h", "grouping.phenols",
+                                   "light_gases.co2", "char_yield"}
+    assert (totals.dtypes == float).all()
+    np.testing.assert_allclose(totals["atoms_FID.h"], [1., np.nan])
+    assert totals_to_dataframe(totals) is totals
+
+
+def test_read_totals_directory(tmp_path):
+    for mass, temperature in [(100, 600), (180, 800)]:
+        with open(tmp_path / f"{mass} ug Py_{temperature}C-R_350C.totals.json", 'w') as fp:
+            json.dump({"total_FID": mass / 10, "atoms_FID": {"c": 1.}}, fp)
+    with open(tmp_path / "other.json", 'w') as fp:
+        json.dump({}, fp)
+
+    totals = read_totals_directory(str(tmp_path), n_jobs=2)
+
+    assert len(totals) == 2
+    np.testing.assert_allclose(totals["1st_react_temp"], [600, 800])
+    np.testing.assert_allclose(totals["2nd_react_temp"], [350, 350])
+    np.testing.assert_allclose(totals["mass ug"], [100, 180])
+    np.testing.assert_allclose(totals["total_FID"], [10, 18])
+    assert totals.to_dict('records')[0]["atoms_FID.c"] == 1.
+    pd.testing.assert_frame_equal(read_totals_directory(str(tmp_path / "*.totals.json")), totals)
+
+
+def test_get_actual_filename(tmp_path):
+    (tmp_path / "100 ug Py_600C.totals.json").touch()
+    assert get_actual_filename("100 ug py_600c.totals.json", str(tmp_path)) == \
+        str(tmp_path / "100 ug Py_600C.totals.json")
+
+    with pytest.warns(UserWarning):
+        assert get_actual_filename("180 ug py_800c.totals.json", str(tmp_path)) is None
+
+    # the index is updated when the directory changes
+    (tmp_path / "180 ug Py_800C.totals.json").touch()
+    assert get_directory_index(str(tmp_path)).get("180 ug py_800c.totals.json") == "180 ug Py_800C.totals.json"
+
+    # and when a file is not found, even if the modification time did not change (coarse on some file systems)
+    mtime = os.stat(tmp_path).st_mtime_ns
+    (tmp_path / "250 ug Py_800C.totals.json").touch()
+    os.utime(tmp_path, ns=(mtime, mtime))
+    assert get_directory_index(str(tmp_path)).get("250 ug py_800c.totals.json") == "250 ug Py_800C.totals.json"
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_totals_writer(tmp_path, compact):
+    filename = str(tmp_path / "run.totals.json")
+    with open(filename, 'w') as fp:
+        json.dump({"total_FID": 50.}, fp)
+
+    with TotalsWriter(compact=compact) as writer:
+        writer.update(filename, {"char_yield": 20.})
+        writer.update(filename, {"total_gases": 10.})
+        writer.update(str(tmp_path / "new.totals.json"), {"char_yield": 25.})
+
+    with open(filename) as fp:
+        assert json.load(fp) == {"total_FID": 50., "char_yield": 20., "total_gases": 10.}
+    assert sorted(os.listdir(tmp_path)) == ["new.totals.json", "run.totals.json"]
+
+    # nothing is written if it fails
+    with pytest.raises(RuntimeError):
+        with TotalsWriter() as writer:
+            writer.update(filename, {"char_yield": 0.})
+            raise RuntimeError
+    with open(filename) as fp:
+        assert json.load(fp)["char_yield"] == 20.
@@ -0,0 +1,47 @@
+import os
+import shutil
+
+from ..batch import read_database_file, read_experiment_file
+from ..results_store import ResultsStore
+from ..watch import BlobWatcher
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'example')
+BLOB_FILES = ["100 ug Py_600C-R_350C.cdf_img01_Blob_Table.csv", "180 ug Py_800C-R_350C.cdf_img01_Blob_Table.csv"]
+
+
+def test_blob_watcher(tmp_path):
+    blob_dir = tmp_path / "blobs"
+    blob_dir.mkdir()
+    experiment_table = read_experiment_file(os.path.join(EXAMPLE_DIR, "experimental_matrix.csv"))
+    experiment_table.compute_is_amount(0.03)
+    database = read_database_file(os.path.join(EXAMPLE_DIR, "database_example.csv"))
+    store = ResultsStore(tmp_path / "store", vocabulary=database.vocabulary)
+
+    watcher = BlobWatcher(experiment_table, database, str(blob_dir), str(tmp_path / "results"), store=store,
+                          internal_standard_name="fluoranthene", grouping="group", settle_time=0.,
+                          use_inotify=False)
+    assert watcher.poll() == []
+
+    # the blob tables are matched to the matrix whatever the case, and processed as they arrive
+    shutil.copy(os.path.join(EXAMPLE_DIR, BLOB_FILES[0]), blob_dir / BLOB_FILES[0].upper())
+    (blob_dir / "unknown.cdf_img01_Blob_Table.csv").write_text("")
+    runs = watcher.poll()
+    assert [run["status"] for run in runs] == ["processed"]
+    assert store.run_names == [runs[0]["experiment"]]
+    assert os.path.exists(tmp_path / "results" / f"{runs[0]['experiment']}.totals.json")
+    assert watcher.poll() == []
+
+    # files still being written are processed once they stopped changing
+    watcher.settle_time = 0.2
+    shutil.copy(os.path.join(EXAMPLE_DIR, BLOB_FILES[1]), blob_dir)
+    assert watcher.poll() == []
+    assert [run["status"] for run in watcher.watch(interval=0.05, timeout=1.)] == ["processed"]
+    assert len(store.run_names) == 2
+    store = ResultsStore(tmp_path / "store")
+    assert store.sum_by_run("yield").gt(0).all()
+
+    # a new watcher skips the runs already processed
+    watcher = BlobWatcher(experiment_table, database, str(blob_dir), str(tmp_path / "results"),
+                          internal_standard_name="fluoranthene", grouping="group", settle_time=0.)
+    assert watcher.poll() == []
+    watcher.close()
@@ -1,10 +1,25 @@
+import glob
 import json
 import os
 import re
+import tempfile
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+import pandas as pd
 import pkg_resources
 
+from .profiling import profile_stage
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+# numbers followed by C (temperatures) or by ug (mass of sample) in the filenames
+_METADATA_PATTERN = re.compile(r"(\d+)(C| ug)")
+
 
 def get_atom_mw_dict():
     """
@@ -41,71 +56,374 @@ def reader_json_totals(list_filenames):
     for file in list_filenames:
         # if it is a json results file, we process it.
         if "totals.json" in file:
-            with open(file, 'r') as fp:
-                data = json.load(fp)
+            list_totals_dict.append(_read_totals_file(file))
 
-            try:
-                data['1st_react_temp'] = float(re.findall(r"(\d+)C", file)[0])
-            except IndexError:
-                data['1st_react_temp'] = np.nan
-            try:
-                data['2nd_react_temp'] = float(re.findall(r"(\d+)C", file)[1])
-            except IndexError:
-                data['2nd_react_temp'] = np.nan
-            try:
-                data['mass ug'] = float(re.findall(r"(\d+) ug", file)[0])
-            except IndexError:
-                data['mass ug'] = np.nan
+    return list_totals_dict
 
-            list_totals_dict.append(data)
 
-    return list_totals_dict
+def read_totals_directory(path, n_jobs=1):
+    """
+    Reads all the json files with totals of a directory (or matching a glob pattern) in a single table.
+    The files can be loaded on a pool of threads (useful on network drives), using orjson if it is installed.
+    As in reader_json_totals, the temperatures of the reactors and the mass are taken from the filename.
 
+    Parameters
+    ----------
+    path: str
+        directory with the *totals.json files, or glob pattern of the files to read.
+    n_jobs: int or None
+        number of threads. If 1, the files are read sequentially. If None, the default of ThreadPoolExecutor is
+        used.
 
-def append_json(filename, new_data):
+    Returns
+    ----------
+    totals: df
+        dataframe with the totals (see totals_to_dataframe), with an extra column filename.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, '*totals.json')
+    filenames = sorted(glob.glob(path))
+
+    if n_jobs == 1:
+        list_totals_dict = [_read_totals_file(filename) for filename in filenames]
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            list_totals_dict = list(executor.map(_read_totals_file, filenames))
+
+    totals = totals_to_dataframe(list_totals_dict)
+    totals.insert(0, 'filename', filenames)
+    return totals
+
+
+def _read_totals_file(filename):
+    """
+    Reads a json file with totals and adds the temperatures of the reactors and the mass from its name.
+    """
+    if orjson is not None:
+        with open(filename, 'rb') as fp:
+            data = orjson.loads(fp.read())
+    else:
+        with open(filename, 'r') as fp:
+            data = json.load(fp)
+
+    data.update(_parse_totals_metadata(os.path.basename(filename)))
+    return data
+
+
+def _parse_totals_metadata(filename):
+    """
+    Gets the temperature of the reactors (XXXC) and the mass of sample (XXX ug) from a filename,
+    scanning it only once. Not found values are nan.
     """
+    temperatures = []
+    mass = np.nan
+    for number, unit in _METADATA_PATTERN.findall(filename):
+        if unit == 'C':
+            temperatures.append(float(number))
+        elif np.isnan(mass):
+            mass = float(number)
+
+    temperatures += 2 * [np.nan]
+    return {'1st_react_temp': temperatures[0], '2nd_react_temp': temperatures[1], 'mass ug': mass}
+
+
+def totals_to_dataframe(list_totals_dict, sep='.'):
+    """
+    Flattens the totals (as read by reader_json_totals) in a single dataframe, one row per file.
+    The nested dicts (atoms_FID, light_gases, groupings, etc) become columns named with the key of the dict
+    and the subkey, for example atoms_FID.c or light_gases.methane.
+    If a dataframe is given, it is returned directly, so the functions using it can accept both.
+
+    Parameters
+    ----------
+    list_totals_dict: list of dicts or df
+        list of dictionaries with the totals
+    sep: str
+        separator between the key and the subkey in the column names
+
+    Returns
+    ----------
+    totals: df
+        dataframe with the totals, numeric columns are converted to float
+    """
+    if isinstance(list_totals_dict, pd.DataFrame):
+        return list_totals_dict
+
+    totals = pd.json_normalize(list(list_totals_dict), sep=sep)
+
+    for column in totals.columns:
+        if pd.api.types.is_numeric_dtype(totals[column]):
+            totals[column] = totals[column].astype(float)
+        else:
+            # convert only if all the values (except nans) are numbers
+            converted = pd.to_numeric(totals[column], errors='coerce')
+            if converted.notna().sum() == totals[column].notna().sum():
+                totals[column] = converted.astype(float)
+
+    return totals
+
+
+def append_json(filename, new_data, compact=False):
+    """
+    Adds new data to a json file. The file is replaced atomically (see write_json).
 
     Parameters
     ----------
     filename: str
         name of the file to add the new data
+    new_data: dict
+        data to add (or update) in the file
+    compact: bool
+        write the json without indentation
     """
 
     with open(filename, 'r') as fp:
         json_data = json.load(fp)
 
-    with open(filename, 'w') as fp:
-        # appending the data
-        json_data.update(new_data)
+    # appending the data
+    json_data.update(new_data)
+
+    write_json(filename, json_data, compact=compact)
+
+
+@profile_stage()
+def write_json(filename, data, compact=False):
+    """
+    Writes a json file atomically: the data is written to a temporary file in the same directory,
+    which is then renamed to the final name. If anything fails, the previous file is left untouched.
+
+    Parameters
+    ----------
+    filename: str
+        name of the file
+    data: dict
+        data to write
+    compact: bool
+        write the json without indentation (for large campaigns), otherwise indented with sorted keys.
+    """
+    directory, basename = os.path.split(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(prefix=f'.{basename}.', suffix='.tmp', dir=directory)
+
+    try:
+        with os.fdopen(fd, 'w') as fp:
+            if compact:
+                json.dump(data, fp, separators=(',', ':'))
+            else:
+                json.dump(data, fp, indent=4, sort_keys=True)
+            fp.flush()
+            os.fsync(fp.fileno())
+        # keep the permissions of the previous file (mkstemp creates it only readable by the user)
+        try:
+            mode = os.stat(filename).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_filename, mode)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.remove(tmp_filename)
+        raise
 
-        json.dump(json_data, fp, indent=4, sort_keys=True)
 
+class TotalsWriter:
+    """
+    A class used to add data to several json files (usually the totals), writing each file only once.
+    The updates are collected in memory, and written when flushed (or at the end of a with block).
+    Each file is read once, updated with all its data, and replaced atomically (see write_json).
+    ...
 
-def get_actual_filename(name):
+    Attributes
+    ----------
+    compact : bool
+        write the json without indentation
+
+    Methods
+    -------
+    update(self, filename, new_data)
+        Adds data to be written to a file
+    flush(self)
+        Writes all the files with pending data
+
+    Examples
+    ---------
+    >>> with mp.TotalsWriter() as writer:
+    ...     writer.update('100 ug Py_600C.totals.json', {'char_yield': 20})
+    ...     writer.update('100 ug Py_600C.totals.json', {'total_gases': 10})
+    """
+
+    def __init__(self, compact=False):
+        self.compact = compact
+        self._pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # if something failed, nothing is written
+        if exc_type is None:
+            self.flush()
+        else:
+            self._pending = {}
+
+    def update(self, filename, new_data):
+        """
+        Adds data to be written to a file. If the file exists, the data is added to its content.
+
+        Parameters
+        ----------
+        filename: str
+            name of the file
+        new_data: dict
+            data to add (or update)
+        """
+        self._pending.setdefault(filename, {}).update(new_data)
+
+    @profile_stage('TotalsWriter.flush')
+    def flush(self):
+        """
+        Writes all the files with pending data.
+
+        Returns
+        -------
+        filenames: list of str
+            files written
+        """
+        filenames = list(self._pending)
+        for filename, new_data in self._pending.items():
+            try:
+                with open(filename, 'r') as fp:
+                    json_data = json.load(fp)
+            except FileNotFoundError:
+                json_data = {}
+            json_data.update(new_data)
+            write_json(filename, json_data, compact=self.compact)
+
+        self._pending = {}
+        return filenames
+
+
+def get_actual_filename(name, directory=None):
     """
     Get the filename in a case insensitive manner.
+    The directory is listed only once, and listed again only if it changed (see DirectoryIndex).
 
     Parameters
     ----------
     name: str
         name of the file without specific case
+    directory: str or None
+        directory where to search the file. If None, the current working directory is used.
     Returns
     -------
-    matching filename
+    matching filename (with the directory, if given)
     """
-    files_in_dir = os.listdir()
-    files_in_dir_lower = [file.lower() for file in files_in_dir]
+    actual_filename = get_directory_index(directory or '.').get(name)
 
-    try:
-        indx_file = files_in_dir_lower.index(name)
-        actual_filename = files_in_dir[indx_file]
-    except ValueError:
+    if actual_filename is None:
         warnings.warn(f'file {name} not found')
-        actual_filename = None
+    elif directory is not None:
+        actual_filename = os.path.join(directory, actual_filename)
 
     return actual_filename
 
 
+class DirectoryIndex:
+    """
+    A class used to find files in a directory in a case insensitive manner.
+    The directory is listed once, and the names in lower case are mapped to the actual names.
+    The listing is updated when the modification time of the directory changes (files added, removed or
+    renamed), and when a name is not found, as the modification time of some file systems (e.g. SMB or NFS
+    shares, FAT) is too coarse to see a file created right after the last listing.
+    ...
+
+    Attributes
+    ----------
+    directory : str
+        the directory indexed
+
+    Methods
+    -------
+    get(self, name)
+        Actual name of the file, or None if not found.
+    resolve(self, name)
+        Path to the file (directory and actual name), or None if not found.
+    """
+
+    def __init__(self, directory='.'):
+        self.directory = directory
+        self._mtime = None
+        self._names = {}
+
+    def _refresh(self, force=False):
+        """
+        Lists the directory again if it was modified since the last listing (or always, if force).
+
+        :return: bool
+                whether the directory was listed again.
+        """
+        mtime = os.stat(self.directory).st_mtime_ns
+        if force or mtime != self._mtime:
+            names = {}
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    # if several files only differ by the case, keep the first one
+                    names.setdefault(entry.name.lower(), entry.name)
+            self._names = names
+            self._mtime = mtime
+            return True
+        return False
+
+    def get(self, name):
+        """
+        :param name: str
+                name of the file, in any case.
+        :return: str or None
+                actual name of the file in the directory.
+        """
+        refreshed = self._refresh()
+        actual_name = self._names.get(name.lower())
+        if actual_name is None and not refreshed:
+            # the file may have been created without changing the modification time of the directory
+            self._refresh(force=True)
+            actual_name = self._names.get(name.lower())
+        return actual_name
+
+    def resolve(self, name):
+        """
+        :param name: str
+                name of the file, in any case.
+        :return: str or None
+                path to the file.
+        """
+        actual_name = self.get(name)
+        if actual_name is None:
+            return None
+        return os.path.join(self.directory, actual_name)
+
+
+_directory_indexes = {}
+
+
+def get_directory_index(directory='.'):
+    """
+    Get the (cached) DirectoryIndex of a directory.
+
+    Parameters
+    ----------
+    directory: str
+        directory to index
+
+    Returns
+    -------
+    directory_index: DirectoryIndex
+    """
+    directory = os.path.abspath(directory)
+    try:
+        return _directory_indexes[directory]
+    except KeyError:
+        directory_index = _directory_indexes[directory] = DirectoryIndex(directory)
+        return directory_index
+
+
 def get_markers():
     # list of markers
     return ["o", "v",  "s", "^", "<", ">", ".", "1", "2", "3", "4", "8", "p", "P", "*", "h", "H", "+", "x", "X", "D",
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+
+class CompoundVocabulary:
+    """
+    A class used to give an integer id (code) to each compound name, shared by all the runs of a campaign.
+    It is usually built from the database (see ReadDatabase.vocabulary), and grows with the compounds not found
+    in it. Long tables can then store int32 codes, or pandas Categoricals on the vocabulary, instead of repeating
+    the names, so that joins, groupbys and pivots work on integers.
+    ...
+
+    Attributes
+    ----------
+    names : list of str
+        names of the compounds, the position is the code
+
+    Methods
+    -------
+    from_database(cls, database)
+        Builds the vocabulary from a database
+    add(self, names)
+        Adds new names to the vocabulary
+    encode(self, names, add=False)
+        Codes of the names
+    decode(self, codes)
+        Names of the codes
+    categorical(self, names, add=True)
+        Categorical of the names on the vocabulary
+
+    Examples
+    ---------
+    >>> vocabulary = mp.CompoundVocabulary.from_database(database)
+    >>> codes = vocabulary.encode(blob_df.index, add=True)
+    >>> vocabulary.decode(codes)
+    """
+
+    def __init__(self, names=()):
+        self.names = []
+        self._index = pd.Index([], dtype=object)
+        self._dtype = None
+        self.add(names)
+
+    @classmethod
+    def from_database(cls, database):
+        """
+        Builds the vocabulary from the compounds of a database.
+
+        Parameters
+        ----------
+        database: ReadDatabase or df
+            database (or its dataframe) with the names of the compounds as index
+
+        Returns
+        -------
+        vocabulary: CompoundVocabulary
+        """
+        database_df = getattr(database, 'df', database)
+        return cls(database_df.index)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name):
+        return self._index.get_loc(name)
+
+    def __repr__(self):
+        return f'CompoundVocabulary({len(self)} compounds)'
+
+    @property
+    def dtype(self):
+        """
+        Categorical dtype with the names of the vocabulary as categories (in the order of the codes).
+        """
+        if self._dtype is None:
+            self._dtype = pd.CategoricalDtype(self._index)
+        return self._dtype
+
+    def add(self, names):
+        """
+        Adds new names to the vocabulary (the ones already in it are ignored).
+
+        Parameters
+        ----------
+        names: list of str
+
+        Returns
+        -------
+        n_added: int
+            number of names added
+        """
+        names = pd.unique(pd.Index(names, dtype=object).dropna())
+        new_names = names[self._index.get_indexer(names) < 0] if len(self._index) else names
+        if len(new_names):
+            self.names.extend(new_names)
+            self._index = pd.Index(self.names, dtype=object)
+            self._dtype = None
+        return len(new_names)
+
+    def encode(self, names, add=False):
+        """
+        Codes (int32) of the names. Names not in the vocabulary are -1, unless add is True.
+
+        Parameters
+        ----------
+        names: list of str
+        add: bool
+            add the names not found to the vocabulary
+
+        Returns
+        -------
+        codes: np.array of int32
+        """
+        if add:
+            self.add(names)
+        return self._index.get_indexer(pd.Index(names, dtype=object)).astype(np.int32)
+
+    def decode(self, codes):
+        """
+        Names of the codes (nan for -1).
+
+        Parameters
+        ----------
+        codes: array of ints
+
+        Returns
+        -------
+        names: np.array of objects
+        """
+        return np.asarray(pd.Categorical.from_codes(np.asarray(codes), dtype=self.dtype), dtype=object)
+
+    def categorical(self, names, add=True):
+        """
+        Categorical of the names with the vocabulary as categories, so that the categoricals of different runs
+        can be combined without new categories.
+
+        Parameters
+        ----------
+        names: list of str
+        add: bool
+            add the names not found to the vocabulary (otherwise they are nan)
+
+        Returns
+        -------
+        categorical: pd.Categorical
+        """
+        codes = self.encode(names, add=add)
+        return pd.Categorical.from_codes(codes, dtype=self.dtype)
@@ -0,0 +1,239 @@
+import os
+import time
+
+from .batch import (BLOB_SUFFIX, MANIFEST_FILENAME, _fingerprint_run, _read_manifest, _run_settings, process_run)
+from .logs import get_logger
+from .utilities import write_json
+
+try:
+    import inotify_simple
+except ModuleNotFoundError:
+    inotify_simple = None
+
+_logger = get_logger(__name__)
+
+
+class BlobWatcher:
+    """
+    A class used to process the blob tables of a campaign as they are written (e.g. by GC Image to a share),
+    instead of processing the whole directory again. The directory is scanned for new or modified blob tables,
+    which are matched to the rows of the experimental matrix by their name ({filename}.cdf_img01_Blob_Table.csv,
+    case insensitive), and processed (see process_run) as soon as they stopped changing (same size and
+    modification time for settle_time seconds). The results and totals are written to the output directory, and
+    optionally appended to a results store.
+    The directory is polled, and if inotify_simple is installed (Linux), the watcher wakes up as soon as a file
+    is written instead of waiting for the next poll (network shares do not always send the events, so the
+    directory is still polled).
+    The manifest of the output directory is shared with process_campaign: the runs already processed with the
+    same inputs are not processed again when the watcher is started.
+    ...
+
+    Attributes
+    ----------
+    experiment_table : ReadExperimentTable
+        experimental matrix (with the IS amount computed, if used)
+    blob_dir : str
+        directory with the blob files
+    output_dir : str
+        directory where the results are saved
+    store : ResultsStore
+        store where the results are appended
+    settle_time : float
+        time (s) without changes before a blob table is processed
+
+    Methods
+    -------
+    poll(self)
+        Scans the directory once and processes the blob tables that are ready
+    watch(self, interval=1., timeout=None)
+        Processes the blob tables as they arrive, until the timeout
+    close(self)
+        Stops the inotify watch, if any
+
+    Examples
+    ---------
+    >>> store = mp.ResultsStore('campaign_store', vocabulary=database.vocabulary)
+    >>> watcher = mp.BlobWatcher(experiment_table, database, 'blobs', 'results', store=store,
+    ...                          internal_standard_name='fluoranthene', grouping='group')
+    >>> watcher.watch(interval=2.)
+    """
+
+    def __init__(self, experiment_table, database, blob_dir, output_dir, store=None, internal_standard_name=None,
+                 calibration_file=None, reference_compound=None, compounds_drop=None, grouping=None,
+                 settle_time=2., use_inotify=True):
+        """
+        :param experiment_table: ReadExperimentTable
+                experimental matrix (with the IS amount computed, if used)
+        :param database: ReadDatabase
+                database of compounds
+        :param blob_dir: str
+                directory with the blob files
+        :param output_dir: str
+                directory where the results are saved
+        :param store: ResultsStore
+                store where the results are appended
+        :param internal_standard_name, calibration_file, reference_compound, compounds_drop, grouping:
+                see process_run
+        :param settle_time: float
+                time (s) without changes before a blob table is processed
+        :param use_inotify: bool
+                wake up on the inotify events of the directory, if inotify_simple is installed
+        """
+        self.experiment_table = experiment_table
+        self.blob_dir = blob_dir
+        self.output_dir = output_dir
+        self.store = store
+        self.settle_time = settle_time
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._database_df = database.df
+        extra_columns, self._settings = _run_settings(self._database_df, internal_standard_name, calibration_file,
+                                                      reference_compound, compounds_drop, grouping)
+        self._options = (internal_standard_name, calibration_file, reference_compound, compounds_drop,
+                         extra_columns, grouping)
+
+        self._manifest_filename = os.path.join(output_dir, MANIFEST_FILENAME)
+        self._manifest = _read_manifest(self._manifest_filename)
+        # experiment of each blob table name (in lower case)
+        self._experiments = {f'{name}{BLOB_SUFFIX}'.lower(): name for name in experiment_table.df.index}
+        # blob table name: (size, mtime) and time when it was first seen, until it is processed
+        self._pending = {}
+        # blob table name: (size, mtime) when it was processed (or failed, or could not be matched)
+        self._done = {}
+
+        self._inotify = None
+        if use_inotify and inotify_simple is not None:
+            self._inotify = inotify_simple.INotify()
+            watch_flags = (inotify_simple.flags.CLOSE_WRITE | inotify_simple.flags.MOVED_TO
+                           | inotify_simple.flags.MODIFY)
+            self._inotify.add_watch(blob_dir, watch_flags)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Stops the inotify watch, if any.
+        """
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def poll(self):
+        """
+        Scans the directory once, and processes the blob tables that did not change since settle_time.
+
+        :return: list of dicts
+                for each blob table processed, the experiment name, status (processed or failed), and timings
+                or error (see process_run)
+        """
+        now = time.monotonic()
+        runs_info = []
+        for name, signature in self._scan().items():
+            if self._done.get(name) == signature:
+                continue
+            pending_signature, first_seen = self._pending.get(name, (None, None))
+            if pending_signature != signature:
+                # new or still being written
+                self._pending[name] = (signature, now)
+                if self.settle_time > 0:
+                    continue
+            elif now - first_seen < self.settle_time:
+                continue
+
+            del self._pending[name]
+            self._done[name] = signature
+            run_info = self._process(name)
+            if run_info is not None:
+                runs_info.append(run_info)
+        return runs_info
+
+    def watch(self, interval=1., timeout=None):
+        """
+        Processes the blob tables as they arrive, until the timeout (or forever).
+
+        :param interval: float
+                time (s) between two scans of the directory
+        :param timeout: float
+                time (s) after which the watcher stops. If None, it runs until interrupted.
+        :return: list of dicts
+                runs processed (see poll)
+        """
+        _logger.info('watching %s', self.blob_dir)
+        end = None if timeout is None else time.monotonic() + timeout
+        runs_info = []
+        while True:
+            runs_info.extend(self.poll())
+            wait = interval
+            if self._pending:
+                # wake up when the first blob table being written can be processed
+                settled = min(first_seen for _, first_seen in self._pending.values()) + self.settle_time
+                wait = max(min(wait, settled - time.monotonic()), 0.)
+            if end is not None:
+                wait = min(wait, end - time.monotonic())
+                if wait <= 0:
+                    return runs_info
+            self._wait(wait)
+
+    def _wait(self, wait):
+        if self._inotify is None:
+            time.sleep(wait)
+            return
+        # the events are only used to wake up earlier, the directory is scanned anyway
+        self._inotify.read(timeout=int(wait * 1000))
+
+    def _scan(self):
+        """
+        Size and modification time of the blob tables in the directory.
+        """
+        signatures = {}
+        with os.scandir(self.blob_dir) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith(BLOB_SUFFIX.lower()):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                signatures[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return signatures
+
+    def _process(self, name):
+        experiment_name = self._experiments.get(name.lower())
+        if experiment_name is None:
+            _logger.warning('%s not found in the experimental matrix', name)
+            return None
+
+        blob_file = os.path.join(self.blob_dir, name)
+        experiment_row = self.experiment_table.df.loc[experiment_name]
+        fingerprint = _fingerprint_run(blob_file, experiment_row, self._settings)
+        if self._manifest.get(experiment_name) == fingerprint:
+            _logger.debug('%s already processed', experiment_name)
+            return None
+
+        # the results store is append only, a run modified after being stored is not replaced
+        store = self.store
+        if store is not None and experiment_name in store.run_names:
+            _logger.warning('%s already in the results store, only the results files are updated', experiment_name)
+            store = None
+
+        start = time.perf_counter()
+        try:
+            run_info = process_run(experiment_name, experiment_row, blob_file, self._database_df, self.output_dir,
+                                   *self._options, store=store)
+            run_info['status'] = 'processed'
+            self._manifest[experiment_name] = fingerprint
+        except Exception as error:
+            message = f'{type(error).__name__}: {error}'
+            _logger.error('%s failed: %s', experiment_name, message)
+            run_info = {'experiment': experiment_name, 'status': 'failed', 'error': message}
+            self._manifest.pop(experiment_name, None)
+        run_info['wall_time'] = time.perf_counter() - start
+        write_json(self._manifest_filename, self._manifest)
+
+        if run_info['status'] == 'processed':
+            _logger.info('%s processed in %.2f s', experiment_name, run_info['wall_time'])
+        return run_info